@@ -12,6 +12,14 @@ from .nodes.qwen_grain_effect import NODE_CLASS_MAPPINGS as QWEN_GRAIN_EFFECT_MA
 from .nodes.batch_size_control_node import NODE_CLASS_MAPPINGS as BATCH_SIZE_CONTROL_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as BATCH_SIZE_CONTROL_DISPLAY_NAMES
 from .nodes.shutdown_timer_node import NODE_CLASS_MAPPINGS as SHUTDOWN_TIMER_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as SHUTDOWN_TIMER_DISPLAY_NAMES
 from .nodes.shutdown_timer_advanced_node import NODE_CLASS_MAPPINGS as SHUTDOWN_TIMER_ADVANCED_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as SHUTDOWN_TIMER_ADVANCED_DISPLAY_NAMES
+from .nodes.prompt_dedup_node import NODE_CLASS_MAPPINGS as PROMPT_DEDUP_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as PROMPT_DEDUP_DISPLAY_NAMES
+from .nodes.prompt_template_node import NODE_CLASS_MAPPINGS as PROMPT_TEMPLATE_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as PROMPT_TEMPLATE_DISPLAY_NAMES
+from .nodes.work_queue_node import NODE_CLASS_MAPPINGS as WORK_QUEUE_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as WORK_QUEUE_DISPLAY_NAMES
+from .nodes.text_pipeline_node import NODE_CLASS_MAPPINGS as TEXT_PIPELINE_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as TEXT_PIPELINE_DISPLAY_NAMES
+from .nodes.light_camera_matrix_node import NODE_CLASS_MAPPINGS as LIGHT_CAMERA_MATRIX_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as LIGHT_CAMERA_MATRIX_DISPLAY_NAMES
+
+# 注册提示词目录 API 路由（不包含节点）
+from .nodes import catalog_api
 
 # 合并所有节点映射
 NODE_CLASS_MAPPINGS = {
@@ -27,7 +35,12 @@ NODE_CLASS_MAPPINGS = {
     **QWEN_GRAIN_EFFECT_MAPPINGS,
     **BATCH_SIZE_CONTROL_MAPPINGS,
     **SHUTDOWN_TIMER_MAPPINGS,
-    **SHUTDOWN_TIMER_ADVANCED_MAPPINGS
+    **SHUTDOWN_TIMER_ADVANCED_MAPPINGS,
+    **PROMPT_DEDUP_MAPPINGS,
+    **PROMPT_TEMPLATE_MAPPINGS,
+    **WORK_QUEUE_MAPPINGS,
+    **TEXT_PIPELINE_MAPPINGS,
+    **LIGHT_CAMERA_MATRIX_MAPPINGS
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -43,7 +56,12 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     **QWEN_GRAIN_EFFECT_DISPLAY_NAMES,
     **BATCH_SIZE_CONTROL_DISPLAY_NAMES,
     **SHUTDOWN_TIMER_DISPLAY_NAMES,
-    **SHUTDOWN_TIMER_ADVANCED_DISPLAY_NAMES
+    **SHUTDOWN_TIMER_ADVANCED_DISPLAY_NAMES,
+    **PROMPT_DEDUP_DISPLAY_NAMES,
+    **PROMPT_TEMPLATE_DISPLAY_NAMES,
+    **WORK_QUEUE_DISPLAY_NAMES,
+    **TEXT_PIPELINE_DISPLAY_NAMES,
+    **LIGHT_CAMERA_MATRIX_DISPLAY_NAMES
 }
 
 WEB_DIRECTORY = "./web/extensions"
@@ -1,5 +1,178 @@
+import os
+
 import torch
 
+from .workflow_index import get_workflow_index
+
+# 支持的批量输入类型，输出使用相同的联合类型，可连接到任意一种输入
+BATCH_TYPES = "IMAGE,LATENT,MASK"
+
+# 下游节点的内存模型，单位：每个输入元素（H×W×C）占用的字节数
+#   transient: 处理单张时的临时内存峰值（只存在一份）
+#   retained:  每张处理完后保留到批次结束的内存
+#   final:     批次结束合并输出时每张的内存峰值
+# 颗粒质感按默认参数用 tracemalloc 实测（float64 中间数组约 47 字节/元素，保留 8，合并 8+4），
+# 泛光效果只处理单张，按其 float64 中间数组估算（这两个节点内部总是转为 float64，与输入 dtype 无关）；
+# 其余节点按输出一份与输入相同 dtype 的拷贝计算（按 float32 给出，实际按输入 dtype 缩放）
+EFFECT_MEMORY_MODELS = {
+    "🍉Image-颗粒质感": {"transient": 56, "retained": 8, "final": 20},
+    "🍭Image-泛光效果": {"transient": 80, "retained": 8, "final": 8},
+    "通用（输出一份拷贝）": {"transient": 0, "retained": 4, "final": 4, "scale_with_dtype": True},
+}
+
+
+def read_available_memory():
+    """
+    可用内存（字节），优先读取 /proc/meminfo 的 MemAvailable，读取失败时返回 None
+    """
+    try:
+        fields = {}
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if parts:
+                    fields[name] = int(parts[0]) * 1024
+        if "MemAvailable" in fields:
+            return fields["MemAvailable"]
+        if "MemFree" in fields:
+            # 旧内核没有 MemAvailable
+            return fields["MemFree"] + fields.get("Cached", 0) + fields.get("Buffers", 0)
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+# 预算变化的判断粒度，与 budget_limit_mb 的步长一致
+BUDGET_GRANULARITY_MB = 256
+
+
+def memory_budget(budget_percent, budget_limit_mb):
+    """
+    返回 (可用内存, 预算)，单位字节：预算 = 可用内存 × 百分比，再受上限约束；
+    读取不到可用内存且没有上限时预算为 None
+    """
+    available = read_available_memory()
+    budget = available * budget_percent // 100 if available is not None else None
+    if budget_limit_mb > 0:
+        limit = budget_limit_mb * 1024 * 1024
+        budget = limit if budget is None else min(budget, limit)
+    return available, budget
+
+
+def plan_batch(elements_per_item, total_items, budget_bytes, model):
+    """
+    计算预算内能处理的最大批量和均衡的分块大小
+
+    返回:
+        (max_batch, chunk_size)：max_batch 为预算内最多同时处理的张数（不超过总数，至少为 1），
+        chunk_size 为把全部张数均匀分成最少块数时每块的张数
+    """
+    transient = model["transient"] * elements_per_item
+    retained = model["retained"] * elements_per_item
+    final = model["final"] * elements_per_item
+
+    # 满足 max(B×retained + transient, B×final) ≤ budget 的最大 B
+    limits = []
+    if retained > 0:
+        limits.append((budget_bytes - transient) // retained)
+    if final > 0:
+        limits.append(budget_bytes // final)
+    max_batch = int(min(limits)) if limits else total_items
+    max_batch = max(1, min(max_batch, total_items))
+
+    chunks = -(-total_items // max_batch)
+    chunk_size = -(-total_items // chunks)
+    return max_batch, chunk_size
+
+
+def detect_batch_type(value):
+    """
+    根据对象本身判断输入类型，无法判断时返回 None
+
+    - LATENT: 带 "samples" 张量的字典
+    - IMAGE: [B, H, W, C] 张量，C 为 1/3/4
+    - MASK: [B, H, W] 或 [H, W] 张量
+    """
+    if isinstance(value, dict):
+        return "LATENT" if isinstance(value.get("samples"), torch.Tensor) else None
+    if not isinstance(value, torch.Tensor):
+        return None
+    if value.dim() == 4 and value.shape[-1] in (1, 3, 4):
+        return "IMAGE"
+    if value.dim() in (2, 3):
+        return "MASK"
+    return None
+
+
+def batch_length(value, input_type):
+    """输入中的条目数量"""
+    tensor = value["samples"] if input_type == "LATENT" else value
+    if input_type == "MASK" and tensor.dim() == 2:
+        return 1
+    return tensor.shape[0] if hasattr(tensor, "shape") and len(tensor.shape) > 0 else 1
+
+
+def slice_batch(value, input_type, start, end):
+    """
+    取出 [start, end) 范围的条目，张量切片是视图，不复制数据
+    """
+    if input_type == "MASK" and value.dim() == 2:
+        return value
+    if input_type != "LATENT":
+        return value[start:end]
+
+    total = value["samples"].shape[0]
+    chunk = dict(value)
+    chunk["samples"] = value["samples"][start:end]
+    noise_mask = value.get("noise_mask")
+    if isinstance(noise_mask, torch.Tensor) and noise_mask.dim() > 0 and noise_mask.shape[0] == total:
+        chunk["noise_mask"] = noise_mask[start:end]
+    if isinstance(value.get("batch_index"), list):
+        chunk["batch_index"] = value["batch_index"][start:end]
+    return chunk
+
+
+def chunk_batch(value, input_type, chunk_size):
+    """按 chunk_size 切分为视图列表；整批不超过 chunk_size 时原样返回，不切片"""
+    total = batch_length(value, input_type)
+    if chunk_size <= 0 or total <= chunk_size:
+        return [value]
+    return [slice_batch(value, input_type, start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+
+def merge_batches(chunks):
+    """合并分块结果，只有一块时直接返回，不复制"""
+    chunks = [chunk for chunk in chunks if chunk is not None]
+    if not chunks:
+        return None
+    if len(chunks) == 1:
+        return chunks[0]
+
+    input_type = detect_batch_type(chunks[0])
+    if input_type != "LATENT":
+        return torch.cat(chunks, dim=0)
+
+    merged = dict(chunks[0])
+    merged["samples"] = torch.cat([chunk["samples"] for chunk in chunks], dim=0)
+    noise_masks = [chunk.get("noise_mask") for chunk in chunks]
+    if all(isinstance(mask, torch.Tensor) for mask in noise_masks) and all(
+        mask.shape[0] == chunk["samples"].shape[0] for mask, chunk in zip(noise_masks, chunks)
+    ):
+        merged["noise_mask"] = torch.cat(noise_masks, dim=0)
+    else:
+        merged.pop("noise_mask", None)
+    batch_indexes = [chunk.get("batch_index") for chunk in chunks]
+    if all(isinstance(indexes, list) for indexes in batch_indexes):
+        merged["batch_index"] = [i for indexes in batch_indexes for i in indexes]
+    else:
+        merged.pop("batch_index", None)
+    return merged
+
+
 class BatchSizeControl:
     def __init__(self):
         pass
@@ -8,7 +181,7 @@ class BatchSizeControl:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "tensor": ("IMAGE,LATENT,MASK", {}),
+                "tensor": (BATCH_TYPES, {}),
                 "batch_size": ("INT", {
                     "default": 0,
                     "min": 0,
@@ -24,46 +197,134 @@ class BatchSizeControl:
         }
 
     NAME = "批量控制-xishen"
-    RETURN_TYPES = ("INT",)
-    RETURN_NAMES = ("batch_size",)
+    RETURN_TYPES = ("INT", BATCH_TYPES)
+    RETURN_NAMES = ("batch_size", "chunks")
+    # chunks 是最多 batch_size 条的分块列表，下游节点逐块处理，峰值内存受 batch_size 限制
+    OUTPUT_IS_LIST = (False, True)
     FUNCTION = "run"
     CATEGORY = "🍡Comfyui-xishen"
     OUTPUT_NODE = True
 
     def run(self, tensor, batch_size, unique_id, prompt, extra_pnginfo):
-        # 从工作流元数据中获取输入类型
-        node_list = extra_pnginfo["workflow"]["nodes"]
-        cur_node = next(n for n in node_list if str(n["id"]) == unique_id)
-        link_id = cur_node["inputs"][0]["link"]
-        link = next(l for l in extra_pnginfo["workflow"]["links"] if l[0] == link_id)
-        in_node_id, in_socket_id = link[1], link[2]
-        in_node = next(n for n in node_list if n["id"] == in_node_id)
-        input_type = in_node["outputs"][in_socket_id]["type"]
+        # 直接根据对象判断输入类型，无法判断时再从工作流元数据中查找（共享索引）
+        input_type = detect_batch_type(tensor)
+        if input_type is None and extra_pnginfo:
+            input_type = get_workflow_index(extra_pnginfo["workflow"]).input_type(unique_id, 0)
 
         # 获取tensor的实际batch_size
         actual_batch_size = 1
-
-        if input_type == "IMAGE":
-            actual_batch_size = tensor.shape[0] if hasattr(tensor, "shape") and len(tensor.shape) > 0 else 1
-        elif input_type == "LATENT" or (type(tensor) is dict and "samples" in tensor):
-            samples = tensor["samples"]
-            actual_batch_size = samples.shape[0] if hasattr(samples, "shape") and len(samples.shape) > 0 else 1
-        elif input_type == "MASK":
-            actual_batch_size = tensor.shape[0] if hasattr(tensor, "shape") and len(tensor.shape) > 0 else 1
+        if input_type in ("IMAGE", "LATENT", "MASK"):
+            actual_batch_size = batch_length(tensor, input_type)
 
         # 根据用户输入决定最终的batch_size
         final_batch_size = actual_batch_size
         if batch_size > 0:
             final_batch_size = min(batch_size, actual_batch_size)
 
+        # 分块输出为视图切片，不复制数据
+        chunks = chunk_batch(tensor, input_type, batch_size) if input_type else [tensor]
+
+        return {
+            "result": (final_batch_size, chunks)
+        }
+
+
+class BatchMemoryPlanner:
+    """根据输入形状和下游节点的内存模型，在内存预算内规划批量和分块大小"""
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "tensor": (BATCH_TYPES, {}),
+                "effect": (list(EFFECT_MEMORY_MODELS.keys()), {"default": "🍉Image-颗粒质感"}),
+                # 预算 = 当前可用内存 × 百分比，再受上限约束
+                "budget_percent": ("INT", {"default": 60, "min": 1, "max": 100, "step": 1}),
+                "budget_limit_mb": ("INT", {"default": 0, "min": 0, "max": 1048576, "step": 256}),
+            },
+        }
+
+    NAME = "批量内存规划-xishen"
+    RETURN_TYPES = ("INT", "INT", "STRING")
+    RETURN_NAMES = ("batch_size", "chunk_size", "report")
+    FUNCTION = "plan"
+    CATEGORY = "🍡Comfyui-xishen"
+
+    @classmethod
+    def IS_CHANGED(s, budget_percent=60, budget_limit_mb=0, **kwargs):
+        # 可用内存每次执行都可能变化，按 BUDGET_GRANULARITY_MB 取整后比较，
+        # 预算跨过一个粒度才重新规划，下游节点不会因为内存的微小波动而重新执行
+        # （连线输入的 tensor 不会传给 IS_CHANGED，它的变化由缓存按输入本身判断）
+        _, budget = memory_budget(budget_percent, budget_limit_mb)
+        if budget is None:
+            return "unlimited"
+        return budget // (BUDGET_GRANULARITY_MB * 1024 * 1024)
+
+    def plan(self, tensor, effect, budget_percent, budget_limit_mb):
+        input_type = detect_batch_type(tensor)
+        if input_type is None:
+            return (1, 1, "无法识别输入类型，按 1 张处理")
+
+        total = batch_length(tensor, input_type)
+        samples = tensor["samples"] if input_type == "LATENT" else tensor
+        # 每张的元素数量（IMAGE 为 H×W×C），单张 2D 掩码整体算一张
+        elements = samples.numel() // total if samples.numel() else 0
+
+        available, budget = memory_budget(budget_percent, budget_limit_mb)
+        if budget is None:
+            return (total, total, "无法读取可用内存且未设置预算上限，不做限制")
+
+        model = EFFECT_MEMORY_MODELS.get(effect, EFFECT_MEMORY_MODELS["通用（输出一份拷贝）"])
+        if model.get("scale_with_dtype"):
+            scale = samples.element_size() / 4
+            model = {key: model[key] * scale for key in ("transient", "retained", "final")}
+        max_batch, chunk_size = plan_batch(elements, total, budget, model)
+
+        mb = 1024 * 1024
+        lines = [f"类型: {input_type}，形状: {tuple(samples.shape)}，dtype: {samples.dtype}"]
+        if available is not None:
+            lines.append(f"可用内存: {available / mb:.0f} MB")
+        lines.append(f"预算: {budget / mb:.0f} MB")
+        lines.append(
+            f"下游节点: {effect}，每张保留约 {model['retained'] * elements / mb:.1f} MB，"
+            f"单张临时峰值约 {model['transient'] * elements / mb:.1f} MB"
+        )
+        lines.append(f"最大批量: {max_batch} / {total}，分块大小: {chunk_size}（{-(-total // chunk_size)} 块）")
+        report = "\n".join(lines)
+        print(f"📐 批量内存规划: {report}")
+        return (max_batch, chunk_size, report)
+
+
+class BatchMerge:
+    """将批量控制输出的分块（或任意同类型列表）重新合并为一个批次"""
+
+    @classmethod
+    def INPUT_TYPES(s):
         return {
-            "result": (final_batch_size,)
+            "required": {
+                "chunks": (BATCH_TYPES, {}),
+            },
         }
 
+    NAME = "批量合并-xishen"
+    INPUT_IS_LIST = True
+    RETURN_TYPES = (BATCH_TYPES,)
+    RETURN_NAMES = ("batch",)
+    FUNCTION = "merge"
+    CATEGORY = "🍡Comfyui-xishen"
+
+    def merge(self, chunks):
+        return (merge_batches(chunks),)
+
+
 NODE_CLASS_MAPPINGS = {
     "BatchSizeControl": BatchSizeControl,
+    "BatchMerge": BatchMerge,
+    "BatchMemoryPlanner": BatchMemoryPlanner,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "BatchSizeControl": "批量控制-xishen",
+    "BatchMerge": "批量合并-xishen",
+    "BatchMemoryPlanner": "批量内存规划-xishen",
 }
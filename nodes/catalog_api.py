@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词目录 API - 主题/提示词分类的服务端接口
+
+功能：
+1. 提供主题提示词库的一级分类、按一级分类懒加载的二级分类，以及前缀搜索
+2. 提供常用提示词库的分类目录、按分类分页读取提示词，以及分类名前缀搜索
+3. 前缀搜索使用字典树索引，每个节点预存有限数量的结果
+4. 响应带 ETag，支持 If-None-Match 返回 304；客户端支持时使用 gzip 压缩
+5. 响应按数据源版本缓存，数据文件变化后自动失效
+
+接口：
+- GET /xishen/theme/categories
+- GET /xishen/theme/subcategories?primary=一级分类
+- GET /xishen/theme/search?q=前缀&limit=20
+- GET /xishen/prompts/categories
+- GET /xishen/prompts/list?primary=一级分类&secondary=二级分类&offset=0&limit=50
+- GET /xishen/prompts/search?q=前缀&limit=20
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+
+import server
+from aiohttp import web
+
+from .prompt_library import get_library_index
+from .theme_library import get_theme_index
+
+# 小于该大小的响应不压缩
+GZIP_MIN_SIZE = 1024
+# 字典树每个节点保存的最多结果数
+TRIE_NODE_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+MAX_LIST_LIMIT = 500
+# 每个数据源版本最多缓存的响应数量
+RESPONSE_CACHE_SIZE = 512
+
+
+class PrefixTrie:
+    """
+    前缀搜索字典树
+
+    每个节点保存经过它的前 TRIE_NODE_LIMIT 个值，查询时间只与前缀长度有关。
+    """
+
+    def __init__(self, node_limit=TRIE_NODE_LIMIT):
+        self.node_limit = node_limit
+        self.root = {}
+        self.root_values = []
+
+    def insert(self, key, value):
+        if len(self.root_values) < self.node_limit:
+            self.root_values.append(value)
+        node = self.root
+        for char in key.lower():
+            child = node.get(char)
+            if child is None:
+                child = node[char] = ({}, [])
+            if len(child[1]) < self.node_limit:
+                child[1].append(value)
+            node = child[0]
+
+    def search(self, prefix, limit):
+        prefix = prefix.lower()
+        if not prefix:
+            return self.root_values[:limit]
+        node = None
+        children = self.root
+        for char in prefix:
+            node = children.get(char)
+            if node is None:
+                return []
+            children = node[0]
+        return node[1][:limit]
+
+
+class _VersionedCache:
+    """按数据源对象缓存派生数据，数据源被替换（文件变化）后自动清空"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._source = None
+        self._items = {}
+
+    def get(self, source, key, build):
+        with self._lock:
+            if self._source is not source:
+                self._source = source
+                self._items = {}
+            value = self._items.get(key)
+        if value is None:
+            value = build()
+            with self._lock:
+                if self._source is source:
+                    if len(self._items) >= RESPONSE_CACHE_SIZE:
+                        self._items.clear()
+                    self._items[key] = value
+        return value
+
+
+_theme_cache = _VersionedCache()
+_prompt_cache = _VersionedCache()
+
+
+class _Payload:
+    """预先序列化的响应体，包含 ETag 和 gzip 版本"""
+
+    __slots__ = ("body", "gzipped", "etag")
+
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.gzipped = gzip.compress(self.body, compresslevel=6) if len(self.body) >= GZIP_MIN_SIZE else None
+
+
+def _respond(request, payload):
+    headers = {
+        "ETag": payload.etag,
+        # 每次使用前向服务端验证，配合 ETag 只需一次 304 往返
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("If-None-Match", "")
+    if payload.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return web.Response(status=304, headers=headers)
+
+    body = payload.body
+    if payload.gzipped is not None and "gzip" in request.headers.get("Accept-Encoding", ""):
+        body = payload.gzipped
+        headers["Content-Encoding"] = "gzip"
+    return web.Response(body=body, content_type="application/json", charset="utf-8", headers=headers)
+
+
+def _int_param(request, name, default, maximum):
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        value = default
+    return max(0, min(value, maximum))
+
+
+def _theme_trie(index):
+    trie = PrefixTrie()
+    for primary, items in index.pools.items():
+        for item in items:
+            trie.insert(item, {"primary": primary, "secondary": item})
+    return trie
+
+
+def _prompt_trie(index):
+    trie = PrefixTrie()
+    for primary, secondaries in index.categories.items():
+        trie.insert(primary, {"primary": primary, "secondary": None})
+        for secondary in secondaries:
+            trie.insert(secondary, {"primary": primary, "secondary": secondary})
+    return trie
+
+
+def add_routes(routes):
+    """
+    Add API routes for the prompt catalog.
+    """
+
+    @routes.get('/xishen/theme/categories')
+    async def theme_categories(request):
+        index = get_theme_index()
+        payload = _theme_cache.get(index, ("categories",), lambda: _Payload({
+            "primary": list(index.primary_categories),
+            "counts": {primary: len(items) for primary, items in index.pools.items()},
+        }))
+        return _respond(request, payload)
+
+    @routes.get('/xishen/theme/subcategories')
+    async def theme_subcategories(request):
+        index = get_theme_index()
+        primary = request.query.get("primary", "")
+        if primary not in index.pools:
+            return web.json_response({"status": "error", "message": "Category not found"}, status=404)
+        payload = _theme_cache.get(index, ("subcategories", primary), lambda: _Payload({
+            "primary": primary,
+            "secondary": list(index.pool(primary)),
+        }))
+        return _respond(request, payload)
+
+    @routes.get('/xishen/theme/search')
+    async def theme_search(request):
+        index = get_theme_index()
+        prefix = request.query.get("q", "")
+        limit = _int_param(request, "limit", 20, MAX_SEARCH_LIMIT)
+
+        def build():
+            trie = _theme_cache.get(index, ("trie",), lambda: _theme_trie(index))
+            return _Payload({"q": prefix, "results": trie.search(prefix, limit)})
+
+        return _respond(request, _theme_cache.get(index, ("search", prefix, limit), build))
+
+    @routes.get('/xishen/prompts/categories')
+    async def prompt_categories(request):
+        index = get_library_index()
+        payload = _prompt_cache.get(index, ("categories",), lambda: _Payload({
+            primary: {secondary: len(entries) for secondary, entries in secondaries.items()}
+            for primary, secondaries in index.categories.items()
+        }))
+        return _respond(request, payload)
+
+    @routes.get('/xishen/prompts/list')
+    async def prompt_list(request):
+        index = get_library_index()
+        primary = request.query.get("primary", "")
+        secondary = request.query.get("secondary", "")
+        count = index.count(primary, secondary)
+        if not count:
+            return web.json_response({"status": "error", "message": "Category not found"}, status=404)
+        offset = _int_param(request, "offset", 0, count)
+        limit = _int_param(request, "limit", 50, MAX_LIST_LIMIT)
+
+        def build():
+            prompts = list(index.iter_prompts(primary, secondary, offset, offset + limit))
+            return _Payload({"primary": primary, "secondary": secondary, "total": count, "offset": offset, "prompts": prompts})
+
+        # 读取文件和解码在线程池中进行，不阻塞事件循环
+        payload = await asyncio.get_running_loop().run_in_executor(
+            None, _prompt_cache.get, index, ("list", primary, secondary, offset, limit), build
+        )
+        return _respond(request, payload)
+
+    @routes.get('/xishen/prompts/search')
+    async def prompt_search(request):
+        index = get_library_index()
+        prefix = request.query.get("q", "")
+        limit = _int_param(request, "limit", 20, MAX_SEARCH_LIMIT)
+
+        def build():
+            trie = _prompt_cache.get(index, ("trie",), lambda: _prompt_trie(index))
+            return _Payload({"q": prefix, "results": trie.search(prefix, limit)})
+
+        return _respond(request, _prompt_cache.get(index, ("search", prefix, limit), build))
+
+
+# Register routes with the server
+try:
+    prompt_server = server.PromptServer.instance
+    if prompt_server is not None:
+        add_routes(prompt_server.routes)
+except Exception as e:
+    print(f"Warning: Could not register catalog routes: {e}")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+整数区间上的随机排列 - 不存储列表的不重复抽取
+
+功能：
+1. 以种子为密钥的 Feistel 网络，在 2^(2k) 的定义域上构成一一映射
+2. 用 cycle-walking 把映射限制到 [0, size)：结果超出范围时继续加密，直到落入范围内
+3. 状态只有密钥和区间大小（O(1) 内存），按序号随机访问，每次 O(1)
+   （2^(2k) < 4 × size，平均加密次数小于 4）
+4. 序号 0..size-1 依次取出时每个值恰好出现一次，不同分片可以按序号拆分同一次遍历
+5. 使用 numpy uint64 向量化，一次计算一批序号，区间最大 2^64
+"""
+
+import numpy as np
+
+# 每轮子密钥和轮函数使用的 splitmix64 常数
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_MASK64 = (1 << 64) - 1
+DEFAULT_ROUNDS = 6
+
+
+def _splitmix64(value):
+    value = (value + _GOLDEN) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class FeistelPermutation:
+    """
+    [0, size) 上由 key 决定的伪随机排列
+
+    perm[i] 返回第 i 个值；values(indices) 一次计算一批。
+    """
+
+    def __init__(self, size, key, rounds=DEFAULT_ROUNDS):
+        size = int(size)
+        if size < 1 or size > 1 << 64:
+            raise ValueError(f"排列大小必须在 1 到 2^64 之间: {size}")
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        bits += bits & 1
+        self.half_bits = np.uint64(bits // 2)
+        self.half_mask = np.uint64((1 << (bits // 2)) - 1)
+        # 完整定义域是 2^bits；size 正好等于 2^64 时不需要 cycle-walking
+        self._walk = size < (1 << bits)
+        self._size = np.uint64(size - 1) if size == 1 << 64 else np.uint64(size)
+        state = int(key) & _MASK64
+        self.round_keys = []
+        for _ in range(rounds):
+            state = _splitmix64(state)
+            self.round_keys.append(np.uint64(state))
+
+    def _round(self, right, round_key):
+        x = right ^ round_key
+        x = (x ^ (x >> np.uint64(30))) * _MIX1
+        x = (x ^ (x >> np.uint64(27))) * _MIX2
+        x ^= x >> np.uint64(31)
+        return x & self.half_mask
+
+    def _encrypt(self, x):
+        left = x >> self.half_bits
+        right = x & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self.half_bits) | right
+
+    def values(self, indices):
+        """
+        批量计算排列值
+
+        参数:
+            indices: 序号序列，每个都在 [0, size) 内
+        返回:
+            np.ndarray(uint64)
+        """
+        with np.errstate(over="ignore"):
+            x = self._encrypt(np.asarray(indices, dtype=np.uint64))
+            if self._walk:
+                outside = x >= self._size
+                while outside.any():
+                    x[outside] = self._encrypt(x[outside])
+                    outside = x >= self._size
+        return x
+
+    def __getitem__(self, index):
+        index = int(index)
+        if not 0 <= index < self.size:
+            raise IndexError(f"序号超出范围: {index}")
+        return int(self.values([index])[0])
+
+    def __len__(self):
+        # 超过 sys.maxsize 时 len() 会报错，请直接使用 size 属性
+        return self.size
+
+
+def permutation_values(indices, min_value, max_value, seed):
+    """
+    [min_value, max_value] 上以 seed 为密钥的排列中，indices 位置的值（Python int 列表）
+    """
+    permutation = FeistelPermutation(max_value - min_value + 1, seed)
+    return [min_value + int(v) for v in permutation.values(indices)]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+空 latent 工厂 - 按模型生成共享的只读零 latent
+
+功能：
+1. 按模型类型查表得到 latent 通道数和下采样倍数（SD1.5/SDXL 为 4 通道，SD3/Flux/Qwen-Image 为 16 通道）
+2. 每个 (设备, dtype) 只缓存一个标量 0，用 expand 扩展成 [B, C, H/f, W/f]，
+   多次执行、大批量都不再分配和清零显存/内存
+3. expand 得到的张量所有步长为 0，是只读视图
+
+写时复制约定：
+- 采样、加噪等返回新张量的操作可以直接使用
+- 需要原地修改（如 latent[...] = x、add_()）或保存为文件时，先调用 .clone() 得到独立的连续张量；
+  直接原地写入会被 PyTorch 拒绝（多个元素共享同一内存），不会污染缓存
+"""
+
+import threading
+
+import torch
+
+# 模型类型 -> (latent 通道数, 下采样倍数)
+LATENT_FORMATS = {
+    "SD1.5/SDXL": (4, 8),
+    "SD3": (16, 8),
+    "Flux": (16, 8),
+    "Qwen-Image": (16, 8),
+}
+DEFAULT_LATENT_FORMAT = "SD1.5/SDXL"
+
+# DiT 类模型把 latent 切成 patch×patch 的块作为 token；UNet 模型按 1 处理
+LATENT_PATCH_SIZES = {
+    "SD3": 2,
+    "Flux": 2,
+    "Qwen-Image": 2,
+}
+
+_lock = threading.Lock()
+# (设备, dtype) -> 形状为 [1] 的零张量
+_zero_cache = {}
+
+
+def _shared_zero(device, dtype):
+    key = (str(torch.device(device)), dtype)
+    with _lock:
+        zero = _zero_cache.get(key)
+        if zero is None:
+            zero = _zero_cache[key] = torch.zeros(1, device=device, dtype=dtype)
+        return zero
+
+
+def latent_shape(batch_size, width, height, latent_format=DEFAULT_LATENT_FORMAT):
+    """返回 [B, C, H/f, W/f]，未知的模型类型按默认格式处理"""
+    channels, factor = LATENT_FORMATS.get(latent_format, LATENT_FORMATS[DEFAULT_LATENT_FORMAT])
+    return [batch_size, channels, height // factor, width // factor]
+
+
+def latent_multiple(latent_format=DEFAULT_LATENT_FORMAT):
+    """像素尺寸需要对齐的倍数（下采样倍数 × patch 大小），也是一个 token 覆盖的边长"""
+    _, factor = LATENT_FORMATS.get(latent_format, LATENT_FORMATS[DEFAULT_LATENT_FORMAT])
+    return factor * LATENT_PATCH_SIZES.get(latent_format, 1)
+
+
+def empty_latent(batch_size, width, height, latent_format=DEFAULT_LATENT_FORMAT, device="cpu", dtype=torch.float32):
+    """
+    生成只读的零 latent 张量（共享缓存的 expand 视图，见模块说明中的写时复制约定）
+
+    参数:
+        batch_size: 批量张数
+        width, height: 像素尺寸
+        latent_format: LATENT_FORMATS 中的模型类型
+        device, dtype: 张量所在设备和类型
+    """
+    return _shared_zero(device, dtype).expand(*latent_shape(batch_size, width, height, latent_format))
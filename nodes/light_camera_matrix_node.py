@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打光 × 镜头矩阵节点 - 按需生成组合提示词
+
+功能：
+1. 打光类型 × 镜头模式 × 旋转角度 的笛卡尔积，提示词与打光预设、镜头预设节点的输出一致
+2. 组合按序号混合进制换算（旋转角度变化最快），任意序号 O(1) 随机访问，不展开整个矩阵
+3. 分片按步长划分：分片 k 负责序号 k, k+n, k+2n, ...，多个实例各取一个分片即可不重复地覆盖全部组合
+4. 每次执行只生成当前页的提示词，以列表输出，下游节点逐条执行
+"""
+
+from .qwen_camera_preset import build_camera_prompt, 镜头模式选项
+from .qwen_light_preset import Qwen_打光预设
+
+
+class PromptMatrix:
+    """
+    多个轴的笛卡尔积，按序号惰性取组合
+
+    序号 i 的组合由混合进制展开得到，最后一个轴变化最快。
+    """
+
+    def __init__(self, axes):
+        self.axes = [list(axis) for axis in axes]
+        self.size = 1
+        for axis in self.axes:
+            self.size *= len(axis)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"序号超出范围: {index}")
+        choices = []
+        for axis in reversed(self.axes):
+            index, digit = divmod(index, len(axis))
+            choices.append(axis[digit])
+        return tuple(reversed(choices))
+
+    def shard(self, shard_index=0, shard_count=1):
+        """分片负责的序号（range 对象，切片和取长度都不展开）"""
+        return range(shard_index, self.size, shard_count)
+
+    def iter_items(self, indices):
+        """按序号依次产出组合"""
+        for index in indices:
+            yield self[index]
+
+
+def rotation_steps(max_angle, step):
+    """-max_angle..max_angle 按 step 取值，负数为向左旋转；step 为 0 时只有 0 度"""
+    if step <= 0 or max_angle <= 0:
+        return [0]
+    angles = list(range(step, max_angle + 1, step))
+    return [-angle for angle in reversed(angles)] + [0] + angles
+
+
+def combination_prompt(light, lens, rotation):
+    """单个组合的提示词：打光提示词, 镜头提示词"""
+    parts = []
+    if light != "无":
+        parts.append(Qwen_打光预设.打光提示词映射.get(light, light))
+    camera = build_camera_prompt(rotation != 0, False, False, False, max(0, -rotation), max(0, rotation), 0, lens)
+    if camera:
+        parts.append(camera)
+    return ", ".join(parts)
+
+
+def _light_types(category, include_none):
+    categories = Qwen_打光预设.打光风格映射
+    selected = categories.values() if category == "全部" else [categories.get(category, [])]
+    lights = ["无"] if include_none else []
+    for types in selected:
+        lights.extend(light for light in types if light != "无" and light not in lights)
+    return lights
+
+
+def _lens_modes(text):
+    text = text.strip()
+    if not text or text == "全部":
+        return [mode for mode in 镜头模式选项 if mode != "无"]
+    modes = []
+    for name in text.replace("，", ",").split(","):
+        name = name.strip()
+        if name in 镜头模式选项 and name not in modes:
+            modes.append(name)
+        elif name:
+            print(f"未知的镜头模式，已忽略: {name}")
+    return modes
+
+
+class XishenLightCameraMatrixNode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "打光分类": (["全部"] + list(Qwen_打光预设.打光风格映射.keys()), {"default": "全部"}),
+                "包含无打光": ("BOOLEAN", {"default": False}),
+                # 逗号分隔的镜头模式，"全部" 表示除 "无" 以外的所有镜头
+                "镜头模式": ("STRING", {"default": "全部"}),
+                "最大旋转角度": ("INT", {"default": 90, "min": 0, "max": 90, "step": 1}),
+                "旋转步长": ("INT", {"default": 45, "min": 0, "max": 90, "step": 1}),
+                "分片序号": ("INT", {"default": 0, "min": 0, "max": 1023}),
+                "分片总数": ("INT", {"default": 1, "min": 1, "max": 1024}),
+                "页码": ("INT", {"default": 0, "min": 0, "max": 0x7fffffff}),
+                "每页数量": ("INT", {"default": 100, "min": 1, "max": 10000}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "INT", "INT", "INT")
+    RETURN_NAMES = ("提示词", "序号", "总数", "页数")
+    OUTPUT_IS_LIST = (True, True, False, False)
+    FUNCTION = "生成矩阵"
+    CATEGORY = "🍡Comfyui-xishen"
+
+    def 生成矩阵(self, 打光分类, 包含无打光, 镜头模式, 最大旋转角度, 旋转步长, 分片序号, 分片总数, 页码, 每页数量):
+        lights = _light_types(打光分类, 包含无打光)
+        lenses = _lens_modes(镜头模式) or ["无"]
+        matrix = PromptMatrix([lights, lenses, rotation_steps(最大旋转角度, 旋转步长)])
+
+        shard = matrix.shard(分片序号 % 分片总数, 分片总数)
+        pages = -(-len(shard) // 每页数量)
+        indices = shard[页码 * 每页数量:(页码 + 1) * 每页数量]
+        prompts = [combination_prompt(*choices) for choices in matrix.iter_items(indices)]
+
+        print(f"🎛️ 打光镜头矩阵: 共 {len(matrix)} 组合，分片 {分片序号 % 分片总数}/{分片总数} "
+              f"第 {页码 + 1}/{pages} 页，输出 {len(prompts)} 条")
+        return (prompts, list(indices), len(matrix), pages)
+
+
+NODE_CLASS_MAPPINGS = {
+    "XishenLightCameraMatrixNode": XishenLightCameraMatrixNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "XishenLightCameraMatrixNode": "打光镜头矩阵-xishen",
+}
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
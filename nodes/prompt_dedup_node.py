@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词库去重节点 - 近似重复检测与压缩
+
+功能：
+1. 跨全部分类、跨多个文件检测 xishen_prompts.json 格式提示词库中的近似重复条目（输入可以是多个文件或目录）
+2. 基于字符 shingle 的 MinHash 签名 + LSH 分桶，只比较候选对
+3. 使用 numpy 向量化计算签名，10 万条提示词可在数秒内完成
+4. 每个重复簇保留文件顺序中的第一条，输出去重后的提示词库；只移除重复的字符串条目，其他内容原样保留
+
+使用方法：
+- 节点：填写输入/输出路径和相似度阈值，执行后输出去重报告
+- 命令行：python prompt_dedup_node.py input.json -o output.json --threshold 0.8
+- 多个文件：python prompt_dedup_node.py a.json b.json prompt_libraries/ -o output_dir/
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+try:
+    from .prompt_library import resolve_library_files
+except ImportError:
+    # 作为脚本运行时（python nodes/prompt_dedup_node.py ...）
+    from prompt_library import resolve_library_files
+
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.dirname(__file__), "..", "web", "extensions", "xishen_prompts.json")
+
+# 计算 shingle 滚动哈希用的乘数（奇数，保证在 2^64 上可逆）
+_SHINGLE_PRIME = np.uint64(1099511628211)
+# 每次处理的文档数量，限制 shingle 数组的峰值内存
+_CHUNK_DOCS = 8192
+
+
+def iter_library_entries(data):
+    """按文件顺序遍历提示词库，产出 (一级分类, 二级分类, 序号, 提示词)"""
+    for primary, secondaries in data.items():
+        if not isinstance(secondaries, dict):
+            continue
+        for secondary, prompts in secondaries.items():
+            if not isinstance(prompts, list):
+                continue
+            for index, prompt in enumerate(prompts):
+                if isinstance(prompt, str):
+                    yield primary, secondary, index, prompt
+
+
+def _permutation_params(num_perm, seed):
+    """生成 num_perm 组 (a, b)，a 为奇数，h -> a*h+b 是 2^64 上的双射"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _mix64(values):
+    """splitmix64 终混，把滚动哈希打散到 64 位"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _shingle_hashes(texts, shingle_size):
+    """
+    计算一批文本的字符 shingle 哈希
+
+    返回:
+        (hashes, segment_starts): 所有 shingle 的哈希数组，以及每篇文本在数组中的起始下标
+    """
+    # 空文本用一个占位字符代替，保证每篇文本至少有一个 shingle
+    texts = [text if text else "\x00" for text in texts]
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    codepoints = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    starts = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    ends = starts + lengths
+
+    # 每个位置所属文本的结束位置，防止 shingle 跨越文本边界
+    doc_end = np.repeat(ends, lengths)
+    positions = np.arange(len(codepoints), dtype=np.int64)
+    padded = np.concatenate([codepoints, np.zeros(shingle_size, dtype=np.uint64)])
+
+    rolling = np.zeros(len(codepoints), dtype=np.uint64)
+    for offset in range(shingle_size):
+        chars = np.where(positions + offset < doc_end, padded[offset:offset + len(codepoints)] + np.uint64(1), np.uint64(0))
+        rolling = rolling * _SHINGLE_PRIME + chars
+
+    # 长度为 L 的文本有 max(L-k+1, 1) 个 shingle
+    counts = np.maximum(lengths - shingle_size + 1, 1)
+    segment_starts = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=segment_starts[1:])
+    local = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(segment_starts, counts)
+    selected = np.repeat(starts, counts) + local
+
+    return _mix64(rolling[selected]), segment_starts
+
+
+def minhash_signatures(texts, num_perm=128, shingle_size=3, seed=1):
+    """
+    计算 MinHash 签名矩阵
+
+    参数:
+        texts: 文本列表
+        num_perm: 哈希置换数量（签名长度）
+        shingle_size: 字符 shingle 长度
+        seed: 置换参数的随机种子，固定后结果可复现
+
+    返回:
+        np.ndarray: 形状为 (len(texts), num_perm) 的 uint64 签名
+    """
+    a, b = _permutation_params(num_perm, seed)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+
+    with np.errstate(over="ignore"):
+        for chunk_start in range(0, len(texts), _CHUNK_DOCS):
+            chunk = texts[chunk_start:chunk_start + _CHUNK_DOCS]
+            hashes, segment_starts = _shingle_hashes(chunk, shingle_size)
+            rows = signatures[chunk_start:chunk_start + len(chunk)]
+            for perm in range(num_perm):
+                rows[:, perm] = np.minimum.reduceat(hashes * a[perm] + b[perm], segment_starts)
+
+    return signatures
+
+
+def choose_bands(num_perm, threshold):
+    """
+    选择 LSH 的 (bands, rows)
+
+    LSH 的 S 曲线拐点约为 (1/b)^(1/r)，这里取拐点不高于阈值且最接近阈值的组合，
+    宁可多出候选对（之后会用签名再次校验），也不漏掉真正的重复。
+    """
+    best = (num_perm, 1)
+    best_gap = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        knee = (1.0 / bands) ** (1.0 / rows)
+        if knee > threshold:
+            continue
+        gap = threshold - knee
+        if best_gap is None or gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+def _find(parents, node):
+    while parents[node] != node:
+        parents[node] = parents[parents[node]]
+        node = parents[node]
+    return node
+
+
+def find_near_duplicates(texts, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+    """
+    查找近似重复文本
+
+    返回:
+        list[int]: 每条文本所属簇的代表下标（簇内文件顺序最靠前的一条）
+    """
+    count = len(texts)
+    if count == 0:
+        return []
+
+    signatures = minhash_signatures(texts, num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+    bands, rows = choose_bands(num_perm, threshold)
+    band_mults = _mix64(np.arange(1, rows + 1, dtype=np.uint64))
+
+    # 收集所有 LSH 候选对 (簇首, 成员)
+    firsts, others = [], []
+    with np.errstate(over="ignore"):
+        for band in range(bands):
+            block = signatures[:, band * rows:(band + 1) * rows]
+            keys = (block * band_mults).sum(axis=1, dtype=np.uint64)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            # 每个桶的起点
+            boundary = np.ones(count, dtype=bool)
+            boundary[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            bucket_ids = np.cumsum(boundary) - 1
+            bucket_heads = order[boundary]
+            members = ~boundary
+            if members.any():
+                firsts.append(bucket_heads[bucket_ids[members]])
+                others.append(order[members])
+
+    parents = list(range(count))
+    if firsts:
+        pairs = np.unique(np.stack([np.concatenate(firsts), np.concatenate(others)], axis=1), axis=0)
+        # 用完整签名估计 Jaccard 相似度，过滤掉 LSH 的误报
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        for left, right in pairs[similarity >= threshold].tolist():
+            root_left, root_right = _find(parents, left), _find(parents, right)
+            if root_left != root_right:
+                # 较小的下标作为根，即保留文件顺序中的第一条
+                if root_left < root_right:
+                    parents[root_right] = root_left
+                else:
+                    parents[root_left] = root_right
+
+    return [_find(parents, index) for index in range(count)]
+
+
+def dedup_libraries(libraries, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+    """
+    对多个提示词库一起去重，跨文件的近似重复也会被检测到
+
+    只移除近似重复的字符串条目；非字符串条目、非列表的二级分类值和非字典的一级分类值原样保留
+
+    参数:
+        libraries: 提示词库字典列表（按文件顺序，靠前文件中的条目优先保留）
+    返回:
+        (deduped, removed): 与 libraries 一一对应的去重结果列表，以及被移除条目的列表
+        removed 中每项为 {"library", "primary", "secondary", "text",
+        "kept_library", "kept_primary", "kept_secondary", "kept_text"}，library 为 libraries 中的下标
+    """
+    entries = [
+        (library_index,) + entry
+        for library_index, data in enumerate(libraries)
+        for entry in iter_library_entries(data)
+    ]
+    representatives = find_near_duplicates(
+        [entry[4] for entry in entries],
+        threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, seed=seed,
+    )
+
+    dropped = set()
+    removed = []
+    for index, (library_index, primary, secondary, position, text) in enumerate(entries):
+        keep = representatives[index]
+        if keep == index:
+            continue
+        dropped.add((library_index, primary, secondary, position))
+        kept_library, kept_primary, kept_secondary, _, kept_text = entries[keep]
+        removed.append({
+            "library": library_index,
+            "primary": primary,
+            "secondary": secondary,
+            "text": text,
+            "kept_library": kept_library,
+            "kept_primary": kept_primary,
+            "kept_secondary": kept_secondary,
+            "kept_text": kept_text,
+        })
+
+    deduped = []
+    for library_index, data in enumerate(libraries):
+        result = {}
+        for primary, secondaries in data.items():
+            if not isinstance(secondaries, dict):
+                result[primary] = secondaries
+                continue
+            result[primary] = {}
+            for secondary, prompts in secondaries.items():
+                if isinstance(prompts, list):
+                    prompts = [
+                        prompt for position, prompt in enumerate(prompts)
+                        if (library_index, primary, secondary, position) not in dropped
+                    ]
+                result[primary][secondary] = prompts
+        deduped.append(result)
+
+    return deduped, removed
+
+
+def dedup_library(data, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+    """
+    对单个提示词库去重
+
+    返回:
+        (deduped, removed): 去重后的提示词库，以及被移除条目的列表（格式见 dedup_libraries）
+    """
+    deduped, removed = dedup_libraries([data], threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+    return deduped[0], removed
+
+
+def resolve_dedup_files(paths):
+    """
+    展开输入路径（文件或目录，目录取其中的 .json 文件），返回文件列表
+
+    只支持 JSON 格式的提示词库；JSONL 文件会被跳过
+    """
+    files = []
+    for path in resolve_library_files(paths):
+        if path.lower().endswith(".json"):
+            files.append(path)
+        else:
+            print(f"提示词库去重只支持 JSON 文件，已跳过: {path}")
+    return files
+
+
+def dedup_output_paths(input_files, output_path):
+    """
+    输出路径：只有一个输入文件且 output_path 不是目录时直接写到 output_path；
+    否则 output_path 视为目录，每个文件按原文件名写入其中（与输入目录相同时即原地去重）
+    """
+    if len(input_files) == 1 and not os.path.isdir(output_path):
+        return [output_path]
+    names = [os.path.basename(path) for path in input_files]
+    if len(set(names)) != len(names):
+        raise ValueError("多个输入文件同名，无法写入同一个输出目录")
+    return [os.path.join(output_path, name) for name in names]
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # 先写临时文件再替换，避免输出路径与输入相同时写坏原文件
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def dedup_library_files(input_paths, output_path, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+    """
+    读取多个提示词库文件（或目录），一起去重后分别写出
+
+    返回:
+        (总条数, 移除列表, 输入文件列表, 输出文件列表)；移除列表中的 library 为输入文件列表的下标
+    """
+    input_files = resolve_dedup_files(input_paths)
+    if not input_files:
+        raise ValueError(f"没有找到提示词库文件: {', '.join(input_paths)}")
+    output_files = dedup_output_paths(input_files, output_path)
+
+    libraries = []
+    for path in input_files:
+        with open(path, "r", encoding="utf-8") as f:
+            libraries.append(json.load(f))
+
+    deduped, removed = dedup_libraries(libraries, threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+    total = sum(1 for data in libraries for _ in iter_library_entries(data))
+
+    for path, data in zip(output_files, deduped):
+        _write_json(path, data)
+
+    return total, removed, input_files, output_files
+
+
+def dedup_library_file(input_path, output_path, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+    """读取提示词库文件，去重后写出，返回 (总条数, 移除列表)"""
+    total, removed, _, _ = dedup_library_files(
+        [input_path], output_path, threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, seed=seed,
+    )
+    return total, removed
+
+
+def split_paths(text):
+    """节点输入的路径：每行一个"""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def format_report(total, removed, output_files, input_files=None, limit=20):
+    lines = [f"共 {total} 条提示词，移除近似重复 {len(removed)} 条，保留 {total - len(removed)} 条"]
+    lines.extend(f"输出文件: {path}" for path in output_files)
+    # 多个文件时标出条目所在的文件
+    names = [os.path.basename(path) for path in input_files] if input_files and len(input_files) > 1 else None
+    for item in removed[:limit]:
+        source = f"{names[item['library']]}:" if names else ""
+        kept_source = f"{names[item['kept_library']]}:" if names else ""
+        lines.append(
+            f"- [{source}{item['primary']}/{item['secondary']}] {item['text'][:30]}... "
+            f"≈ [{kept_source}{item['kept_primary']}/{item['kept_secondary']}] {item['kept_text'][:30]}..."
+        )
+    if len(removed) > limit:
+        lines.append(f"... 以及另外 {len(removed) - limit} 条")
+    return "\n".join(lines)
+
+
+class XishenPromptDedupNode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                # 每行一个文件或目录，所有文件一起去重；多个文件时 output_path 为输出目录
+                "input_path": ("STRING", {"default": DEFAULT_LIBRARY_PATH, "multiline": True}),
+                "output_path": ("STRING", {"default": os.path.join(os.path.dirname(DEFAULT_LIBRARY_PATH), "xishen_prompts_dedup.json")}),
+                "threshold": ("FLOAT", {"default": 0.8, "min": 0.1, "max": 1.0, "step": 0.05}),
+                "shingle_size": ("INT", {"default": 3, "min": 1, "max": 16}),
+                "num_perm": ("INT", {"default": 128, "min": 16, "max": 512, "step": 16}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT")
+    RETURN_NAMES = ("report", "removed_count")
+    FUNCTION = "dedup"
+    CATEGORY = "🍡Comfyui-xishen"
+    OUTPUT_NODE = True
+
+    def dedup(self, input_path, output_path, threshold, shingle_size, num_perm):
+        try:
+            total, removed, input_files, output_files = dedup_library_files(
+                split_paths(input_path), output_path.strip(),
+                threshold=threshold, num_perm=num_perm, shingle_size=shingle_size,
+            )
+        except Exception as e:
+            print(f"提示词库去重失败：{e}")
+            return (f"❌ 去重失败: {e}", 0)
+
+        report = format_report(total, removed, output_files, input_files)
+        print(report)
+        return (report, len(removed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="提示词库近似重复检测与压缩（MinHash/LSH）")
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_LIBRARY_PATH], help="输入提示词库 JSON 文件或目录，可以有多个")
+    parser.add_argument("-o", "--output", required=True, help="输出文件（单个输入文件时）或输出目录")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Jaccard 相似度阈值")
+    parser.add_argument("--shingle-size", type=int, default=3, help="字符 shingle 长度")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash 签名长度")
+    args = parser.parse_args(argv)
+
+    total, removed, input_files, output_files = dedup_library_files(
+        args.inputs, args.output, threshold=args.threshold, num_perm=args.num_perm, shingle_size=args.shingle_size,
+    )
+    print(format_report(total, removed, output_files, input_files))
+
+
+NODE_CLASS_MAPPINGS = {
+    "XishenPromptDedupNode": XishenPromptDedupNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "XishenPromptDedupNode": "提示词库去重-xishen",
+}
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
+
+
+if __name__ == "__main__":
+    main()
@@ -17,9 +17,13 @@
 
 技术特点：
 - 使用WebSocket实现前后端实时通信
+- 每个会话使用 threading.Event 等待，确认后立即唤醒执行线程，无需轮询
 - 支持异步消息处理
 - 提供工作流中断功能
 - 兼容ComfyUI官方API
+- 可选的编辑记忆：按输入文本哈希保存人工确认的结果，相同输入再次出现时直接返回
+- 可选的自动通过超时：无人值守时超时后使用当前文本继续，而不是报错
+- 列表输入：N 条提示词在同一个对话框中批量编辑，一次确认全部继续
 """
 
 """
@@ -27,7 +31,7 @@ ComfyUI Prompt Edit Node
 A node that pauses execution and allows users to edit the prompt text before continuing.
 """
 
-import time
+import hashlib
 import uuid
 import server
 from aiohttp import web
@@ -35,8 +39,250 @@ import aiohttp
 import asyncio
 import logging
 
-# Global storage for pending prompts
-pending_prompts = {}
+from .prompt_edit_sessions import PromptEditMemo, PromptEditSessionStore, SessionStoreFull
+
+try:
+    from comfy_execution.graph import ExecutionBlocker
+except ImportError:
+    # Older ComfyUI without ExecutionBlocker: deferred mode falls back to blocking
+    ExecutionBlocker = None
+
+WAIT_MODE_BLOCKING = "阻塞等待"
+WAIT_MODE_DEFERRED = "释放队列"
+
+# Global storage for pending prompts (thread-safe, bounded, TTL-evicted)
+# Confirmed edits of deferred sessions are kept in the same store as results keyed by _resume_key(unique_id, text)
+session_store = PromptEditSessionStore()
+
+# Confirmed edits keyed by the hash of the input text (opened lazily on first use)
+edit_memo = PromptEditMemo()
+
+# Hard limit of a blocking wait when auto pass-through is disabled
+EDIT_TIMEOUT = 3600  # 1 hour
+
+
+def _resume_key(unique_id, text):
+    digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    return f"{unique_id}:{digest}"
+
+
+def _server_uses_tls():
+    try:
+        from comfy.cli_args import args
+    except ImportError:
+        return False
+    return bool(getattr(args, "tls_keyfile", None) and getattr(args, "tls_certfile", None))
+
+
+def _local_api_url(path):
+    """
+    Build the URL of one of ComfyUI's own HTTP endpoints from the address and port
+    the server actually listens on (--listen / --port / --tls-*).
+    """
+    prompt_server = server.PromptServer.instance
+    address = getattr(prompt_server, "address", None)
+    port = getattr(prompt_server, "port", None)
+
+    if not port:
+        # Fallback to default port if we can't get the server instance
+        logging.warning("Could not get server instance or port, falling back to default port 8188")
+        port = 8188
+
+    # --listen may be a comma separated list; wildcard addresses are reachable through loopback
+    host = (address or "").split(",")[0].strip()
+    if host in ("", "0.0.0.0"):
+        host = "127.0.0.1"
+    elif host == "::":
+        host = "::1"
+    if ":" in host:
+        host = f"[{host}]"
+
+    scheme = "https" if _server_uses_tls() else "http"
+    return f"{scheme}://{host}:{port}{path}"
+
+
+def _create_session(session_id, data):
+    """
+    session_store.create() that reports a full store as a node error; open sessions are never evicted.
+    """
+    try:
+        return session_store.create(session_id, data)
+    except SessionStoreFull as e:
+        print(f"Prompt edit session {session_id} rejected: {e}")
+        raise Exception(f"编辑会话过多（上限 {session_store.max_sessions}），请先确认或停止已打开的编辑") from e
+
+
+def _current_client_id():
+    """
+    client_id of the browser that queued the prompt currently being executed (None if unknown).
+    """
+    return getattr(server.PromptServer.instance, "client_id", None)
+
+
+def _send_session_event(payload, client_id=None, event="prompt_edit_session"):
+    """
+    Send a prompt edit event (prompt_edit_session by default) to the frontend from the executor thread.
+    Only the given client receives it; client_id=None broadcasts to all clients.
+    """
+    prompt_server = server.PromptServer.instance
+
+    # Use asyncio to send the message
+    try:
+        loop = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+        if loop is not None:
+            # We're in an async context, create a task
+            asyncio.create_task(
+                prompt_server.send_sync(
+                    event,
+                    payload,
+                    client_id
+                )
+            )
+        else:
+            # We're not in an async context, use run_coroutine_threadsafe
+            asyncio.run_coroutine_threadsafe(
+                prompt_server.send_sync(
+                    event,
+                    payload,
+                    client_id
+                ),
+                prompt_server.loop
+            )
+    except Exception as e:
+        print(f"Error sending prompt edit event: {e}")
+
+
+def _lookup_memo(text):
+    try:
+        memo_text = edit_memo.get(text)
+    except Exception as e:
+        print(f"Prompt edit memo lookup failed: {e}")
+        return None
+    if memo_text is not None:
+        print("Prompt edit resolved from memo, no dialog needed")
+    return memo_text
+
+
+def _store_memo(text, edited_text):
+    try:
+        edit_memo.put(text, edited_text)
+    except Exception as e:
+        print(f"Prompt edit memo update failed: {e}")
+
+
+def _first(value, default=None):
+    """
+    Scalar value of an INPUT_IS_LIST input (widgets and hidden inputs arrive as one-item lists).
+    """
+    if isinstance(value, list):
+        return value[0] if value else default
+    return default if value is None else value
+
+
+def _session_edits(session):
+    """
+    Current edits of a session as a list (one item for a single session).
+    """
+    if session.get("batch"):
+        return list(session["edited_texts"])
+    return [session["edited_text"]]
+
+
+def _merge_edits(resolved, indices, edits):
+    """
+    Fill the edits into the positions of the full text list that were waiting for them.
+    """
+    results = list(resolved)
+    for index, edited_text in zip(indices, edits):
+        results[index] = edited_text
+    return results
+
+
+def _store_memos(texts, edited_texts):
+    for text, edited_text in zip(texts, edited_texts):
+        _store_memo(text, edited_text)
+
+
+def _confirm_session(session_id, edits):
+    """
+    Confirm a session (edits: str for a single session, list for a batch session);
+    the edits of a parked deferred session are stored as its result, the caller re-queues it
+    with _requeue_prompt. Must run on the server loop.
+    Returns the session, or None if it no longer exists.
+    Raises ValueError if the edits do not match the session type.
+    """
+    session = session_store.get(session_id)
+    if session is None:
+        return None
+    if session.get("batch"):
+        session = session_store.confirm_batch(session_id, edits)
+    elif isinstance(edits, str) or edits is None:
+        session = session_store.confirm(session_id, edits)
+    else:
+        raise ValueError("a single session takes edited_text, not a list")
+
+    if session is not None:
+        resume = session.get("resume")
+        if resume is not None:
+            session_store.pop(session_id)
+            session_store.put_result(resume["key"], _merge_edits(resume["resolved"], session["indices"], _session_edits(session)))
+    return session
+
+
+def _auto_pass_deferred(session_id):
+    """
+    Auto pass-through of a deferred session: continue with the current text unless a human was faster.
+    """
+    session = session_store.get(session_id)
+    if session is None or session.get("confirmed"):
+        return
+    print(f"Prompt edit session {session_id} auto-confirmed, nobody answered in time")
+    confirmed = _confirm_session(session_id, session["edited_texts"] if session.get("batch") else session["edited_text"])
+    _send_session_event({"session_id": session_id}, session.get("client_id"), "prompt_edit_closed")
+    if confirmed is not None and confirmed.get("resume") is not None:
+        asyncio.create_task(_requeue_or_notify(session_id, confirmed["resume"]))
+
+
+async def _requeue_or_notify(session_id, resume):
+    error = await _requeue_prompt(resume)
+    if error:
+        _send_session_event({"session_id": session_id, "message": error}, resume.get("client_id"),
+                            "prompt_edit_requeue_failed")
+
+
+async def _requeue_prompt(resume):
+    """
+    Queue the parked graph again through ComfyUI's /prompt API.
+    Upstream results are still cached, and the edit node returns the confirmed text immediately.
+    Returns None on success, otherwise a message for the user (the confirmed edit stays stored
+    until its TTL, so queueing the workflow again by hand still picks it up).
+    """
+    body = {
+        "prompt": resume["prompt"],
+        "extra_data": {"extra_pnginfo": resume["extra_pnginfo"]} if resume.get("extra_pnginfo") else {},
+    }
+    if resume.get("client_id"):
+        body["client_id"] = resume["client_id"]
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            # Loopback call to our own server: its certificate is usually issued for a public name
+            async with session.post(_local_api_url("/prompt"), json=body, ssl=False) as response:
+                if response.status == 200:
+                    logging.info("Deferred prompt edit resumed, workflow re-queued")
+                    return None
+                detail = await response.text()
+                logging.warning(f"Re-queueing deferred prompt returned status: {response.status}")
+                error = f"status {response.status}: {detail[:200]}"
+    except Exception as e:
+        logging.error(f"Error re-queueing deferred prompt: {e}")
+        error = str(e) or type(e).__name__
+    return f"已确认，但重新排队失败（{error}）。重新运行工作流即可使用确认的结果。"
 
 class XishenPromptEditNode:
     """
@@ -56,6 +302,16 @@ class XishenPromptEditNode:
                     "dynamicPrompts": False
                 }),
             },
+            "optional": {
+                # 释放队列：不占用执行线程，确认后自动重新排队并从此处继续
+                "wait_mode": ([WAIT_MODE_BLOCKING, WAIT_MODE_DEFERRED], {"default": WAIT_MODE_BLOCKING}),
+                # 默认只通知提交该工作流的浏览器标签页，开启后通知所有已连接的客户端
+                "broadcast": ("BOOLEAN", {"default": False, "label_on": "通知所有客户端", "label_off": "仅通知提交者"}),
+                # 相同输入文本已经人工确认过时直接使用记住的结果，不再弹出编辑框
+                "use_memo": ("BOOLEAN", {"default": False, "label_on": "使用编辑记忆", "label_off": "不使用编辑记忆"}),
+                # 大于 0 时，超过该秒数无人确认则使用当前文本自动继续；0 表示等待人工确认（最长 1 小时）
+                "auto_confirm_seconds": ("INT", {"default": 0, "min": 0, "max": EDIT_TIMEOUT, "step": 1}),
+            },
             "hidden": {
                 "unique_id": "UNIQUE_ID",
                 "prompt": "PROMPT",
@@ -65,6 +321,9 @@ class XishenPromptEditNode:
 
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("edited_text",)
+    # A list of prompts arrives as one call and is edited in a single batch dialog
+    INPUT_IS_LIST = True
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "edit_prompt"
     CATEGORY = "🍡Comfyui-xishen"
     OUTPUT_NODE = True
@@ -72,100 +331,173 @@ class XishenPromptEditNode:
     def __init__(self):
         self.type = "Prompt_Edit"
 
-    def edit_prompt(self, text, edited_text_widget, unique_id=None, prompt=None, extra_pnginfo=None):
+    @classmethod
+    def IS_CHANGED(cls, text, edited_text_widget, wait_mode=WAIT_MODE_BLOCKING, **kwargs):
+        # A parked run caches a blocked output, so deferred mode must always re-execute
+        if _first(wait_mode, WAIT_MODE_BLOCKING) == WAIT_MODE_DEFERRED:
+            return float("nan")
+        return ""
+
+    def edit_prompt(self, text, edited_text_widget, wait_mode=WAIT_MODE_BLOCKING, broadcast=False, use_memo=False,
+                    auto_confirm_seconds=0, unique_id=None, prompt=None, extra_pnginfo=None):
         """
         Main function that pauses execution and waits for user input.
+
+        INPUT_IS_LIST: a list of N texts is edited in one batch session (one dialog, one confirm).
         """
+        texts = list(text) if isinstance(text, list) else [text]
+        edited_text_widget = _first(edited_text_widget, "")
+        wait_mode = _first(wait_mode, WAIT_MODE_BLOCKING)
+        broadcast = _first(broadcast, False)
+        use_memo = _first(use_memo, False)
+        auto_confirm_seconds = _first(auto_confirm_seconds, 0)
+        unique_id = _first(unique_id)
+        prompt = _first(prompt)
+        extra_pnginfo = _first(extra_pnginfo)
+
+        # The session belongs to the client that queued the prompt
+        client_id = _current_client_id()
+        target = None if broadcast else client_id
+
+        deferred = wait_mode == WAIT_MODE_DEFERRED
+        if deferred and ExecutionBlocker is None:
+            print("ExecutionBlocker is not available in this ComfyUI version, falling back to blocking mode")
+            deferred = False
+
+        if deferred:
+            key = _resume_key(unique_id, "\x00".join(texts))
+            # Re-queued run after confirmation: hand out the confirmed texts
+            results = session_store.take_result(key)
+            if results is not None:
+                return self._output(results)
+
+        # Known inputs: reuse the edits a human confirmed earlier
+        results = [_lookup_memo(t) for t in texts] if use_memo else [None] * len(texts)
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return self._output(results)
+
+        if deferred:
+            return self._edit_prompt_deferred(texts, results, pending, edited_text_widget, unique_id, prompt,
+                                              extra_pnginfo, client_id, target, key, use_memo, auto_confirm_seconds)
+
         # Generate a unique session ID for this execution
         session_id = str(uuid.uuid4())
 
-        # Use edited_text_widget if it has content, otherwise use incoming text
-        if edited_text_widget and edited_text_widget.strip():
-            final_text = edited_text_widget
-        else:
-            final_text = text
-
         # Store the initial text
-        pending_prompts[session_id] = {
-            "text": text,
-            "unique_id": unique_id,
-            "edited_text": final_text,
-            "confirmed": False
-        }
-
-        # Send session_id and text to frontend (store it on the node)
-        prompt_server = server.PromptServer.instance
+        session = _create_session(session_id, self._session_data(texts, pending, edited_text_widget, unique_id, client_id))
 
-        # Use asyncio to send the message
+        # The session is removed on every exit path, including exceptions
         try:
-            loop = None
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                pass
-
-            if loop is not None:
-                # We're in an async context, create a task
-                asyncio.create_task(
-                    prompt_server.send_sync(
-                        "prompt_edit_session",
-                        {
-                            "session_id": session_id,
-                            "node_id": unique_id,
-                            "text": text
-                        },
-                        None  # Send to all clients instead of specific client_id
-                    )
-                )
-            else:
-                # We're not in an async context, use run_coroutine_threadsafe
-                asyncio.run_coroutine_threadsafe(
-                    prompt_server.send_sync(
-                        "prompt_edit_session",
-                        {
-                            "session_id": session_id,
-                            "node_id": unique_id,
-                            "text": text
-                        },
-                        None  # Send to all clients instead of specific client_id
-                    ),
-                    prompt_server.loop
-                )
-        except Exception as e:
-            print(f"Error sending prompt edit session: {e}")
+            # Send session_id and text to frontend (store it on the node)
+            _send_session_event(self._session_event(session_id, session), target)
 
-        # Wait for user to confirm (polling approach)
-        timeout = 3600  # 1 hour timeout
-        start_time = time.time()
+            # Wait for user to confirm (event driven, wakes up as soon as a handler sets the event)
+            auto_confirm = auto_confirm_seconds > 0
+            timeout = auto_confirm_seconds if auto_confirm else EDIT_TIMEOUT
+            answered = session["event"].wait(timeout)
 
-        while not pending_prompts[session_id]["confirmed"]:
-            time.sleep(0.1)  # Poll every 100ms
+            if not answered and auto_confirm and session_id in session_store:
+                # Unattended: continue with the current text (including edits synced so far)
+                print(f"Prompt edit session {session_id} auto-confirmed after {auto_confirm_seconds}s")
+                _send_session_event({"session_id": session_id}, target, "prompt_edit_closed")
+                return self._output(_merge_edits(results, pending, _session_edits(session)))
+
+            if not answered or session.get("expired"):
+                print(f"Prompt edit timeout for session {session_id}")
+                raise Exception("编辑超时（1小时）")
 
             # Check if workflow should be stopped
-            if pending_prompts[session_id].get("stopped"):
+            if session.get("stopped"):
                 print(f"Workflow stopped for session {session_id}")
-                # Clean up
-                del pending_prompts[session_id]
                 # Return an empty string instead of raising exception
                 # This allows the workflow to stop gracefully without node errors
-                return ("",)
+                return ([""],)
 
-            # Check timeout
-            if time.time() - start_time > timeout:
-                print(f"Prompt edit timeout for session {session_id}")
-                # Clean up
-                del pending_prompts[session_id]
-                raise Exception("编辑超时（1小时）")
+            # Get the edited text
+            edits = _session_edits(session)
+            if use_memo:
+                _store_memos([texts[i] for i in pending], edits)
+        finally:
+            # Clean up
+            session_store.pop(session_id)
 
-        # Get the edited text
-        edited_text = pending_prompts[session_id]["edited_text"]
+        return self._output(_merge_edits(results, pending, edits))
 
-        # Clean up
-        del pending_prompts[session_id]
+    @staticmethod
+    def _output(edited_texts):
+        return {
+            "ui": {"text": list(edited_texts)},
+            "result": (list(edited_texts),)
+        }
+
+    @staticmethod
+    def _session_data(texts, pending, edited_text_widget, unique_id, client_id):
+        """
+        A single text gets a regular session (live sync, widget override);
+        several texts share one batch session holding only the ones still to be edited.
+        """
+        data = {
+            "unique_id": unique_id,
+            "client_id": client_id,
+            "indices": pending,
+        }
+        if len(texts) == 1:
+            # Use edited_text_widget if it has content, otherwise use incoming text
+            data["text"] = texts[0]
+            data["edited_text"] = edited_text_widget if edited_text_widget and edited_text_widget.strip() else texts[0]
+        else:
+            data["batch"] = True
+            data["texts"] = [texts[i] for i in pending]
+            data["edited_texts"] = list(data["texts"])
+        return data
+
+    @staticmethod
+    def _session_event(session_id, session):
+        event = {
+            "session_id": session_id,
+            "node_id": session["unique_id"],
+        }
+        if session.get("batch"):
+            event["batch"] = True
+            event["texts"] = session["texts"]
+        else:
+            event["text"] = session["text"]
+        if session.get("resume") is not None:
+            event["deferred"] = True
+        return event
+
+    def _edit_prompt_deferred(self, texts, results, pending, edited_text_widget, unique_id, prompt, extra_pnginfo,
+                              client_id, target, key, use_memo=False, auto_confirm_seconds=0):
+        """
+        Deferred mode: park the session and release the executor.
+        Downstream nodes are blocked for this run; confirming the edit re-queues the prompt.
+        """
+        # Already parked (e.g. the same prompt was queued again before confirming)
+        session_id, session = session_store.find(lambda s: s.get("resume", {}).get("key") == key)
+        if session_id is None:
+            session_id = str(uuid.uuid4())
+            data = self._session_data(texts, pending, edited_text_widget, unique_id, client_id)
+            data["resume"] = {
+                "key": key,
+                "prompt": prompt,
+                "extra_pnginfo": extra_pnginfo,
+                "client_id": client_id,
+                "use_memo": use_memo,
+                # Memo hits of this run, merged with the confirmed edits on resume
+                "resolved": results,
+            }
+            session = _create_session(session_id, data)
+            if auto_confirm_seconds > 0:
+                loop = server.PromptServer.instance.loop
+                loop.call_soon_threadsafe(loop.call_later, auto_confirm_seconds, _auto_pass_deferred, session_id)
+
+        _send_session_event(self._session_event(session_id, session), target)
+        print(f"Prompt edit session {session_id} parked, executor released")
 
         return {
-            "ui": {"text": [edited_text]},
-            "result": (edited_text,)
+            "ui": {"text": texts},
+            "result": ([ExecutionBlocker(None)],)
         }
 
 # Add server routes for handling user interactions
@@ -178,15 +510,48 @@ def add_routes(routes):
     async def update_prompt(request):
         """
         Update the edited text for a session.
+
+        Accepts either a full snapshot {"session_id", "edited_text"} or a delta
+        {"session_id", "base_revision", "patches": [{"offset", "delete", "insert"}]}.
+        A delta against a stale revision gets 409 with the current snapshot; the
+        client then resends its full text. Malformed patches get 400.
+
+        Coalescing happens on the client only: it keeps one request in flight and
+        folds every keystroke since the last acknowledgement into the next one, and
+        applying a request here is a single assignment under the store lock.
         """
         try:
             data = await request.json()
             session_id = data.get("session_id")
-            edited_text = data.get("edited_text")
-            
-            if session_id in pending_prompts:
-                pending_prompts[session_id]["edited_text"] = edited_text
-                return web.json_response({"status": "success"})
+
+            session = session_store.get(session_id)
+            if session is not None and session.get("batch"):
+                return web.json_response(
+                    {"status": "error", "message": "Batch sessions are confirmed with /prompt_edit/confirm_batch"},
+                    status=400
+                )
+
+            if "patches" in data:
+                try:
+                    status, revision, current_text = session_store.apply_patches(
+                        session_id, data.get("base_revision"), data.get("patches")
+                    )
+                except (TypeError, ValueError) as e:
+                    return web.json_response(
+                        {"status": "error", "message": str(e)},
+                        status=400
+                    )
+                if status == "conflict":
+                    return web.json_response(
+                        {"status": "conflict", "revision": revision, "edited_text": current_text},
+                        status=409
+                    )
+            else:
+                revision = session_store.set_text(session_id, data.get("edited_text"))
+                status = "success" if revision is not None else "not_found"
+
+            if status == "success":
+                return web.json_response({"status": "success", "revision": revision})
             else:
                 return web.json_response(
                     {"status": "error", "message": "Session not found"},
@@ -208,21 +573,55 @@ def add_routes(routes):
             session_id = data.get("session_id")
             edited_text = data.get("edited_text")
             
-            if session_id in pending_prompts:
-                pending_prompts[session_id]["edited_text"] = edited_text
-                pending_prompts[session_id]["confirmed"] = True
+            return await _confirm_response(session_id, edited_text)
+        except Exception as e:
+            return web.json_response(
+                {"status": "error", "message": str(e)},
+                status=500
+            )
 
-                return web.json_response({"status": "success"})
-            else:
-                return web.json_response(
-                    {"status": "error", "message": "Session not found"},
-                    status=404
-                )
+    @routes.post('/prompt_edit/confirm_batch')
+    async def confirm_batch(request):
+        """
+        Confirm all texts of a batch session at once: {"session_id", "edited_texts": [...]}.
+        """
+        try:
+            data = await request.json()
+            return await _confirm_response(data.get("session_id"), data.get("edited_texts"))
         except Exception as e:
             return web.json_response(
                 {"status": "error", "message": str(e)},
                 status=500
             )
+
+    async def _confirm_response(session_id, edits):
+        # Wakes up the waiting execution thread immediately
+        # (deferred session: nothing is waiting, the parked graph is re-queued instead)
+        try:
+            session = _confirm_session(session_id, edits)
+        except ValueError as e:
+            return web.json_response(
+                {"status": "error", "message": str(e)},
+                status=400
+            )
+        if session is None:
+            return web.json_response(
+                {"status": "error", "message": "Session not found"},
+                status=404
+            )
+
+        resume = session.get("resume")
+        if resume is not None and resume.get("use_memo"):
+            # Blocking sessions are memoized by the executor thread after waking up
+            inputs = session["texts"] if session.get("batch") else [session["text"]]
+            await asyncio.get_running_loop().run_in_executor(None, _store_memos, inputs, _session_edits(session))
+
+        if resume is not None:
+            error = await _requeue_prompt(resume)
+            if error:
+                return web.json_response({"status": "error", "message": error}, status=502)
+
+        return web.json_response({"status": "success"})
     
     @routes.post('/prompt_edit/cancel')
     async def cancel_prompt(request):
@@ -233,7 +632,7 @@ def add_routes(routes):
             data = await request.json()
             session_id = data.get("session_id")
 
-            if session_id in pending_prompts:
+            if session_id in session_store:
                 # Don't do anything - just acknowledge the cancel
                 # The workflow will continue waiting for user to click "Continue" button
                 return web.json_response({"status": "success"})
@@ -257,26 +656,19 @@ def add_routes(routes):
             data = await request.json()
             session_id = data.get("session_id")
 
-            if session_id in pending_prompts:
-                # Set a flag to indicate we need to stop the workflow
-                pending_prompts[session_id]["stopped"] = True
-                pending_prompts[session_id]["confirmed"] = True
+            # Deferred session: nothing is running for it, just drop the parked graph
+            session = session_store.get(session_id)
+            if session is not None and session.get("resume") is not None:
+                session_store.pop(session_id)
+                return web.json_response({"status": "success"})
+
+            # Set a flag to indicate we need to stop the workflow
+            session = session_store.stop(session_id)
             
             # Use ComfyUI's official interrupt API to stop the workflow
             try:
-                # Get the current server instance to determine the port dynamically
-                prompt_server = server.PromptServer.instance
-                
-                if prompt_server and hasattr(prompt_server, 'port'):
-                    # Use the dynamically determined port
-                    interrupt_url = f"http://localhost:{prompt_server.port}/interrupt"
-                else:
-                    # Fallback to default port if we can't get the server instance
-                    logging.warning("Could not get server instance or port, falling back to default port 8188")
-                    interrupt_url = "http://localhost:8188/interrupt"
-                    
                 async with aiohttp.ClientSession() as session:
-                    async with session.post(interrupt_url) as response:
+                    async with session.post(_local_api_url("/interrupt"), ssl=False) as response:
                         if response.status == 200:
                             logging.info("Workflow interrupted successfully using official API")
                         else:
@@ -284,7 +676,7 @@ def add_routes(routes):
             except Exception as interrupt_e:
                 logging.error(f"Error calling official interrupt API: {interrupt_e}")
             
-            if session_id in pending_prompts:
+            if session is not None:
                 return web.json_response({"status": "success"})
             else:
                 return web.json_response(
@@ -297,6 +689,44 @@ def add_routes(routes):
                 status=500
             )
 
+    @routes.get('/prompt_edit/sessions')
+    async def list_sessions(request):
+        """
+        List the sessions owned by a client (?client_id=...), e.g. to restore dialogs after a reconnect.
+        """
+        client_id = request.query.get("client_id")
+        if not client_id:
+            return web.json_response(
+                {"status": "error", "message": "client_id is required"},
+                status=400
+            )
+
+        sessions = [
+            {
+                "session_id": session_id,
+                "node_id": session.get("unique_id"),
+                "text": session.get("text"),
+                "edited_text": session.get("edited_text"),
+                "batch": bool(session.get("batch")),
+                "texts": session.get("texts"),
+                "edited_texts": session.get("edited_texts"),
+                "revision": session.get("revision", 0),
+                "deferred": session.get("resume") is not None,
+            }
+            for session_id, session in session_store.items()
+            if session.get("client_id") == client_id and not session.get("confirmed")
+        ]
+        return web.json_response({"status": "success", "sessions": sessions})
+
+    @routes.get('/prompt_edit/stats')
+    async def session_stats(request):
+        """
+        Introspection counters of the session store.
+        """
+        stats = session_store.stats()
+        stats["memo"] = edit_memo.stats()
+        return web.json_response(stats)
+
 # Register routes with the server
 try:
     prompt_server = server.PromptServer.instance
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prompt edit session store
+
+Thread-safe storage for XishenPromptEditNode sessions, shared by the executor
+thread and the aiohttp handlers.
+
+- All access goes through one lock. get/find/items/confirm/stop return shallow
+  copies; every change goes through a store method. create() hands out the live
+  dict to the executor thread that owns and waits on the session, and pop() hands
+  the removed dict back to whoever removed it
+- Size cap: when full, expired sessions are dropped first, then confirmed or stopped
+  ones; a session someone may still be editing or waiting on is never evicted, the
+  new session is rejected with SessionStoreFull instead
+- TTL eviction by a daemon sweep thread; a waiting executor thread is woken up
+- Counters for introspection (active, confirmed, expired, evicted, ...)
+- Revisioned text edits: full snapshots or offset/delete/insert patches against a base revision
+- Batch sessions ("batch", "texts", "edited_texts") confirmed with all edits at once
+
+PromptEditMemo is a small SQLite store mapping the hash of an input text to the
+edit a human confirmed for it, so that known inputs can be resolved without a dialog.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_SESSIONS = 256
+DEFAULT_SESSION_TTL = 3600 + 60  # a little longer than the node's own wait timeout
+DEFAULT_SWEEP_INTERVAL = 30
+
+
+def _check_patches(patches):
+    if not isinstance(patches, list):
+        raise ValueError("patches must be a list")
+    for patch in patches:
+        if not isinstance(patch, dict):
+            raise ValueError("each patch must be an object with offset, delete and insert")
+
+
+def apply_text_patches(text, patches):
+    """
+    Apply offset/delete/insert patches to text.
+    Offsets and lengths are UTF-16 code units so that they match the browser's string indices.
+    Raises ValueError unless patches is a list of {"offset", "delete", "insert"} dicts.
+    """
+    _check_patches(patches)
+    encoded = (text or "").encode("utf-16-le", "surrogatepass")
+    for patch in patches:
+        try:
+            offset = int(patch.get("offset", 0))
+            delete = int(patch.get("delete", 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"patch offset and delete must be integers: {patch}")
+        insert = patch.get("insert", "") or ""
+        if not isinstance(insert, str):
+            raise ValueError("patch insert must be a string")
+        if offset < 0 or delete < 0 or (offset + delete) * 2 > len(encoded):
+            raise ValueError(f"patch out of range: offset={offset}, delete={delete}")
+        encoded = encoded[:offset * 2] + insert.encode("utf-16-le", "surrogatepass") + encoded[(offset + delete) * 2:]
+    return encoded.decode("utf-16-le", "surrogatepass")
+
+
+class SessionStoreFull(RuntimeError):
+    """The store is full of open sessions, none of which can be evicted."""
+
+
+def _copy(session):
+    """Shallow copy handed out to callers; the store only ever replaces values, never mutates them."""
+    return dict(session) if session is not None else None
+
+
+class PromptEditSessionStore:
+    """
+    Bounded, TTL-evicting, thread-safe session store.
+
+    Sessions are plain dicts. Every session gets "event" (threading.Event),
+    "created_at" and "expires_at". The event is set when the session is
+    confirmed, stopped or expired so that a waiting thread wakes up.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, ttl=DEFAULT_SESSION_TTL, sweep_interval=DEFAULT_SWEEP_INTERVAL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        # Confirmed edits of deferred sessions waiting to be picked up: key -> (text, expires_at)
+        self._results = OrderedDict()
+        self._counters = {
+            "created": 0,
+            "confirmed": 0,
+            "stopped": 0,
+            "expired": 0,
+            "evicted": 0,
+            "snapshots": 0,
+            "patches": 0,
+            "conflicts": 0,
+        }
+        self._sweeper = None
+        self._sweeper_stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    def create(self, session_id, data, ttl=None):
+        """
+        Add a new session and return the live dict.
+
+        Only the owner (the executor thread waiting on "event") should keep it; it
+        sees later edits, confirmation and expiry without going through the store.
+        Raises SessionStoreFull if the store is full of sessions that are still open.
+        """
+        now = time.monotonic()
+        session = dict(data)
+        session.setdefault("confirmed", False)
+        session.setdefault("revision", 0)
+        session["event"] = threading.Event()
+        session["created_at"] = now
+        session["expires_at"] = now + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._expire_locked(now)
+            if len(self._sessions) >= self.max_sessions:
+                # Confirmed or stopped sessions are only waiting for their owner to pop them;
+                # their waiter has already been woken up with the result
+                done = [sid for sid, other in self._sessions.items() if other.get("confirmed")]
+                for sid in done[:len(self._sessions) - self.max_sessions + 1]:
+                    del self._sessions[sid]
+                    self._counters["evicted"] += 1
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionStoreFull(
+                    f"too many open prompt edit sessions ({self.max_sessions}); "
+                    f"confirm or stop some of them before queueing more"
+                )
+            self._sessions[session_id] = session
+            self._counters["created"] += 1
+
+        self._ensure_sweeper()
+        return session
+
+    def get(self, session_id):
+        """Return a copy of the session, or None if it does not exist."""
+        with self._lock:
+            return _copy(self._sessions.get(session_id))
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def update(self, session_id, **fields):
+        """Update fields of a session. Returns False if the session does not exist."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            session.update(fields)
+            return True
+
+    def set_text(self, session_id, edited_text):
+        """Replace the edited text with a full snapshot. Returns the new revision or None."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session["edited_text"] = edited_text
+            session["revision"] += 1
+            self._counters["snapshots"] += 1
+            return session["revision"]
+
+    def apply_patches(self, session_id, base_revision, patches):
+        """
+        Apply text patches made against base_revision.
+
+        Each patch is {"offset", "delete", "insert"}; offsets count UTF-16 code units
+        (like JavaScript strings) and apply to the text left by the previous patch.
+
+        Returns (status, revision, text): status is "success", "conflict" (base
+        revision is stale, text is the current snapshot) or "not_found".
+        Raises ValueError for malformed patches, whether or not the base revision is current.
+        """
+        _check_patches(patches)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return "not_found", None, None
+            if base_revision != session["revision"]:
+                self._counters["conflicts"] += 1
+                return "conflict", session["revision"], session["edited_text"]
+            session["edited_text"] = apply_text_patches(session["edited_text"], patches)
+            session["revision"] += 1
+            self._counters["patches"] += len(patches)
+            return "success", session["revision"], None
+
+    def confirm(self, session_id, edited_text):
+        """Confirm a session and wake up its waiter. Returns a copy of the session or None."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session["edited_text"] = edited_text
+            session["confirmed"] = True
+            self._counters["confirmed"] += 1
+            snapshot = _copy(session)
+        session["event"].set()
+        return snapshot
+
+    def confirm_batch(self, session_id, edited_texts):
+        """
+        Confirm a batch session with one edited text per item and wake up its waiter.
+        Returns a copy of the session or None. Raises ValueError if the number of texts does not match.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if not isinstance(edited_texts, list) or len(edited_texts) != len(session["texts"]):
+                raise ValueError(f"expected {len(session['texts'])} edited texts")
+            session["edited_texts"] = [str(t) for t in edited_texts]
+            session["confirmed"] = True
+            self._counters["confirmed"] += 1
+            snapshot = _copy(session)
+        session["event"].set()
+        return snapshot
+
+    def stop(self, session_id):
+        """Mark a session as stopped and wake up its waiter. Returns a copy of the session or None."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session["stopped"] = True
+            session["confirmed"] = True
+            self._counters["stopped"] += 1
+            snapshot = _copy(session)
+        session["event"].set()
+        return snapshot
+
+    def pop(self, session_id):
+        """Remove a session and return it (or None)."""
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def find(self, predicate):
+        """Return (session_id, copy of the session) of the first session matching predicate, or (None, None)."""
+        with self._lock:
+            for session_id, session in self._sessions.items():
+                if predicate(session):
+                    return session_id, _copy(session)
+        return None, None
+
+    def items(self):
+        """Snapshot of (session_id, copy of the session) pairs."""
+        with self._lock:
+            return [(session_id, _copy(session)) for session_id, session in self._sessions.items()]
+
+    # ------------------------------------------------------------------
+    # Deferred results
+    # ------------------------------------------------------------------
+    def put_result(self, key, edited_text):
+        with self._lock:
+            self._results[key] = (edited_text, time.monotonic() + self.ttl)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_sessions:
+                self._results.popitem(last=False)
+                self._counters["evicted"] += 1
+
+    def take_result(self, key):
+        """Pop a stored result. Returns None if there is none (or it expired)."""
+        with self._lock:
+            entry = self._results.pop(key, None)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    # ------------------------------------------------------------------
+    # Expiry and introspection
+    # ------------------------------------------------------------------
+    def _expire_locked(self, now):
+        expired = [sid for sid, session in self._sessions.items() if session["expires_at"] <= now]
+        for session_id in expired:
+            session = self._sessions.pop(session_id)
+            session["expired"] = True
+            session["event"].set()
+            self._counters["expired"] += 1
+        stale = [key for key, (_, expires_at) in self._results.items() if expires_at <= now]
+        for key in stale:
+            del self._results[key]
+            self._counters["expired"] += 1
+        return len(expired)
+
+    def sweep(self):
+        """Drop expired sessions and results. Returns the number of expired sessions."""
+        with self._lock:
+            return self._expire_locked(time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["active"] = len(self._sessions)
+            stats["pending_results"] = len(self._results)
+            stats["max_sessions"] = self.max_sessions
+            stats["ttl"] = self.ttl
+            return stats
+
+    def _ensure_sweeper(self):
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="xishen-prompt-edit-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._sweeper_stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Prompt edit session sweep failed: {e}")
+
+    def close(self):
+        """Stop the background sweep thread."""
+        self._sweeper_stop.set()
+
+
+MEMO_PATH_ENV = "XISHEN_PROMPT_EDIT_MEMO"
+
+
+def default_memo_path():
+    """
+    Memo location: $XISHEN_PROMPT_EDIT_MEMO, else ComfyUI's user directory, else next to this package.
+    """
+    configured = os.environ.get(MEMO_PATH_ENV, "").strip()
+    if configured:
+        return os.path.expanduser(configured)
+    try:
+        import folder_paths
+        return os.path.join(folder_paths.get_user_directory(), "xishen", "prompt_edit_memo.sqlite3")
+    except Exception:
+        return os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "data", "prompt_edit_memo.sqlite3")
+
+
+def text_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class PromptEditMemo:
+    """
+    Content-hashed memo of confirmed edits: sha256(input text) -> edited text.
+
+    Backed by SQLite so that several ComfyUI processes can share one file.
+    The database is opened lazily on first use.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self.path is None:
+            self.path = default_memo_path()
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                "input_hash TEXT PRIMARY KEY, edited_text TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def get(self, text):
+        """Return the memoized edit for text, or None."""
+        key = text_hash(text)
+        with self._lock:
+            connection = self._connect()
+            try:
+                row = connection.execute("SELECT edited_text FROM memo WHERE input_hash = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                connection.execute("UPDATE memo SET hits = hits + 1 WHERE input_hash = ?", (key,))
+                connection.commit()
+                self.hits += 1
+                return row[0]
+            finally:
+                connection.close()
+
+    def put(self, text, edited_text):
+        key = text_hash(text)
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "INSERT INTO memo (input_hash, edited_text, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(input_hash) DO UPDATE SET edited_text = excluded.edited_text, updated_at = excluded.updated_at",
+                    (key, edited_text, time.time()),
+                )
+                connection.commit()
+            finally:
+                connection.close()
+
+    def stats(self):
+        return {"path": self.path, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词库加载器 - 多来源合并与流式解析
+
+功能：
+1. 从可配置的路径列表加载多个提示词库（文件或目录，支持 JSON 与 JSONL）
+2. 流式解析，不会把整个大文件解析成一个字典放进内存
+3. 索引中只记录每条提示词在文件中的字节位置，取用时再按需读取
+4. 索引按文件的修改时间和大小缓存，文件变化后自动重建
+
+配置：
+- 环境变量 XISHEN_PROMPT_LIBRARY_PATHS，多个路径用系统路径分隔符（Windows 为 ";"，其余为 ":"）分隔
+- 未配置时使用 web/extensions/xishen_prompts.json 和 web/extensions/prompt_libraries/ 目录
+
+文件格式：
+- JSON：{"一级分类": {"二级分类": ["提示词", ...]}}
+- JSONL：每行 {"primary": ..., "secondary": ..., "text": "提示词"}
+  或 {"primary": ..., "secondary": ..., "prompts": ["提示词", ...]}
+"""
+
+import json
+import os
+import threading
+from array import array
+
+EXTENSIONS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "web", "extensions")
+DEFAULT_LIBRARY_PATHS = [
+    os.path.join(EXTENSIONS_DIR, "xishen_prompts.json"),
+    os.path.join(EXTENSIONS_DIR, "prompt_libraries"),
+]
+LIBRARY_PATHS_ENV = "XISHEN_PROMPT_LIBRARY_PATHS"
+LIBRARY_EXTENSIONS = (".json", ".jsonl")
+
+# 条目类型：JSON 文件中的字符串字面量 / JSONL 行的 text 字段；非负数为 JSONL 行 prompts 列表的下标
+_ITEM_RAW_STRING = -2
+_ITEM_TEXT_FIELD = -1
+
+_WHITESPACE = b" \t\r\n"
+
+
+def get_library_paths():
+    """返回配置的提示词库路径列表"""
+    configured = os.environ.get(LIBRARY_PATHS_ENV, "").strip()
+    if configured:
+        return [path for path in configured.split(os.pathsep) if path.strip()]
+    return list(DEFAULT_LIBRARY_PATHS)
+
+
+def resolve_library_files(paths):
+    """把路径列表展开为具体的库文件列表，目录按文件名排序"""
+    files = []
+    for path in paths:
+        path = os.path.expanduser(path.strip())
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(LIBRARY_EXTENSIONS):
+                    files.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+class _ByteReader:
+    """按块读取的字节流，记录当前位置在文件中的绝对偏移"""
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.base = 0
+
+    def _fill(self, keep_from=None):
+        """读取下一块数据；keep_from 之前的已消费部分会被丢弃，返回丢弃的字节数（文件结束时返回 None）"""
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return None
+        # 丢弃已经消费的部分，避免缓冲区无限增长
+        drop = self.pos if keep_from is None else min(keep_from, self.pos)
+        self.base += drop
+        self.buf = self.buf[drop:] + data
+        self.pos -= drop
+        return drop
+
+    def peek(self):
+        """跳过空白并返回下一个字节（文件结束时返回 None）"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos:self.pos + 1]
+            if self._fill() is None:
+                return None
+
+    def expect(self, token):
+        char = self.peek()
+        if char != token:
+            raise ValueError(f"JSON 格式错误：偏移 {self.base + self.pos} 处期望 {token!r}，实际为 {char!r}")
+        self.pos += 1
+
+    def read_string(self):
+        """读取一个字符串字面量，返回 (文件偏移, 原始字节)"""
+        self.expect(b'"')
+        start = self.pos - 1
+        index = self.pos
+        while True:
+            quote = self.buf.find(b'"', index)
+            if quote < 0:
+                drop = self._fill(keep_from=start)
+                if drop is None:
+                    raise ValueError("JSON 格式错误：字符串未闭合")
+                start -= drop
+                index = max(start + 1, index - drop)
+                continue
+            # 统计引号前连续的反斜杠，奇数个说明是转义引号
+            backslashes = 0
+            cursor = quote - 1
+            while cursor > start and self.buf[cursor] == 0x5C:
+                backslashes += 1
+                cursor -= 1
+            if backslashes % 2:
+                index = quote + 1
+                continue
+            raw = self.buf[start:quote + 1]
+            self.pos = quote + 1
+            return self.base + start, raw
+
+    def skip_value(self):
+        """跳过一个任意 JSON 值（用于忽略库文件中非字符串的条目）"""
+        char = self.peek()
+        if char == b'"':
+            self.read_string()
+            return
+        if char in (b"{", b"["):
+            depth = 0
+            while True:
+                char = self.peek()
+                if char is None:
+                    raise ValueError("JSON 格式错误：对象或数组未闭合")
+                if char == b'"':
+                    self.read_string()
+                    continue
+                self.pos += 1
+                if char in (b"{", b"["):
+                    depth += 1
+                elif char in (b"}", b"]"):
+                    depth -= 1
+                    if depth == 0:
+                        return
+            return
+        # 数字、true/false/null
+        while True:
+            char = self.peek()
+            if char is None or char in (b",", b"}", b"]"):
+                return
+            self.pos += 1
+
+
+def iter_json_library(f):
+    """
+    流式遍历 JSON 格式的提示词库
+
+    产出:
+        (一级分类, 二级分类, 文件偏移, 字节长度)，偏移指向提示词字符串字面量
+    """
+    reader = _ByteReader(f)
+    reader.expect(b"{")
+    if reader.peek() == b"}":
+        return
+    while True:
+        _, raw_primary = reader.read_string()
+        primary = json.loads(raw_primary)
+        reader.expect(b":")
+        if reader.peek() != b"{":
+            reader.skip_value()
+        else:
+            reader.expect(b"{")
+            if reader.peek() != b"}":
+                while True:
+                    _, raw_secondary = reader.read_string()
+                    secondary = json.loads(raw_secondary)
+                    reader.expect(b":")
+                    if reader.peek() != b"[":
+                        reader.skip_value()
+                    else:
+                        reader.expect(b"[")
+                        if reader.peek() != b"]":
+                            while True:
+                                if reader.peek() == b'"':
+                                    offset, raw = reader.read_string()
+                                    yield primary, secondary, offset, len(raw)
+                                else:
+                                    reader.skip_value()
+                                if reader.peek() == b",":
+                                    reader.pos += 1
+                                    continue
+                                break
+                        reader.expect(b"]")
+                    if reader.peek() == b",":
+                        reader.pos += 1
+                        continue
+                    break
+            reader.expect(b"}")
+        if reader.peek() == b",":
+            reader.pos += 1
+            continue
+        break
+    reader.expect(b"}")
+
+
+def iter_jsonl_library(f):
+    """
+    逐行遍历 JSONL 格式的提示词库
+
+    产出:
+        (一级分类, 二级分类, 行偏移, 行长度, 条目类型)
+    """
+    offset = 0
+    for line in f:
+        length = len(line)
+        stripped = line.strip()
+        if stripped:
+            try:
+                record = json.loads(stripped)
+            except ValueError as e:
+                print(f"跳过无法解析的提示词行（偏移 {offset}）：{e}")
+                record = None
+            if isinstance(record, dict) and "primary" in record and "secondary" in record:
+                primary, secondary = str(record["primary"]), str(record["secondary"])
+                if isinstance(record.get("text"), str):
+                    yield primary, secondary, offset, length, _ITEM_TEXT_FIELD
+                elif isinstance(record.get("prompts"), list):
+                    for item, prompt in enumerate(record["prompts"]):
+                        if isinstance(prompt, str):
+                            yield primary, secondary, offset, length, item
+        offset += length
+
+
+class _CategoryEntries:
+    """单个 (一级分类, 二级分类) 下所有提示词的位置，使用紧凑数组存储"""
+
+    __slots__ = ("sources", "offsets", "lengths", "items")
+
+    def __init__(self):
+        self.sources = array("i")
+        self.offsets = array("q")
+        self.lengths = array("i")
+        self.items = array("i")
+
+    def append(self, source, offset, length, item):
+        self.sources.append(source)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.items.append(item)
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+class PromptLibraryIndex:
+    """
+    多个提示词库文件合并后的索引
+
+    一级分类按首次出现的顺序排列，同名分类的提示词按文件顺序合并。
+    """
+
+    def __init__(self, files):
+        self.files = list(files)
+        self.categories = {}
+        for source, path in enumerate(self.files):
+            try:
+                self._index_file(source, path)
+            except Exception as e:
+                print(f"加载提示词库失败：{path}，{e}")
+
+    def _entries(self, primary, secondary):
+        secondaries = self.categories.setdefault(primary, {})
+        entries = secondaries.get(secondary)
+        if entries is None:
+            entries = secondaries[secondary] = _CategoryEntries()
+        return entries
+
+    def _index_file(self, source, path):
+        with open(path, "rb") as f:
+            if path.lower().endswith(".jsonl"):
+                for primary, secondary, offset, length, item in iter_jsonl_library(f):
+                    self._entries(primary, secondary).append(source, offset, length, item)
+            else:
+                for primary, secondary, offset, length in iter_json_library(f):
+                    self._entries(primary, secondary).append(source, offset, length, _ITEM_RAW_STRING)
+
+    def primary_categories(self):
+        return list(self.categories.keys())
+
+    def secondary_categories(self, primary=None):
+        """返回某个一级分类下的二级分类；不指定时返回所有二级分类的并集（保持首次出现顺序）"""
+        if primary is not None:
+            return list(self.categories.get(primary, {}).keys())
+        merged = {}
+        for secondaries in self.categories.values():
+            for secondary in secondaries:
+                merged.setdefault(secondary, None)
+        return list(merged.keys())
+
+    def count(self, primary, secondary):
+        entries = self.categories.get(primary, {}).get(secondary)
+        return len(entries) if entries is not None else 0
+
+    def total(self):
+        return sum(len(entries) for secondaries in self.categories.values() for entries in secondaries.values())
+
+    def get(self, primary, secondary, index):
+        """按下标读取一条提示词"""
+        entries = self.categories[primary][secondary]
+        with open(self.files[entries.sources[index]], "rb") as f:
+            return self._read(f, entries, index)
+
+    def iter_prompts(self, primary, secondary, start=0, stop=None):
+        """按顺序读取某个分类下下标在 [start, stop) 内的提示词，每个文件只打开一次"""
+        entries = self.categories.get(primary, {}).get(secondary)
+        if entries is None:
+            return
+        handles = {}
+        try:
+            for index in range(*slice(start, stop).indices(len(entries))):
+                source = entries.sources[index]
+                if source not in handles:
+                    handles[source] = open(self.files[source], "rb")
+                yield self._read(handles[source], entries, index)
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    @staticmethod
+    def _read(f, entries, index):
+        f.seek(entries.offsets[index])
+        raw = f.read(entries.lengths[index])
+        item = entries.items[index]
+        if item == _ITEM_RAW_STRING:
+            return json.loads(raw)
+        record = json.loads(raw)
+        if item == _ITEM_TEXT_FIELD:
+            return record["text"]
+        return record["prompts"][item]
+
+
+def _files_signature(files):
+    signature = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+_index_lock = threading.Lock()
+_index_cache = {}
+
+
+def get_library_index(paths=None):
+    """
+    获取提示词库索引（带缓存）
+
+    参数:
+        paths: 路径列表，默认使用 get_library_paths() 的配置
+    """
+    if paths is None:
+        paths = get_library_paths()
+    key = tuple(paths)
+    files = resolve_library_files(paths)
+    signature = _files_signature(files)
+
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        index = PromptLibraryIndex(files)
+        _index_cache[key] = (signature, index)
+        return index
@@ -5,10 +5,10 @@
 
 功能：
 1. 提供预设的分类提示词系统，支持两级分类
-2. 一级分类：女性、男性、风景、建筑、动漫
-3. 二级分类：微距、长焦、广角、人文摄影等23种风格
+2. 一级分类和二级分类从提示词库索引中读取，不再写死在代码里
+3. 可通过环境变量 XISHEN_PROMPT_LIBRARY_PATHS 合并多个提示词库文件或目录（JSON/JSONL）
 4. 支持随机种子控制，可重复性生成相同提示词
-5. 从外部JSON文件读取提示词库，方便维护和扩展
+5. 提示词库流式解析并缓存索引，只按需读取被选中的提示词
 
 使用方法：
 - 选择一级分类和二级分类
@@ -16,21 +16,22 @@
 - 自动生成对应风格的随机提示词
 """
 
-import json
-import os
 import random
 
+from .prompt_library import get_library_index
+
 class XishenCommonPromptNode:
     @classmethod
     def INPUT_TYPES(cls):
-        # 定义一级分类和二级分类
-        primary_categories = ["女性", "男性", "风景", "建筑", "动漫"]
-        secondary_categories = ["微距", "长焦", "广角", "人文摄影", "夜景摄影", "国画", "油画", "水彩", "素描", "版画", "工笔画", "浮世绘", "莫奈印象派", "梵高后印象派", "赛博朋克", "蒸汽波", "暗黑系", "治愈系", "极简主义", "波普艺术", "哥特风", "洛丽塔", "复古风"]
+        # 一级分类和二级分类来自提示词库索引（按文件修改时间缓存）
+        index = get_library_index()
+        primary_categories = index.primary_categories() or ["None"]
+        secondary_categories = index.secondary_categories() or ["None"]
         
         return {
             "required": {
-                "primary_category": (primary_categories, {"default": "女性"}),
-                "secondary_category": (secondary_categories, {"default": "微距"}),
+                "primary_category": (primary_categories, {"default": primary_categories[0]}),
+                "secondary_category": (secondary_categories, {"default": secondary_categories[0]}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff})
             }
         }
@@ -41,38 +42,35 @@ class XishenCommonPromptNode:
     CATEGORY = "🍡Comfyui-xishen"
 
     def generate_prompt(self, primary_category, secondary_category, seed):
-        # 构建JSON文件路径
-        json_path = os.path.join(os.path.dirname(__file__), "..", "web", "extensions", "xishen_prompts.json")
-        
         try:
-            # 读取JSON文件
-            with open(json_path, "r", encoding="utf-8") as f:
-                prompts_data = json.load(f)
+            index = get_library_index()
             
             # 验证一级分类是否存在
-            if primary_category not in prompts_data:
+            if primary_category not in index.categories:
                 print(f"一级分类不存在！primary_category={primary_category}")
                 return ("",)
             
             # 验证二级分类是否存在
-            if secondary_category not in prompts_data[primary_category]:
+            if secondary_category not in index.categories[primary_category]:
                 print(f"二级分类不存在！primary_category={primary_category}, secondary_category={secondary_category}")
                 return ("",)
             
-            # 获取该分类下的所有提示词
-            prompts = prompts_data[primary_category][secondary_category]
+            # 获取该分类下的提示词数量
+            count = index.count(primary_category, secondary_category)
             
-            if not prompts:
+            if not count:
                 print(f"该分类下没有提示词！primary_category={primary_category}, secondary_category={secondary_category}")
                 return ("",)
             
             # 使用种子初始化随机数生成器
             # 如果种子为0，则使用系统随机种子
+            # randrange(n) 与 choice(list) 消耗相同的随机数，同一种子的结果保持不变
             if seed == 0:
-                selected_prompt = random.choice(prompts)
+                selected_index = random.randrange(count)
             else:
                 rng = random.Random(seed)
-                selected_prompt = rng.choice(prompts)
+                selected_index = rng.randrange(count)
+            selected_prompt = index.get(primary_category, secondary_category, selected_index)
             
             # 增加调试信息
             print(f"当前primary_category: {primary_category}, secondary_category: {secondary_category}, selected_prompt: {selected_prompt[:50]}...")
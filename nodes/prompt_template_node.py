@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板节点 - 通配符/模板展开
+
+功能：
+1. 支持 {清晨|黄昏} 形式的多选一，可嵌套
+2. 支持 __一级分类/二级分类__ 引用常用提示词库中的随机提示词，__一级分类__ 从该分类全部提示词中随机
+3. 支持 __theme:主题分类__ 引用主题提示词库中的随机条目
+4. 模板只解析一次，按模板文本缓存编译结果
+5. 一次调用批量生成 N 个变体，第 i 个变体使用由 (种子, i) 确定的独立随机数生成器，结果可复现
+
+语法：
+- {a|b|c}：随机选择其中一项
+- __女性/人文摄影__：从常用提示词库的 女性/人文摄影 分类中随机选择
+- __theme:女-肖像__：从主题提示词库的 女-肖像 分类中随机选择
+- 使用反斜杠转义特殊字符，例如 \\{ \\} \\| \\_
+"""
+
+import random
+from functools import lru_cache
+
+from .prompt_library import get_library_index
+from .theme_library import get_theme_index
+
+# 编译后的模板结构：
+#   str                     字面量
+#   ("choice", (seq, ...))  多选一，每个选项是一个序列（元组）
+#   ("prompt", p, s)        常用提示词库引用，s 为 None 表示整个一级分类
+#   ("theme", p)            主题提示词库引用
+_CHOICE = "choice"
+_PROMPT = "prompt"
+_THEME = "theme"
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def parse(self):
+        return self._sequence(top_level=True)
+
+    def _sequence(self, top_level):
+        parts = []
+        literal = []
+
+        def flush():
+            if literal:
+                parts.append("".join(literal))
+                literal.clear()
+
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char == "\\" and self.pos + 1 < len(text):
+                literal.append(text[self.pos + 1])
+                self.pos += 2
+            elif char == "{":
+                flush()
+                self.pos += 1
+                parts.append(self._choice())
+            elif char in "|}" and not top_level:
+                break
+            elif text.startswith("__", self.pos):
+                end = text.find("__", self.pos + 2)
+                reference = text[self.pos + 2:end] if end > self.pos + 2 else ""
+                if not reference or "\n" in reference:
+                    # 不是合法引用，按字面量处理
+                    literal.append("__")
+                    self.pos += 2
+                    continue
+                flush()
+                parts.append(self._reference(reference))
+                self.pos = end + 2
+            else:
+                literal.append(char)
+                self.pos += 1
+
+        flush()
+        return tuple(parts)
+
+    def _choice(self):
+        start = self.pos - 1
+        options = []
+        while True:
+            options.append(self._sequence(top_level=False))
+            if self.pos >= len(self.text):
+                raise ValueError(f"模板语法错误：位置 {start} 处的 '{{' 没有闭合")
+            char = self.text[self.pos]
+            self.pos += 1
+            if char == "}":
+                break
+        return (_CHOICE, tuple(options))
+
+    @staticmethod
+    def _reference(reference):
+        reference = reference.strip()
+        if reference.startswith("theme:"):
+            return (_THEME, reference[len("theme:"):].strip())
+        primary, _, secondary = reference.partition("/")
+        return (_PROMPT, primary.strip(), secondary.strip() or None)
+
+
+@lru_cache(maxsize=256)
+def compile_template(template):
+    """解析模板文本，结果按模板文本缓存"""
+    return _Parser(template).parse()
+
+
+class _Resolver:
+    """一次批量展开期间共享的数据源，避免每个变体重复查询索引"""
+
+    def __init__(self):
+        self.library = get_library_index()
+        self.themes = get_theme_index()
+        self._prompt_pools = {}
+
+    def _prompt_pool(self, primary, secondary):
+        """分类下全部提示词（secondary 为 None 时按顺序合并所有二级分类），每次展开只从文件读取一次"""
+        key = (primary, secondary)
+        pool = self._prompt_pools.get(key)
+        if pool is None:
+            secondaries = self.library.secondary_categories(primary) if secondary is None else [secondary]
+            pool = []
+            for name in secondaries:
+                pool.extend(self.library.iter_prompts(primary, name))
+            self._prompt_pools[key] = pool
+        return pool
+
+    def prompt(self, rng, primary, secondary):
+        pool = self._prompt_pool(primary, secondary)
+        if not pool:
+            return None
+        return pool[rng.randrange(len(pool))]
+
+    def theme(self, rng, primary):
+        items = self.themes.pool(primary)
+        if not items:
+            return None
+        return items[rng.randrange(len(items))]
+
+
+def _render(sequence, rng, resolver, out):
+    for part in sequence:
+        if type(part) is str:
+            out.append(part)
+            continue
+        kind = part[0]
+        if kind == _CHOICE:
+            options = part[1]
+            _render(options[rng.randrange(len(options))], rng, resolver, out)
+        elif kind == _PROMPT:
+            value = resolver.prompt(rng, part[1], part[2])
+            if value is None:
+                out.append(f"__{part[1]}/{part[2]}__" if part[2] else f"__{part[1]}__")
+            else:
+                out.append(value)
+        elif kind == _THEME:
+            value = resolver.theme(rng, part[1])
+            out.append(f"__theme:{part[1]}__" if value is None else value)
+
+
+def expand_template(template, seed, count=1):
+    """
+    批量展开模板
+
+    参数:
+        template: 模板文本
+        seed: 基础种子
+        count: 生成的变体数量
+
+    返回:
+        list[str]: 第 i 项由 random.Random((seed << 64) | i) 展开，与批量大小无关
+    """
+    compiled = compile_template(template)
+    # 纯字面量模板无需随机数
+    if all(type(part) is str for part in compiled):
+        return ["".join(compiled)] * count
+
+    resolver = _Resolver()
+    results = []
+    for index in range(count):
+        rng = random.Random((seed << 64) | index)
+        out = []
+        _render(compiled, rng, resolver, out)
+        results.append("".join(out))
+    return results
+
+
+class XishenPromptTemplateNode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "template": ("STRING", {"default": "{清晨|黄昏}的__女性/人文摄影__，__theme:女-肖像__", "multiline": True, "dynamicPrompts": False}),
+                "count": ("INT", {"default": 1, "min": 1, "max": 10000}),
+                "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("prompts",)
+    OUTPUT_IS_LIST = (True,)
+    FUNCTION = "expand"
+    CATEGORY = "🍡Comfyui-xishen"
+
+    def expand(self, template, count, seed):
+        try:
+            prompts = expand_template(template, seed, count)
+        except ValueError as e:
+            print(f"模板展开失败：{e}")
+            return ([""],)
+        print(f"📝 模板展开 {len(prompts)} 条，首条: {prompts[0][:50]}...")
+        return (prompts,)
+
+
+NODE_CLASS_MAPPINGS = {
+    "XishenPromptTemplateNode": XishenPromptTemplateNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "XishenPromptTemplateNode": "提示词模板-xishen",
+}
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
@@ -25,6 +25,61 @@ Qwen_镜头预设.py - 为Qwen模型生成相机参数提示词的ComfyUI节点
 # 导入必要的模块
 import torch
 
+# 镜头模式选项，镜头矩阵节点共用
+镜头模式选项 = ["无", "标准镜头", "广角镜头", "长焦镜头", "鱼眼镜头", "微距镜头", "移轴镜头"]
+
+
+def build_camera_prompt(移动控制, 向上移动, 向下移动, 背面, 向左旋转, 向右旋转, 拉近镜头, 镜头模式):
+    """
+    根据相机参数生成描述性提示词（参数含义见 QwenCameraPresetNode.execute），镜头矩阵节点共用
+    """
+    # 初始化提示词列表
+    prompts = []
+
+    # 添加镜头相关描述
+    if 镜头模式 != "无":
+        prompts.append(f"将镜头转化为{镜头模式}")
+
+    # 处理移动控制
+    if 移动控制:
+        # 处理拉近镜头，100时为特写镜头
+        if 拉近镜头 > 0:
+            if 拉近镜头 == 100:
+                prompts.append("将镜头改为特写镜头")
+            else:
+                prompts.append(f"将镜头拉近{拉近镜头}%")
+
+        # 处理俯视图和仰视图（布尔开关）
+        if 向上移动:
+            prompts.append("将镜头向上移动，俯视图，极端角度")
+        if 向下移动:
+            prompts.append("将镜头向下移动，仰视图，极端角度")
+
+        # 处理向左和向右旋转，统一使用旋转角度描述
+        if 向左旋转 > 0:
+            prompts.append(f"将镜头向左旋转{向左旋转}度")
+        if 向右旋转 > 0:
+            prompts.append(f"将镜头向右旋转{向右旋转}度")
+
+        # 处理背面拍摄
+        if 背面:
+            prompts.append("镜头从背后拍摄")
+
+    # 优化提示词连接逻辑
+    if prompts:
+        # 第一个提示词保持不变，后续提示词使用"同时"连接
+        final_prompt = prompts[0]
+        for prompt in prompts[1:]:
+            # 如果提示词以"将镜头"开头，去掉这个前缀
+            if prompt.startswith("将镜头"):
+                prompt = prompt[3:]  # 去掉"将镜头"前缀
+            final_prompt += f"，同时{prompt}"
+    else:
+        final_prompt = ""
+
+    return final_prompt
+
+
 # 定义节点类
 class QwenCameraPresetNode:
     """
@@ -72,7 +127,7 @@ class QwenCameraPresetNode:
                 "拉近镜头": ("INT", {"default": 0, "min": 0, "max": 100, "step": 1, "display": "slider"}),  # 拉近镜头，100时为特写镜头
                 
                 # 镜头模式 - 使用专业镜头类型的参数
-                "镜头模式": (["无", "标准镜头", "广角镜头", "长焦镜头", "鱼眼镜头", "微距镜头", "移轴镜头"], {"default": "标准镜头"})
+                "镜头模式": (镜头模式选项, {"default": "标准镜头"})
             },
         }
     
@@ -102,49 +157,9 @@ class QwenCameraPresetNode:
         返回:
         - 提示词字符串
         """
-        # 初始化提示词列表
-        prompts = []
-        
-        # 添加镜头相关描述
-        if 镜头模式 != "无":
-            prompts.append(f"将镜头转化为{镜头模式}")
-        
-        # 处理移动控制
-        if 移动控制:
-            # 处理拉近镜头，100时为特写镜头
-            if 拉近镜头 > 0:
-                if 拉近镜头 == 100:
-                    prompts.append("将镜头改为特写镜头")
-                else:
-                    prompts.append(f"将镜头拉近{拉近镜头}%")
-            
-            # 处理俯视图和仰视图（布尔开关）
-            if 向上移动:
-                prompts.append("将镜头向上移动，俯视图，极端角度")
-            if 向下移动:
-                prompts.append("将镜头向下移动，仰视图，极端角度")
-            
-            # 处理向左和向右旋转，统一使用旋转角度描述
-            if 向左旋转 > 0:
-                prompts.append(f"将镜头向左旋转{向左旋转}度")
-            if 向右旋转 > 0:
-                prompts.append(f"将镜头向右旋转{向右旋转}度")
-            
-            # 处理背面拍摄
-            if 背面:
-                prompts.append("镜头从背后拍摄")
-        
-        # 优化提示词连接逻辑
-        if prompts:
-            # 第一个提示词保持不变，后续提示词使用"同时"连接
-            final_prompt = prompts[0]
-            for prompt in prompts[1:]:
-                # 如果提示词以"将镜头"开头，去掉这个前缀
-                if prompt.startswith("将镜头"):
-                    prompt = prompt[3:]  # 去掉"将镜头"前缀
-                final_prompt += f"，同时{prompt}"
-        else:
-            final_prompt = ""
+        final_prompt = build_camera_prompt(
+            移动控制, 向上移动, 向下移动, 背面, 向左旋转, 向右旋转, 拉近镜头, 镜头模式
+        )
         
         # 返回生成的提示词
         return (final_prompt,)
@@ -3,12 +3,14 @@
 
 该节点提供多种预设尺寸选项，用于生成不同比例和分辨率的latent图像。
 支持1:1、3:4、4:3、9:16、16:9等多种常用比例，并可设置批量张数和是否对齐到8的倍数。
+设置目标百万像素或目标token数后，按比例在预算内计算分辨率（对齐到模型的 latent 倍数），不再使用预设表中的尺寸。
 
 输出：
 - latent：根据所选尺寸生成的潜在空间图像
 """
 
-import torch
+from .latent_factory import DEFAULT_LATENT_FORMAT, LATENT_FORMATS, empty_latent, latent_multiple
+from .resolution_buckets import resolve_bucket
 
 class Qwen_尺寸预设:
     """
@@ -58,6 +60,15 @@ class Qwen_尺寸预设:
                 "批量张数": ("INT", {"default": 1, "min": 1, "max": 100, "step": 1}),
                 "对齐到8的倍数": ("BOOLEAN", {"default": True}),
             },
+            "optional": {
+                # 决定 latent 的通道数和下采样倍数
+                "模型类型": (list(LATENT_FORMATS.keys()), {"default": DEFAULT_LATENT_FORMAT}),
+                # 任一预算大于 0 时按预算计算分辨率（1 MP = 1024×1024）
+                "目标百万像素": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 16.0, "step": 0.05}),
+                "目标token数": ("INT", {"default": 0, "min": 0, "max": 65536, "step": 64}),
+                # 如 2.39:1，为空时使用所选预设的比例
+                "目标比例": ("STRING", {"default": ""}),
+            },
         }
     
     # 定义节点的输出类型
@@ -67,7 +78,8 @@ class Qwen_尺寸预设:
     # 节点的主要功能函数名称
     FUNCTION = "生成尺寸预设"
     
-    def 生成尺寸预设(self, 尺寸预设, 批量张数, 对齐到8的倍数):
+    def 生成尺寸预设(self, 尺寸预设, 批量张数, 对齐到8的倍数, 模型类型=DEFAULT_LATENT_FORMAT,
+               目标百万像素=0.0, 目标token数=0, 目标比例=""):
         """
         生成尺寸预设的latent图像
         
@@ -75,6 +87,10 @@ class Qwen_尺寸预设:
             尺寸预设: 选择的预设尺寸
             批量张数: 生成的图像数量
             对齐到8的倍数: 是否将尺寸对齐到8的倍数
+            模型类型: latent 格式（通道数和下采样倍数）
+            目标百万像素: 像素预算，0 表示不使用
+            目标token数: token 预算，0 表示不使用
+            目标比例: 自定义比例，为空时使用预设的比例
         
         返回:
             tuple: 包含生成的latent图像的元组
@@ -82,6 +98,11 @@ class Qwen_尺寸预设:
         # 获取所选尺寸的宽高
         width, height = self.预设尺寸映射[尺寸预设]
         
+        # 设置了预算时按比例计算分辨率，结果已对齐到模型的 latent 倍数
+        if 目标百万像素 > 0 or 目标token数 > 0:
+            比例 = 目标比例.strip() or 尺寸预设.split(" - ")[0]
+            width, height = resolve_bucket(比例, 目标百万像素, 目标token数, latent_multiple(模型类型))
+        
         # 如果需要对齐到8的倍数，进行调整
         if 对齐到8的倍数:
             width = (width + 7) // 8 * 8
@@ -89,8 +110,9 @@ class Qwen_尺寸预设:
         
         # 创建latent图像
         # 注意：这里我们只生成latent的结构，不需要实际的VAE编码
+        # samples 是共享的只读零张量，需要原地修改时先 clone()
         latent = {
-            "samples": torch.zeros([批量张数, 4, height // 8, width // 8]),
+            "samples": empty_latent(批量张数, width, height, 模型类型),
             "batch_size": 批量张数,
             "width": width,
             "height": height
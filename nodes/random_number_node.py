@@ -6,10 +6,34 @@ random_number_node.py
 """
 
 import random
-import re
-import torch
+import numpy as np
 import comfy.model_management
 
+from .integer_permutation import permutation_values
+from .latent_factory import DEFAULT_LATENT_FORMAT, LATENT_FORMATS, empty_latent, latent_multiple
+from .resolution_buckets import bucket_options, resolve_bucket
+from .sequence_counter import get_sequence_counter
+from .text_pipeline_node import remove_empty_lines
+
+INT64_MIN = -0x8000000000000000
+INT64_MAX = 0x7fffffffffffffff
+
+# 常用分辨率的比例和像素预算档位（MP），下拉列表由分桶计算生成，前端按比例过滤
+RESOLUTION_RATIOS = (
+    "1:1",
+    "4:3", "3:2", "16:10", "16:9", "21:9",
+    "3:4", "2:3", "9:16", "9:21",
+)
+RESOLUTION_MEGAPIXEL_STEPS = (0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0)
+
+
+def _wrap_offsets(offset, count, span):
+    """offset, offset+1, ... 共 count 个，按 span 循环；span 很大时改用 Python 整数避免溢出"""
+    offset %= span
+    if span <= 1 << 62:
+        return (offset + np.arange(count, dtype=np.int64)) % span
+    return [(offset + i) % span for i in range(count)]
+
 
 class XishenRandomIntegerNode:
     def __init__(self):
@@ -22,11 +46,21 @@ class XishenRandomIntegerNode:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "min_value": ("INT", {"default": 1, "min": -10000, "max": 10000}),
-                "max_value": ("INT", {"default": 50, "min": -10000, "max": 10000}),
-                "mode": (["random", "sequence"], {"default": "sequence"}),
+                "min_value": ("INT", {"default": 1, "min": INT64_MIN, "max": INT64_MAX}),
+                "max_value": ("INT", {"default": 50, "min": INT64_MIN, "max": INT64_MAX}),
+                # permutation：按种子打乱的不重复遍历，依次输出排列中的下一个位置，遍历完 [min, max] 前不会重复
+                "mode": (["random", "sequence", "permutation"], {"default": "sequence"}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
             },
+            "optional": {
+                # 一次执行输出 count 个整数（列表输出），下游节点对每个值各执行一次
+                "count": ("INT", {"default": 1, "min": 1, "max": 100000}),
+                # 非空时序列模式使用该名称的持久化计数器：重启后继续，多个进程/节点共享同一序列
+                "sequence_name": ("STRING", {"default": ""}),
+                # 命名序列每次加锁预留的值数量：大于 1 时本进程分发完这一段才再次加锁，适合高频调用；
+                # 多个进程同时使用时各自按段取值（不会重复，但不再严格交替递增），进程退出时未用完的值被跳过
+                "sequence_block": ("INT", {"default": 1, "min": 1, "max": 100000}),
+            },
             # reset_sequence 作为 hidden 输入，仅由前端 JS 通过按钮触发时设置
             "hidden": {
                 "reset_sequence": ("INT", {"default": 0}),
@@ -35,58 +69,83 @@ class XishenRandomIntegerNode:
 
     RETURN_TYPES = ("STRING", "INT")
     RETURN_NAMES = ("number_text", "number_int")
+    OUTPUT_IS_LIST = (True, True)
     FUNCTION = "generate_number"
     CATEGORY = "🍡Comfyui-xishen"
 
-    def generate_number(self, min_value, max_value, mode, seed, reset_sequence=0):
+    def generate_number(self, min_value, max_value, mode, seed, count=1, sequence_name="", sequence_block=1,
+                        reset_sequence=0):
         # 保证 min <= max
         if min_value > max_value:
             min_value, max_value = max_value, min_value
+        count = max(1, int(count))
+        span = max_value - min_value + 1
 
-        # 随机模式
+        # 随机模式：使用独立的随机数生成器，不影响全局 random 模块
         if mode == "random":
-            random.seed(seed)
-            result = random.randint(min_value, max_value)
-            return (str(result), result)
-
-        # 序列模式
+            # 有意使用两个生成器：旧版本每次执行输出一个 random.seed(seed); random.randint(...) 的值，
+            # 第一个值仍用同一种子的 random.Random 生成，已保存的工作流（count=1）结果保持不变；
+            # 其余 count-1 个值由 numpy 生成器向量化生成，它们与第一个值不属于同一个随机序列
+            values = np.empty(count, dtype=np.int64)
+            values[0] = random.Random(seed).randint(min_value, max_value)
+            if count > 1:
+                values[1:] = np.random.default_rng(seed).integers(min_value, max_value, size=count - 1, endpoint=True)
+            return self._output(values)
+
+        # 序列模式（排列模式使用同一个计数作为排列中的位置）
         # 转换reset_sequence为整数以确保类型正确
         reset_sequence = int(reset_sequence)
-        
+
+        # 命名序列：计数保存在文件中，在文件锁内一次预留 count 个值
+        if sequence_name and sequence_name.strip():
+            counter = get_sequence_counter(sequence_name.strip(), block_size=sequence_block)
+            start = counter.take(
+                count,
+                # 排列模式换种子相当于新的一轮遍历
+                scope=[min_value, max_value] + ([seed] if mode == "permutation" else []),
+                reset_token=reset_sequence if reset_sequence in (1, 2) else None,
+            )
+            offsets = _wrap_offsets(start, count, span)
+        else:
+            first = self._next_sequence_value(min_value, max_value, reset_sequence)
+            offsets = _wrap_offsets(first - min_value, count, span)
+            self.current_sequence_value = min_value + int(offsets[-1])
+
+        if mode == "permutation":
+            return self._output(permutation_values(offsets, min_value, max_value, seed))
+        return self._output([min_value + int(offset) for offset in offsets])
+
+    @staticmethod
+    def _output(values):
+        ints = [int(v) for v in values]
+        return ([str(v) for v in ints], ints)
+
+    def _next_sequence_value(self, min_value, max_value, reset_sequence):
+        """本节点实例内的序列：返回本次的第一个值"""
         # 如果reset_sequence为1或2且与上一次不同，重置为最小值
         # 这样1和2之间来回切换可以实现多次重置
         if reset_sequence in (1, 2) and reset_sequence != self.last_reset_sequence:
-            self.current_sequence_value = min_value
             self.last_min = min_value
             self.last_max = max_value
             self.last_reset_sequence = reset_sequence  # 更新上一次的reset_sequence值
-            return (str(self.current_sequence_value), self.current_sequence_value)
-        
+            return min_value
+
         # 只有当reset_sequence为1或2时才更新last_reset_sequence
         # 这样reset_sequence=0时不会清除之前的重置状态
         if reset_sequence in (1, 2):
             self.last_reset_sequence = reset_sequence
 
-        # 如果 min/max 改变，自动重置
-        if self.last_min != min_value or self.last_max != max_value:
-            self.current_sequence_value = min_value
-            self.last_min = min_value
-            self.last_max = max_value
-            return (str(self.current_sequence_value), self.current_sequence_value)
-
-        # 第一次执行
-        if self.current_sequence_value is None:
-            self.current_sequence_value = min_value
+        # 如果 min/max 改变，或者第一次执行，从最小值开始
+        if self.last_min != min_value or self.last_max != max_value or self.current_sequence_value is None:
             self.last_min = min_value
             self.last_max = max_value
-            return (str(self.current_sequence_value), self.current_sequence_value)
+            return min_value
 
         # 正常递增并循环
-        self.current_sequence_value += 1
-        if self.current_sequence_value > max_value:
-            self.current_sequence_value = min_value
-
-        return (str(self.current_sequence_value), self.current_sequence_value)
+        value = self.current_sequence_value + 1
+        if value > max_value:
+            value = min_value
+        return value
 
 
 # 你的其他节点保持原样 —— 如果你原来文件较长请保留旧实现
@@ -96,19 +155,23 @@ class XishenCommonResolutionNode:
 
     @classmethod
     def INPUT_TYPES(cls):
-        import math
-        ratio_order = [
-            "1:1",
-            "4:3", "3:2", "16:10", "16:9", "21:9",
-            "3:4", "2:3", "9:16", "9:21", "其他",
-        ]
-        # minimal placeholder to avoid syntax errors if you trimmed this file
+        ratio_order = list(RESOLUTION_RATIOS) + ["其他"]
+        # 保留旧版的 "1024x1024"，兼容已保存的工作流
+        resolutions = list(bucket_options(RESOLUTION_RATIOS, RESOLUTION_MEGAPIXEL_STEPS, 16)) + ["1024x1024"]
         return {
             "required": {
                 "aspect_ratio": (ratio_order, {"default": "16:9"}),
-                "resolution": (["1024x1024"],),
+                "resolution": (resolutions, {"default": "1360x768 (16:9)"}),
                 "batch_size": ("INT", {"default": 1, "min": 1, "max": 64}),
-            }
+            },
+            "optional": {
+                "latent_format": (list(LATENT_FORMATS.keys()), {"default": DEFAULT_LATENT_FORMAT}),
+                # 设置任一预算后忽略 resolution，按比例在预算内计算分辨率（1 MP = 1024×1024）
+                "megapixels": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 16.0, "step": 0.05}),
+                "max_tokens": ("INT", {"default": 0, "min": 0, "max": 65536, "step": 64}),
+                # 自定义比例，如 2.39:1，为空时使用 aspect_ratio
+                "custom_ratio": ("STRING", {"default": ""}),
+            },
         }
 
     RETURN_NAMES = ("Latent", "Width", "Height")
@@ -116,12 +179,21 @@ class XishenCommonResolutionNode:
     FUNCTION = "generate"
     CATEGORY = "🍡Comfyui-xishen"
 
-    def generate(self, aspect_ratio, resolution, batch_size=1):
-        dims = resolution.split(' ')[0]
-        width, height = map(int, dims.split('x'))
+    def generate(self, aspect_ratio, resolution, batch_size=1, latent_format=DEFAULT_LATENT_FORMAT,
+                 megapixels=0.0, max_tokens=0, custom_ratio=""):
+        if megapixels > 0 or max_tokens > 0:
+            ratio = custom_ratio.strip() or aspect_ratio
+            if ratio == "其他":
+                raise ValueError("比例为“其他”时请填写 custom_ratio")
+            token_size = latent_multiple(latent_format)
+            width, height = resolve_bucket(ratio, megapixels, max_tokens, max(16, token_size), token_size)
+        else:
+            dims = resolution.split(' ')[0]
+            width, height = map(int, dims.split('x'))
         width = int((width // 16) * 16)
         height = int((height // 16) * 16)
-        latent = torch.zeros([batch_size, 4, height // 8, width // 8], device=self.device)
+        # 共享的只读零 latent，需要原地修改时先 clone()
+        latent = empty_latent(batch_size, width, height, latent_format, device=self.device)
         return ({"samples": latent}, width, height)
 
 
@@ -136,12 +208,8 @@ class XishenRemoveEmptyLinesNode:
     CATEGORY = "🍡Comfyui-xishen"
 
     def remove_empty_lines(self, text):
-        parts = re.findall(r"(.*?)(\r\n|\n|\r|$)", text)
-        kept = []
-        for content, sep in parts:
-            if content.strip() != "":
-                kept.append(content + sep)
-        return ("".join(kept),)
+        # 逐行切分（不用正则），保留原换行符
+        return (remove_empty_lines(text),)
 
 
 NODE_CLASS_MAPPINGS = {
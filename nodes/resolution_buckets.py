@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分辨率分桶 - 按比例和像素/token 预算计算分辨率
+
+功能：
+1. 任意比例（"16:9"、"2.39:1"、"1.5"）在像素预算内求面积最大、且对齐到指定倍数的宽高
+2. 比例误差不超过容差（默认 2%）的候选中取面积最大的；都超出时取误差最小的
+3. token 预算按 (宽 / 倍数) × (高 / 倍数) 换算为像素预算，倍数取模型的下采样倍数 × patch 大小
+4. 计算结果按参数缓存，分辨率下拉列表和节点执行共用
+
+约定：1 MP = 1024 × 1024 像素（与 SDXL 的 1024² 训练分辨率一致）
+"""
+
+import math
+from fractions import Fraction
+from functools import lru_cache
+
+MEGAPIXEL = 1024 * 1024
+# 比例误差容差，按 |ln(实际比例 / 目标比例)| 计算
+DEFAULT_MAX_RATIO_ERROR = 0.02
+
+
+def parse_ratio(text):
+    """
+    解析比例文本，返回化简后的 (宽, 高) 整数对，无法解析时抛出 ValueError
+
+    支持 "16:9"、"16x9"、"16/9"、"2.39:1"、"1.5"
+    """
+    cleaned = str(text).strip().replace("：", ":").lower()
+    for separator in ("x", "/", "×"):
+        cleaned = cleaned.replace(separator, ":")
+    parts = cleaned.split(":")
+    try:
+        if len(parts) == 1:
+            ratio = Fraction(parts[0])
+        elif len(parts) == 2:
+            ratio = Fraction(parts[0]) / Fraction(parts[1])
+        else:
+            raise ValueError
+    except (ValueError, ZeroDivisionError):
+        raise ValueError(f"无法解析比例: {text}")
+    if ratio <= 0:
+        raise ValueError(f"比例必须大于 0: {text}")
+    ratio = ratio.limit_denominator(1000)
+    if ratio.numerator == 0:
+        # 小于 1:2000 的比例化简后为 0
+        raise ValueError(f"比例过小: {text}")
+    return ratio.numerator, ratio.denominator
+
+
+@lru_cache(maxsize=1024)
+def bucket_resolution(ratio_width, ratio_height, budget_pixels, multiple=16, max_error=DEFAULT_MAX_RATIO_ERROR):
+    """
+    在 budget_pixels 内求最接近 ratio_width:ratio_height 的分辨率
+
+    参数:
+        ratio_width, ratio_height: 目标比例（整数，先用 parse_ratio 化简以提高缓存命中）
+        budget_pixels: 像素预算（宽 × 高 的上限）
+        multiple: 宽高对齐的倍数
+        max_error: 比例误差容差
+    返回:
+        (width, height)
+    异常:
+        ValueError: 预算内放不下任何对齐的宽高（例如预算小于 multiple²，或比例极端到
+        较短边的一个对齐块都放不下），不返回超出预算或偏离比例的尺寸
+    """
+    target = ratio_width / ratio_height
+    best = None
+    best_key = None
+    # 高度从小到大枚举，宽度取理想值向下/向上对齐的两个候选
+    max_height_units = int(math.sqrt(budget_pixels / target) / multiple) + 2
+    for height_units in range(1, max_height_units + 1):
+        height = height_units * multiple
+        ideal_units = height * target / multiple
+        for width_units in {max(1, math.floor(ideal_units)), max(1, math.ceil(ideal_units))}:
+            width = width_units * multiple
+            area = width * height
+            if area > budget_pixels:
+                continue
+            error = abs(math.log(width / height / target))
+            within = error <= max_error
+            # 容差内：面积优先；容差外：误差优先
+            key = (within, area, -error) if within else (within, -error, area)
+            if best_key is None or key > best_key:
+                best, best_key = (width, height), key
+    if best is None:
+        raise ValueError(
+            f"像素预算 {budget_pixels} 内放不下比例 {ratio_width}:{ratio_height}、对齐到 {multiple} 的分辨率"
+        )
+    return best
+
+
+def token_budget_pixels(tokens, multiple):
+    """token 数换算为像素预算，每个 token 覆盖 multiple × multiple 像素"""
+    return int(tokens) * multiple * multiple
+
+
+def resolve_bucket(ratio, megapixels=0.0, tokens=0, multiple=16, token_size=None):
+    """
+    按比例文本和预算计算分辨率，同时给出像素和 token 预算时取较小者
+
+    参数:
+        token_size: 一个 token 覆盖的边长（像素），默认等于 multiple
+    返回:
+        (width, height)
+    异常:
+        ValueError: 比例无法解析、没有设置预算，或预算内放不下对齐的分辨率
+    """
+    budgets = []
+    if megapixels and megapixels > 0:
+        budgets.append(int(megapixels * MEGAPIXEL))
+    if tokens and tokens > 0:
+        budgets.append(token_budget_pixels(tokens, token_size or multiple))
+    if not budgets:
+        raise ValueError("需要设置像素预算或 token 预算")
+    ratio_width, ratio_height = parse_ratio(ratio)
+    return bucket_resolution(ratio_width, ratio_height, min(budgets), multiple)
+
+
+@lru_cache(maxsize=16)
+def bucket_options(ratios, megapixel_steps, multiple=16):
+    """
+    生成 "宽x高 (比例)" 形式的分辨率选项，同一比例下去重并按面积排序
+
+    参数:
+        ratios: 比例文本元组（无法解析的比例、放不下的档位跳过）
+        megapixel_steps: 像素预算档位元组（MP）
+    """
+    options = []
+    for ratio in ratios:
+        try:
+            ratio_width, ratio_height = parse_ratio(ratio)
+        except ValueError:
+            continue
+        sizes = set()
+        for mp in megapixel_steps:
+            try:
+                sizes.add(bucket_resolution(ratio_width, ratio_height, int(mp * MEGAPIXEL), multiple))
+            except ValueError:
+                continue
+        for width, height in sorted(sizes, key=lambda size: size[0] * size[1]):
+            options.append(f"{width}x{height} ({ratio})")
+    return tuple(options)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化序列计数器 - 多进程共享的命名计数器
+
+功能：
+1. 每个名称对应一个计数文件，服务重启后继续计数
+2. 递增在操作系统文件锁内完成（Linux/macOS 使用 fcntl.flock，Windows 使用 msvcrt.locking），
+   同一台机器上的多个 ComfyUI 进程不会拿到重复的值
+3. 一次预留一段连续的值（block_size），高频调用时不必每次加锁
+4. 写入先写临时文件并 fsync，再原子替换，崩溃时文件要么是旧值要么是新值
+5. 计数范围（scope）变化或收到新的重置标记时从 0 重新开始
+
+目录：$XISHEN_SEQUENCE_DIR，否则为 ComfyUI 用户目录下的 xishen/sequences，否则为本插件的 data/sequences
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+SEQUENCE_DIR_ENV = "XISHEN_SEQUENCE_DIR"
+
+
+def default_sequence_dir():
+    configured = os.environ.get(SEQUENCE_DIR_ENV, "").strip()
+    if configured:
+        return os.path.expanduser(configured)
+    try:
+        import folder_paths
+        return os.path.join(folder_paths.get_user_directory(), "xishen", "sequences")
+    except Exception:
+        return os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "data", "sequences")
+
+
+class _FileLock:
+    """跨进程的排他文件锁"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.name == "nt":
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 重试 10 秒后仍失败会抛出异常，继续等待
+                    time.sleep(0.05)
+        else:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SequenceCounter:
+    """
+    命名的持久化计数器
+
+    take(count) 返回一段连续值的起点 start，调用方拥有 [start, start + count)。
+    block_size > 1 时每次加锁预留 block_size 个值，在本进程内分发完再加锁；
+    进程退出时未分发完的值会被跳过（计数可能有空缺，但不会重复）。
+    """
+
+    def __init__(self, name, directory=None, block_size=1):
+        self.name = name
+        self.directory = directory or default_sequence_dir()
+        self.block_size = max(1, int(block_size))
+        safe_name = re.sub(r"[^\w.-]", "_", name) or "default"
+        self.path = os.path.join(self.directory, safe_name + ".json")
+        self.lock_path = self.path + ".lock"
+        self._lock = threading.Lock()
+        # 本进程已预留但尚未分发的区间 [_block_next, _block_end)，以及预留时的范围和重置标记
+        self._block_next = 0
+        self._block_end = 0
+        self._block_key = None
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, state):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if os.name != "nt":
+            # 确保替换操作本身也落盘
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def take(self, count=1, scope=None, reset_token=None):
+        """
+        取出 count 个连续值，返回起点
+
+        参数:
+            count: 数量
+            scope: 计数范围（可 JSON 序列化），与上次不同时从 0 重新开始
+            reset_token: 重置标记，不为 None 且与上次不同时从 0 重新开始
+        """
+        count = max(1, int(count))
+        key = json.dumps([scope, reset_token], ensure_ascii=False)
+        with self._lock:
+            if key == self._block_key and self._block_end - self._block_next >= count:
+                start = self._block_next
+                self._block_next += count
+                return start
+
+            os.makedirs(self.directory, exist_ok=True)
+            with _FileLock(self.lock_path):
+                state = self._read()
+                next_value = int(state.get("next", 0))
+                if state.get("scope") != scope:
+                    next_value = 0
+                if reset_token is not None and state.get("reset_token") != reset_token:
+                    next_value = 0
+                reserve = max(count, self.block_size)
+                self._write({
+                    "next": next_value + reserve,
+                    "scope": scope,
+                    "reset_token": reset_token if reset_token is not None else state.get("reset_token"),
+                    "updated_at": time.time(),
+                })
+
+            self._block_key = key
+            self._block_next = next_value + count
+            self._block_end = next_value + reserve
+            return next_value
+
+    def reset(self):
+        """从 0 重新开始计数"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with _FileLock(self.lock_path):
+                state = self._read()
+                state["next"] = 0
+                state["updated_at"] = time.time()
+                self._write(state)
+            self._block_key = None
+            self._block_next = self._block_end = 0
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def get_sequence_counter(name, block_size=1):
+    """同名计数器在进程内共用一个实例"""
+    with _counters_lock:
+        counter = _counters.get(name)
+        if counter is None or counter.block_size != max(1, int(block_size)):
+            counter = _counters[name] = SequenceCounter(name, block_size=block_size)
+        return counter
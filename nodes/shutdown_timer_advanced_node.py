@@ -1,14 +1,10 @@
-import os
-import subprocess
 import platform
-import time
-import threading
 from datetime import datetime, timedelta
 
+from .timer_scheduler import run_command, timer_scheduler
+
 class XishenShutdownTimerAdvancedNode:
-    # 类变量用于存储活动计时器
-    active_timers = {}
-    timer_lock = threading.Lock()
+    # 计时器统一由 timer_scheduler 的单个调度线程管理，可随时取消
 
     @classmethod
     def INPUT_TYPES(s):
@@ -90,50 +86,28 @@ class XishenShutdownTimerAdvancedNode:
             except ValueError:
                 raise ValueError("目标时间格式错误，请使用HH:MM格式")
 
-    def timer_thread(self, timer_id, action, wait_time, cmd):
-        """计时器线程函数"""
-        try:
-            # 直接执行系统命令，不使用Python的time.sleep
-            with self.timer_lock:
-                if timer_id in self.active_timers:
-                    del self.active_timers[timer_id]
-                    subprocess.run(cmd, shell=True, check=True)
-        except Exception as e:
-            print(f"计时器线程错误: {str(e)}")
-            with self.timer_lock:
-                if timer_id in self.active_timers:
-                    del self.active_timers[timer_id]
+    def run_timer_action(self, action, cmd):
+        """到期时在调度线程中执行（不持有任何锁）"""
+        print(f"⏰ 定时任务到期，执行 {action} 操作")
+        run_command(cmd, check=True)
 
     def check_and_control(self, input_value, batch_number, action, time_type, countdown_seconds, target_time, enable_timer, cancel_timer):
         # 检查取消计时器选项
         if cancel_timer:
+            # 先取消调度器中的计时器，到期前取消的任务不会再执行
+            active_count = timer_scheduler.cancel_all()
+
             # 取消系统级别的定时任务
             system = platform.system()
             try:
                 if system == "Windows":
                     # Windows取消定时关机/重启命令
-                    subprocess.run(["shutdown", "/a"], shell=True, check=False)
+                    run_command(["shutdown", "/a"], check=False)
                 elif system in ["Darwin", "Linux"]:
                     # macOS/Linux取消定时关机/重启命令
-                    subprocess.run(["sudo", "shutdown", "-c"], shell=True, check=False)
+                    run_command(["sudo", "shutdown", "-c"], check=False)
             except Exception as e:
                 print(f"取消系统任务时出错: {str(e)}")
-                
-            # 清除并停止Python层面的计时器
-            with self.timer_lock:
-                active_count = len(self.active_timers)
-                # 遍历所有活动计时器
-                for timer_id, timer_info in list(self.active_timers.items()):
-                    # 尝试停止线程（如果有线程对象）
-                    if "thread" in timer_info:
-                        try:
-                            # 注意：Python没有直接的线程停止方法，这里只是标记为取消
-                            # 在线程函数中会检查timer_id是否仍然存在于active_timers中
-                            print(f"取消计时器 {timer_id}")
-                        except Exception as e:
-                            print(f"停止计时器 {timer_id} 时出错: {str(e)}")
-                # 清除所有计时器记录
-                self.active_timers.clear()
             return (f"✅ 已取消所有 {active_count} 个活动计时器和系统级定时任务", "无活动计时器")
 
         # 检查是否启用计时器
@@ -160,48 +134,23 @@ class XishenShutdownTimerAdvancedNode:
             # 计算执行时间
             action_time = datetime.now() + timedelta(seconds=wait_time)
             
-            # 生成计时器ID
-            timer_id = threading.get_ident()
-
             # 取消现有计时器
-            with self.timer_lock:
-                self.active_timers.clear()
-                
-                # 对于需要延迟的操作，直接执行系统命令（系统会处理延迟）
-                # 对于没有延迟参数的操作（睡眠/休眠），如果需要延迟，使用Python的time.sleep
-                if wait_time == 0:
-                    subprocess.run(cmd, shell=True, check=True)
-                    return (f"✅ 已立即执行 {action} 操作", "无活动计时器")
-                else:
-                    # 检查操作类型是否支持系统级延迟
-                    if system in ["Windows"] and action in ["shutdown", "restart"]:
-                        # Windows的关机/重启支持系统级延迟，直接执行命令
-                        subprocess.run(cmd, shell=True, check=False)
-                    elif system in ["Darwin", "Linux"] and action in ["shutdown", "restart"]:
-                        # macOS/Linux的关机/重启支持系统级延迟，直接执行命令
-                        subprocess.run(cmd, shell=True, check=False)
-                    else:
-                        # 对于睡眠/休眠等不支持系统级延迟的操作，使用Python的time.sleep
-                        def delayed_action():
-                            time.sleep(wait_time)
-                            with self.timer_lock:
-                                if timer_id in self.active_timers:
-                                    del self.active_timers[timer_id]
-                                    subprocess.run(cmd, shell=True, check=True)
-                        
-                        timer_thread = threading.Thread(
-                            target=delayed_action,
-                            daemon=True
-                        )
-                        timer_thread.start()
-                    
-                    # 保存计时器信息
-                    self.active_timers[timer_id] = {
-                        "action": action,
-                        "wait_time": wait_time,
-                        "action_time": action_time,
-                        "thread": timer_thread if 'timer_thread' in locals() else None
-                    }
+            timer_scheduler.cancel_all()
+
+            # 对于需要延迟的操作，直接执行系统命令（系统会处理延迟）
+            # 对于没有延迟参数的操作（睡眠/休眠），由调度线程在到期时执行
+            if wait_time == 0:
+                run_command(cmd, check=True)
+                return (f"✅ 已立即执行 {action} 操作", "无活动计时器")
+            if system in ["Windows", "Darwin", "Linux"] and action in ["shutdown", "restart"]:
+                # 关机/重启支持系统级延迟，直接执行命令
+                run_command(cmd, check=False)
+            else:
+                timer_scheduler.schedule(
+                    wait_time,
+                    lambda: self.run_timer_action(action, cmd),
+                    {"action": action, "action_time": action_time},
+                )
             
             # 准备返回信息
             if time_type == "countdown":
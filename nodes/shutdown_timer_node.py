@@ -1,7 +1,8 @@
-import os
 import subprocess
 import platform
 
+from .timer_scheduler import run_command
+
 class XishenShutdownTimerNode:
     @classmethod
     def INPUT_TYPES(s):
@@ -27,18 +28,18 @@ class XishenShutdownTimerNode:
                 if platform.system() == "Windows":
                     # Windows系统使用shutdown命令
                     # /s 表示关机，/t 表示延迟时间（秒）
-                    cmd = f"shutdown /s /t {shutdown_delay}"
-                    subprocess.run(cmd, shell=True, check=True)
+                    cmd = ["shutdown", "/s", "/t", str(shutdown_delay)]
+                    run_command(cmd, check=True)
                     status = f"✅ 定时关机任务已设置，将在 {shutdown_delay} 秒后关机"
                 elif platform.system() == "Darwin":
                     # macOS系统使用shutdown命令
-                    cmd = f"shutdown -h +{shutdown_delay // 60}"
-                    subprocess.run(cmd, shell=True, check=True)
+                    cmd = ["shutdown", "-h", f"+{shutdown_delay // 60}"]
+                    run_command(cmd, check=True)
                     status = f"✅ 定时关机任务已设置，将在 {shutdown_delay} 秒后关机"
                 elif platform.system() == "Linux":
                     # Linux系统使用shutdown命令
-                    cmd = f"shutdown -h +{shutdown_delay // 60}"
-                    subprocess.run(cmd, shell=True, check=True)
+                    cmd = ["shutdown", "-h", f"+{shutdown_delay // 60}"]
+                    run_command(cmd, check=True)
                     status = f"✅ 定时关机任务已设置，将在 {shutdown_delay} 秒后关机"
                 else:
                     status = f"❌ 不支持的操作系统: {platform.system()}"
@@ -9,14 +9,121 @@
 3. 处理复杂嵌套文本结构，确保正确显示
 4. 支持文本内容的格式化和清理
 5. 更新工作流中的文本显示组件
+6. 分页模式：超过一页（DISPLAY_PAGE_SIZE 条）时，完整结果保存在服务端有上限的缓存中，
+   界面只接收当前页和总数，工作流元数据中只保存有上限的摘要，其余页面通过接口按需获取
 
 特点：
 - 自动处理换行符，将多行文本转换为嵌套数组结构
 - 过滤空行，保持显示内容的整洁
 - 支持列表输入和复杂数据结构
 - 与ComfyUI前端ShowText组件完美兼容
+
+接口：
+- GET /xishen/display/page?id=结果ID&page=页码
 """
 
+import threading
+import uuid
+from collections import OrderedDict
+
+import server
+from aiohttp import web
+
+from .workflow_index import get_workflow_index
+
+# 超过该条数时自动分页显示
+DISPLAY_PAGE_SIZE = 100
+# 分页结果缓存上限：条目数和总字符数，超出时淘汰最早的结果
+DISPLAY_STORE_MAX_ENTRIES = 32
+DISPLAY_STORE_MAX_CHARS = 32 * 1024 * 1024
+# 写入工作流元数据（PNG）的摘要上限
+SUMMARY_MAX_ROWS = 20
+SUMMARY_MAX_CHARS = 8 * 1024
+
+
+class DisplayPageStore:
+    """
+    分页展示结果的有界缓存（线程安全）
+
+    每个节点只保留最新一次的结果；按条目数和总字符数淘汰最早的结果。
+    """
+
+    def __init__(self, max_entries=DISPLAY_STORE_MAX_ENTRIES, max_chars=DISPLAY_STORE_MAX_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        # 结果ID -> (节点ID, 行列表, 每页条数, 字符数)
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._chars = 0
+
+    def put(self, node_id, rows, page_size):
+        display_id = uuid.uuid4().hex
+        size = sum(len(row[0]) if row and isinstance(row[0], str) else 0 for row in rows)
+        with self._lock:
+            previous = self._latest.get(node_id)
+            if previous is not None:
+                self._remove_locked(previous)
+            self._entries[display_id] = (node_id, rows, page_size, size)
+            self._latest[node_id] = display_id
+            self._chars += size
+            # 至少保留刚放入的结果
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._chars > self.max_chars):
+                self._remove_locked(next(iter(self._entries)))
+        return display_id
+
+    def _remove_locked(self, display_id):
+        entry = self._entries.pop(display_id, None)
+        if entry is None:
+            return
+        self._chars -= entry[3]
+        if self._latest.get(entry[0]) == display_id:
+            del self._latest[entry[0]]
+
+    def page(self, display_id, page):
+        """返回第 page 页（从 0 开始）的信息，结果已被淘汰时返回 None"""
+        with self._lock:
+            entry = self._entries.get(display_id)
+        if entry is None:
+            return None
+        _, rows, page_size, _ = entry
+        return _page_info(display_id, rows, page, page_size)
+
+
+def _page_info(display_id, rows, page, page_size):
+    total = len(rows)
+    pages = max(1, -(-total // page_size))
+    page = max(0, min(page, pages - 1))
+    start = page * page_size
+    return {
+        "id": display_id,
+        "page": page,
+        "pages": pages,
+        "page_size": page_size,
+        "total": total,
+        "text": rows[start:start + page_size],
+    }
+
+
+def _summary(rows):
+    """写入工作流元数据的摘要：最多 SUMMARY_MAX_ROWS 行、SUMMARY_MAX_CHARS 个字符"""
+    summary = []
+    remaining = SUMMARY_MAX_CHARS
+    for row in rows[:SUMMARY_MAX_ROWS]:
+        text = row[0] if row and isinstance(row[0], str) else str(row)
+        if remaining <= 0:
+            break
+        if len(text) > remaining:
+            text = text[:remaining] + "…"
+        remaining -= len(text)
+        summary.append([text])
+    if len(summary) < len(rows):
+        summary.append([f"…… 共 {len(rows)} 条，仅保存前 {len(summary)} 条"])
+    return summary
+
+
+display_store = DisplayPageStore()
+
 class XishenSmartDisplayNode:
     @classmethod
     def INPUT_TYPES(s):
@@ -70,6 +177,16 @@ class XishenSmartDisplayNode:
             else:
                 processed_text.append([text])
         
+        # 超过一页时分页：界面只接收第一页，元数据只保存摘要
+        ui = {"text": processed_text}
+        widgets_text = processed_text
+        if len(processed_text) > DISPLAY_PAGE_SIZE:
+            node_id = str(unique_id[0]) if unique_id else ""
+            display_id = display_store.put(node_id, processed_text, DISPLAY_PAGE_SIZE)
+            first_page = _page_info(display_id, processed_text, 0, DISPLAY_PAGE_SIZE)
+            ui = {"text": first_page.pop("text"), "page": [first_page]}
+            widgets_text = _summary(processed_text)
+
         # 更新workflow中的widgets_values
         if unique_id is not None and extra_pnginfo is not None:
             if not isinstance(extra_pnginfo, list):
@@ -80,15 +197,39 @@ class XishenSmartDisplayNode:
             ):
                 print("Error: extra_pnginfo[0] is not a dict or missing 'workflow' key")
             else:
+                # 使用共享索引查找当前节点，同一次执行只构建一次
                 workflow = extra_pnginfo[0]["workflow"]
-                node = next(
-                    (x for x in workflow["nodes"] if str(x["id"]) == str(unique_id[0])),
-                    None,
-                )
+                node = get_workflow_index(workflow).node(unique_id[0])
                 if node:
-                    node["widgets_values"] = [processed_text]
+                    node["widgets_values"] = [widgets_text]
+
+        return {"ui": ui, "result": (processed_text,)}
+
+
+def add_routes(routes):
+    """
+    Add API routes for paged display results.
+    """
+
+    @routes.get('/xishen/display/page')
+    async def display_page(request):
+        try:
+            page = int(request.query.get("page", 0))
+        except ValueError:
+            page = 0
+        info = display_store.page(request.query.get("id", ""), page)
+        if info is None:
+            return web.json_response({"status": "error", "message": "Display result expired"}, status=404)
+        return web.json_response(info)
+
 
-        return {"ui": {"text": processed_text}, "result": (processed_text,)}
+# Register routes with the server
+try:
+    prompt_server = server.PromptServer.instance
+    if prompt_server is not None:
+        add_routes(prompt_server.routes)
+except Exception as e:
+    print(f"Warning: Could not register display routes: {e}")
 
 # 注册节点
 NODE_CLASS_MAPPINGS = {
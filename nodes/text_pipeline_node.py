@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本流水线节点 - 一次遍历完成多种按行清理
+
+功能：
+1. 按 \\r\\n、\\n、\\r 切分行（str.split 实现，不使用正则，不会回溯）
+2. 每行依次经过：去首尾空白 → 截断到最大长度 → 去空行 → 去重，各步骤可单独开关
+3. 去重使用哈希集合，跨所有输入文本生效，保留第一次出现的行
+4. 换行符可统一为 \\n、\\r\\n，或改为逗号、空格连接；也可保留原换行符
+5. 接收文本列表（INPUT_IS_LIST），所有文本在同一次遍历中处理，输出合并文本、行列表和行数
+"""
+
+# 输出分隔符选项 -> 分隔符（None 表示保留原换行符）
+SEPARATORS = {
+    "保持原样": None,
+    "\\n": "\n",
+    "\\r\\n": "\r\n",
+    "逗号": ", ",
+    "空格": " ",
+}
+
+DEDUPE_MODES = ["关闭", "区分大小写", "忽略大小写"]
+
+
+def iter_lines(text):
+    """
+    按 \\r\\n、\\n、\\r 切分，产出 (行内容, 换行符)；最后一行没有换行符时换行符为空字符串
+    """
+    pieces = text.split("\n")
+    last = len(pieces) - 1
+    for i, piece in enumerate(pieces):
+        newline = "\n" if i < last else ""
+        if newline and piece.endswith("\r"):
+            piece = piece[:-1]
+            newline = "\r\n"
+        if "\r" in piece:
+            parts = piece.split("\r")
+            for part in parts[:-1]:
+                yield part, "\r"
+            piece = parts[-1]
+        if piece or newline:
+            yield piece, newline
+
+
+def clean_lines(texts, strip=True, drop_empty=True, dedupe="关闭", max_length=0):
+    """
+    对多个文本执行按行清理，产出 (行内容, 原换行符)
+
+    参数:
+        texts: 文本可迭代对象
+        strip: 去掉每行首尾空白
+        drop_empty: 去掉空行（未开启 strip 时，只含空白的行也算空行）
+        dedupe: DEDUPE_MODES 之一
+        max_length: 每行最大字符数，0 表示不限
+    """
+    seen = set()
+    ignore_case = dedupe == "忽略大小写"
+    use_dedupe = dedupe != "关闭"
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        for line, newline in iter_lines(text):
+            if strip:
+                line = line.strip()
+            if max_length > 0 and len(line) > max_length:
+                line = line[:max_length]
+            if drop_empty and (not line if strip else not line.strip()):
+                continue
+            if use_dedupe:
+                key = line.casefold() if ignore_case else line
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield line, newline
+
+
+def remove_empty_lines(text):
+    """去掉只含空白的行，其余行和各自的原换行符保持不变（去空行节点使用）"""
+    kept = []
+    for content, newline in iter_lines(text):
+        if content.strip() != "":
+            kept.append(content + newline)
+    return "".join(kept)
+
+
+def run_pipeline(texts, strip=True, drop_empty=True, dedupe="关闭", max_length=0, separator="\\n"):
+    """
+    执行流水线，返回 (合并后的文本, 行列表)
+
+    保留原换行符时，没有换行符的行（各文本的最后一行）与下一行之间补 \\n
+    """
+    joiner = SEPARATORS.get(separator, "\n")
+    lines = []
+    if joiner is not None:
+        for line, _ in clean_lines(texts, strip, drop_empty, dedupe, max_length):
+            lines.append(line)
+        return joiner.join(lines), lines
+
+    parts = []
+    last_newline = ""
+    for line, newline in clean_lines(texts, strip, drop_empty, dedupe, max_length):
+        lines.append(line)
+        parts.append(line)
+        parts.append(newline or "\n")
+        last_newline = newline
+    if parts and not last_newline:
+        # 最后一行原本没有换行符
+        parts.pop()
+    return "".join(parts), lines
+
+
+def _first(value, default=None):
+    """INPUT_IS_LIST 节点的控件参数以单元素列表传入"""
+    if isinstance(value, list):
+        return value[0] if value else default
+    return value
+
+
+class XishenTextPipelineNode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "text": ("STRING", {"default": "", "multiline": True}),
+                "strip": ("BOOLEAN", {"default": True}),
+                "drop_empty": ("BOOLEAN", {"default": True}),
+                "dedupe": (DEDUPE_MODES, {"default": "关闭"}),
+                "max_length": ("INT", {"default": 0, "min": 0, "max": 1000000}),
+                "separator": (list(SEPARATORS.keys()), {"default": "\\n"}),
+            }
+        }
+
+    INPUT_IS_LIST = True
+    RETURN_TYPES = ("STRING", "STRING", "INT")
+    RETURN_NAMES = ("text", "lines", "count")
+    OUTPUT_IS_LIST = (False, True, False)
+    FUNCTION = "process"
+    CATEGORY = "🍡Comfyui-xishen"
+
+    def process(self, text, strip, drop_empty, dedupe, max_length, separator):
+        texts = text if isinstance(text, list) else [text]
+        merged, lines = run_pipeline(
+            texts,
+            strip=bool(_first(strip, True)),
+            drop_empty=bool(_first(drop_empty, True)),
+            dedupe=_first(dedupe, "关闭"),
+            max_length=int(_first(max_length, 0)),
+            separator=_first(separator, "\\n"),
+        )
+        return (merged, lines, len(lines))
+
+
+NODE_CLASS_MAPPINGS = {
+    "XishenTextPipelineNode": XishenTextPipelineNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "XishenTextPipelineNode": "文本流水线-xishen",
+}
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主题提示词库索引 - 共享解析结果
+
+功能：
+1. 解析 xishen_theme_prompts.json 一次，供主题提示词节点、模板节点等共享
+2. 预先计算一级分类列表、全部二级分类（去重并保持顺序）、扁平化的全部条目
+3. 每个一级分类的条目保存为元组，随机抽取时无需再构建列表
+4. 按文件修改时间和大小判断是否需要重新解析
+"""
+
+import json
+import os
+import threading
+
+THEME_JSON_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "web", "extensions", "xishen_theme_prompts.json")
+
+
+class ThemeIndex:
+    """主题提示词库解析后的只读索引"""
+
+    def __init__(self, data):
+        self.data = data
+        self.primary_categories = tuple(data.keys())
+        # 每个一级分类下的条目
+        self.pools = {primary: tuple(items) for primary, items in data.items()}
+        # 所有条目按文件顺序扁平化，"全部随机" 直接从这里抽取
+        self.all_items = tuple(item for items in self.pools.values() for item in items)
+        # 所有二级分类去重，保持首次出现的顺序
+        self.all_secondary_categories = tuple(dict.fromkeys(self.all_items))
+
+    def pool(self, primary):
+        return self.pools.get(primary, ())
+
+
+_lock = threading.Lock()
+_cache = {"signature": None, "index": ThemeIndex({})}
+
+
+def theme_signature(path=THEME_JSON_PATH):
+    """主题提示词库文件的 (路径, 修改时间, 大小)，文件无法读取时返回 None；索引按它判断是否重新加载"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def get_theme_index(path=THEME_JSON_PATH):
+    """获取主题提示词库索引，文件未变化时直接返回缓存"""
+    signature = theme_signature(path)
+    if signature is None:
+        print(f"❌ 加载分类数据失败: 无法读取 {path}")
+        return ThemeIndex({})
+
+    with _lock:
+        if _cache["signature"] != signature:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                _cache["index"] = ThemeIndex(data if isinstance(data, dict) else {})
+            except Exception as e:
+                print(f"❌ 加载分类数据失败: {e}")
+                _cache["index"] = ThemeIndex({})
+            _cache["signature"] = signature
+        return _cache["index"]
@@ -1,35 +1,23 @@
 import random
-import os
-import json
+
+from .theme_library import get_theme_index, theme_signature
 
 class XishenThemePromptNode:
     @classmethod
     def INPUT_TYPES(s):
-        # 在Python端直接加载JSON文件，提供完整的选项列表以解决验证错误
-        current_dir = os.path.dirname(os.path.realpath(__file__))
-        json_path = os.path.join(current_dir, "..", "web", "extensions", "xishen_theme_prompts.json")
-        
+        # 在Python端直接使用共享的主题索引，提供完整的选项列表以解决验证错误
         primary_categories = ["Loading..."]
         secondary_categories = ["Please select main..."]
-        
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            if data:
-                primary_categories = list(data.keys())
-                # 返回所有二级分类的并集，确保任何选择都能通过验证
-                all_secondary_categories = []
-                for categories in data.values():
-                    all_secondary_categories.extend(categories)
-                # 去重
-                secondary_categories = list(set(all_secondary_categories))
-                # 如果没有二级分类，使用默认值
-                if not secondary_categories:
-                    secondary_categories = ["None"]
-        except Exception as e:
-            print(f"❌ 加载分类数据失败: {e}")
-        
+
+        index = get_theme_index()
+        if index.primary_categories:
+            primary_categories = list(index.primary_categories)
+            # 返回所有二级分类的并集，确保任何选择都能通过验证
+            secondary_categories = list(index.all_secondary_categories)
+            # 如果没有二级分类，使用默认值
+            if not secondary_categories:
+                secondary_categories = ["None"]
+
         return {
             "required": {
                 "primary_category": (primary_categories,),
@@ -44,32 +32,32 @@ class XishenThemePromptNode:
     FUNCTION = "get_category_name"
     CATEGORY = "🍡Comfyui-xishen"
 
+    @classmethod
+    def IS_CHANGED(s, control_option="设置生效", **kwargs):
+        # 随机模式的结果取决于主题库文件内容：文件修改后签名变化，ComfyUI 不再使用缓存的输出
+        if control_option == "设置生效":
+            return ""
+        return str(theme_signature())
+
     def get_category_name(self, primary_category, secondary_category, control_option, seed):
-        # 注意：这里我们再次读取文件，或者你可以将数据缓存到全局
-        # 为了演示简单，这里假设数据通过前端传递，
-        # 但为了安全和"随机"逻辑，最好还是后端再读一次
-        current_dir = os.path.dirname(os.path.realpath(__file__))
-        json_path = os.path.join(current_dir, "..", "web", "extensions", "xishen_theme_prompts.json")
-        data = {}
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            print(f"❌ 加载分类数据失败: {e}")
-            return ("")
+        # 使用共享的主题索引（文件变化时自动重新加载），随机数使用独立的生成器，
+        # 相同输入得到相同输出，不会影响全局 random 模块
+        index = get_theme_index()
+        rng = random.Random(seed)
 
         result = ""
 
         if control_option == "全部随机":
-            all_items = [item for sublist in data.values() for item in sublist]
-            result = random.choice(all_items) if all_items else ""
-            
+            all_items = index.all_items
+            result = all_items[rng.randrange(len(all_items))] if all_items else ""
+
         elif control_option == "选项随机":
-            if primary_category in data:
-                result = random.choice(data[primary_category])
+            pool = index.pool(primary_category)
+            if pool:
+                result = pool[rng.randrange(len(pool))]
             else:
                 result = "Category Error"
-                
+
         else: # 设置生效
             # 如果是固定模式，直接输出前端传来的 secondary_category
             result = secondary_category
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定时任务调度器 - 定时关机节点共用
+
+功能：
+1. 整个进程只有一个调度线程，按截止时间维护最小堆，没有任务时不占用线程
+2. 每个定时任务都可以真正取消：取消后从表中移除，到期时直接跳过
+3. 到期的回调在锁外执行，执行系统命令时不会阻塞其他节点
+4. 系统命令通过可替换的命令后端执行：默认直接调用（不经过 shell），
+   设置 $XISHEN_TIMER_DRY_RUN=1 或调用 set_command_backend(DryRunBackend()) 后只记录不执行，便于测试
+"""
+
+import heapq
+import itertools
+import os
+import subprocess
+import threading
+import time
+
+TIMER_DRY_RUN_ENV = "XISHEN_TIMER_DRY_RUN"
+
+
+class SubprocessBackend:
+    """直接执行命令（参数列表，不经过 shell）"""
+
+    def run(self, cmd, check=True):
+        return subprocess.run(cmd, check=check)
+
+
+class DryRunBackend:
+    """只记录命令，不执行"""
+
+    def __init__(self):
+        self.commands = []
+
+    def run(self, cmd, check=True):
+        self.commands.append(list(cmd))
+        print(f"[dry-run] {' '.join(cmd)}")
+        return subprocess.CompletedProcess(cmd, 0)
+
+
+_backend = DryRunBackend() if os.environ.get(TIMER_DRY_RUN_ENV, "").strip() in ("1", "true", "yes") else SubprocessBackend()
+
+
+def get_command_backend():
+    return _backend
+
+
+def set_command_backend(backend):
+    """替换命令后端，返回原来的后端"""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+def run_command(cmd, check=True):
+    """通过当前后端执行系统命令"""
+    return _backend.run(cmd, check=check)
+
+
+class TimerScheduler:
+    """
+    单线程定时调度器
+
+    schedule() 返回任务ID；cancel() / cancel_all() 取消后任务不会再执行。
+    堆中被取消的条目不立即删除，到期弹出时发现已不在任务表中就跳过。
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._heap = []
+        self._timers = {}
+        self._ids = itertools.count(1)
+        self._thread = None
+
+    def schedule(self, delay, callback, info=None):
+        """
+        delay 秒后在调度线程中调用 callback()
+
+        参数:
+            info: 任务说明（字典），active() 中原样返回
+        """
+        deadline = time.monotonic() + max(0.0, delay)
+        with self._condition:
+            timer_id = next(self._ids)
+            self._timers[timer_id] = (callback, dict(info or {}))
+            heapq.heappush(self._heap, (deadline, timer_id))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="xishen-timer", daemon=True)
+                self._thread.start()
+            # 新任务可能比当前等待的更早到期
+            self._condition.notify()
+        return timer_id
+
+    def cancel(self, timer_id):
+        """取消任务，返回是否找到"""
+        with self._condition:
+            found = self._timers.pop(timer_id, None) is not None
+            self._condition.notify()
+        return found
+
+    def cancel_all(self):
+        """取消全部任务，返回取消的数量"""
+        with self._condition:
+            count = len(self._timers)
+            self._timers.clear()
+            self._heap.clear()
+            self._condition.notify()
+        return count
+
+    def active(self):
+        """返回 [(任务ID, 剩余秒数, 任务说明)]，按到期时间排序"""
+        now = time.monotonic()
+        with self._condition:
+            return [
+                (timer_id, max(0.0, deadline - now), self._timers[timer_id][1])
+                for deadline, timer_id in sorted(self._heap)
+                if timer_id in self._timers
+            ]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    # 丢弃已取消的堆顶
+                    while self._heap and self._heap[0][1] not in self._timers:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        # 空闲一段时间后退出线程，下次 schedule 时再启动
+                        if not self._condition.wait(timeout=60) and not self._heap:
+                            self._thread = None
+                            return
+                        continue
+                    deadline, timer_id = self._heap[0]
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        heapq.heappop(self._heap)
+                        callback, info = self._timers.pop(timer_id)
+                        break
+                    self._condition.wait(timeout=remaining)
+
+            # 在锁外执行，回调中执行命令不会阻塞 schedule/cancel
+            try:
+                callback()
+            except Exception as e:
+                print(f"定时任务 {timer_id} 执行失败: {e}")
+
+
+timer_scheduler = TimerScheduler()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务领取节点 - 多个 ComfyUI 实例共享的种子/提示词遍历队列
+
+功能：
+1. 队列保存在本机的 SQLite 文件中，同一台机器上的多个 ComfyUI 实例共享
+2. 每次执行原子地领取下一个未处理的 (种子, 提示词序号)，不会重复渲染
+3. 领取带租约，超时未完成的任务（实例崩溃、被中断）会被其他实例重新领取
+4. 任务按序号惰性生成，数据库只保存已领取的任务，种子范围很大时也不占空间
+5. 完成节点接在生成结果之后，标记任务完成；任务ID带领取次数，只有仍持有租约的实例才能标记完成，
+   租约过期后被其他实例重新领取的任务不会被原实例误标记
+
+使用方法：
+- 任务领取-xishen 输出种子、提示词和任务ID，种子接入 KSampler，提示词接入文本编码
+- 任务完成-xishen 的 images 接生成的图像，task_id 接领取节点的任务ID
+- 每个实例使用相同的队列名称和参数，分别排队运行即可
+
+数据库：$XISHEN_WORK_QUEUE_DB，否则为 ComfyUI 用户目录下的 xishen/work_queue.sqlite3
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+WORK_QUEUE_DB_ENV = "XISHEN_WORK_QUEUE_DB"
+
+
+def default_work_queue_path():
+    configured = os.environ.get(WORK_QUEUE_DB_ENV, "").strip()
+    if configured:
+        return os.path.expanduser(configured)
+    try:
+        import folder_paths
+        return os.path.join(folder_paths.get_user_directory(), "xishen", "work_queue.sqlite3")
+    except Exception:
+        return os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "data", "work_queue.sqlite3")
+
+
+def default_worker_id():
+    """主机名 + 进程号，区分同一台机器上的不同实例"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    SQLite 任务队列
+
+    任务序号 i 对应 seed = seed_start + i // prompt_count，prompt_index = i % prompt_count。
+    queues 表记录下一个从未领取过的序号；tasks 表只保存已领取（进行中或已完成）的任务。
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if self.path is None:
+            self.path = default_work_queue_path()
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 手动管理事务，领取时使用 BEGIN IMMEDIATE 获取写锁
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            self._initialize(connection)
+        return connection
+
+    def _initialize(self, connection):
+        # 多个实例同时首次打开新数据库时，切换 WAL 可能直接返回 "database is locked"（不走忙等待），重试即可
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                break
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS queues ("
+            "name TEXT PRIMARY KEY, seed_start INTEGER NOT NULL, seed_count INTEGER NOT NULL, "
+            "prompt_count INTEGER NOT NULL, next_index INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "queue TEXT NOT NULL, task_index INTEGER NOT NULL, status TEXT NOT NULL, worker TEXT, "
+            "lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 1, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (queue, task_index))"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS tasks_lease ON tasks (queue, status, lease_expires)")
+        self._initialized = True
+
+    def claim(self, name, seed_start, seed_count, prompt_count, worker, lease_seconds):
+        """
+        领取下一个任务
+
+        优先重新领取租约已过期的任务，其次领取从未领取过的任务。
+        返回 (task_index, seed, prompt_index, attempt)，attempt 为该任务的第几次领取，全部领取完时返回 None。
+        参数与已有同名队列不一致时抛出 ValueError。
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    row = connection.execute(
+                        "SELECT seed_start, seed_count, prompt_count, next_index FROM queues WHERE name = ?", (name,)
+                    ).fetchone()
+                    if row is None:
+                        connection.execute(
+                            "INSERT INTO queues (name, seed_start, seed_count, prompt_count, next_index, created_at) "
+                            "VALUES (?, ?, ?, ?, 0, ?)",
+                            (name, seed_start, seed_count, prompt_count, now),
+                        )
+                        next_index = 0
+                    elif tuple(row[:3]) != (seed_start, seed_count, prompt_count):
+                        raise ValueError(
+                            f"队列 {name} 已存在且参数不同（起始种子 {row[0]}，种子数量 {row[1]}，提示词数量 {row[2]}），"
+                            f"请使用新的队列名称"
+                        )
+                    else:
+                        next_index = row[3]
+
+                    expired = connection.execute(
+                        "SELECT task_index, attempts FROM tasks WHERE queue = ? AND status = 'leased' AND lease_expires < ? "
+                        "ORDER BY task_index LIMIT 1",
+                        (name, now),
+                    ).fetchone()
+                    if expired is not None:
+                        task_index, attempt = expired[0], expired[1] + 1
+                        connection.execute(
+                            "UPDATE tasks SET worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                            "WHERE queue = ? AND task_index = ?",
+                            (worker, now + lease_seconds, now, name, task_index),
+                        )
+                    elif next_index < seed_count * prompt_count:
+                        task_index, attempt = next_index, 1
+                        connection.execute("UPDATE queues SET next_index = ? WHERE name = ?", (next_index + 1, name))
+                        connection.execute(
+                            "INSERT INTO tasks (queue, task_index, status, worker, lease_expires, updated_at) "
+                            "VALUES (?, ?, 'leased', ?, ?, ?)",
+                            (name, task_index, worker, now + lease_seconds, now),
+                        )
+                    else:
+                        task_index = None
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+            finally:
+                connection.close()
+
+        if task_index is None:
+            return None
+        return task_index, seed_start + task_index // prompt_count, task_index % prompt_count, attempt
+
+    def complete(self, name, task_index, worker, attempt):
+        """
+        标记任务完成，只有领取该任务的 worker 在同一次领取（attempt）中才能完成
+
+        返回 "completed"（已完成）、"lost"（租约已被其他实例重新领取，或任务已由其他领取完成）、
+        "not_found"（任务不存在）
+        """
+        with self._lock:
+            connection = self._connect()
+            try:
+                cursor = connection.execute(
+                    "UPDATE tasks SET status = 'done', lease_expires = NULL, updated_at = ? "
+                    "WHERE queue = ? AND task_index = ? AND worker = ? AND attempts = ? AND status = 'leased'",
+                    (time.time(), name, task_index, worker, attempt),
+                )
+                if cursor.rowcount > 0:
+                    return "completed"
+                row = connection.execute(
+                    "SELECT status, worker, attempts FROM tasks WHERE queue = ? AND task_index = ?", (name, task_index)
+                ).fetchone()
+            finally:
+                connection.close()
+        if row is None:
+            return "not_found"
+        if row == ("done", worker, attempt):
+            # 同一次领取重复标记
+            return "completed"
+        return "lost"
+
+    def stats(self, name):
+        """返回 {"total", "done", "leased", "unclaimed"}，队列不存在时返回 None"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT seed_count * prompt_count, next_index FROM queues WHERE name = ?", (name,)
+                ).fetchone()
+                if row is None:
+                    return None
+                counts = dict(connection.execute(
+                    "SELECT status, COUNT(*) FROM tasks WHERE queue = ? GROUP BY status", (name,)
+                ).fetchall())
+            finally:
+                connection.close()
+        return {
+            "total": row[0],
+            "done": counts.get("done", 0),
+            "leased": counts.get("leased", 0),
+            "unclaimed": row[0] - row[1],
+        }
+
+
+work_queue = WorkQueue()
+
+
+def _task_id(queue_name, task_index, attempt):
+    return f"{queue_name}#{task_index}:{attempt}"
+
+
+def _parse_task_id(task_id):
+    """返回 (队列名称, 任务序号, 领取次数)，格式不对时抛出 ValueError"""
+    queue_name, separator, rest = task_id.rpartition("#")
+    task_index, _, attempt = rest.partition(":")
+    if not separator:
+        raise ValueError(task_id)
+    return queue_name, int(task_index), int(attempt)
+
+
+class XishenWorkClaimNode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "queue_name": ("STRING", {"default": "sweep"}),
+                "seed_start": ("INT", {"default": 0, "min": 0, "max": 0x7fffffffffffffff}),
+                "seed_count": ("INT", {"default": 100, "min": 1, "max": 0xffffffff}),
+                # 每行一个提示词；为空时只遍历种子，提示词序号固定为 0
+                "prompts": ("STRING", {"default": "", "multiline": True, "dynamicPrompts": False}),
+                "lease_seconds": ("INT", {"default": 600, "min": 10, "max": 86400}),
+            },
+        }
+
+    RETURN_TYPES = ("INT", "STRING", "INT", "STRING", "STRING")
+    RETURN_NAMES = ("seed", "prompt", "prompt_index", "task_id", "progress")
+    FUNCTION = "claim"
+    CATEGORY = "🍡Comfyui-xishen"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        # 每次执行都要领取新任务
+        return float("nan")
+
+    def claim(self, queue_name, seed_start, seed_count, prompts, lease_seconds):
+        prompt_list = [line.strip() for line in prompts.splitlines() if line.strip()]
+        prompt_count = max(1, len(prompt_list))
+        queue_name = queue_name.strip() or "sweep"
+
+        claimed = work_queue.claim(queue_name, seed_start, seed_count, prompt_count, default_worker_id(), lease_seconds)
+        if claimed is None:
+            raise Exception(f"任务队列 {queue_name} 已全部领取完毕")
+
+        task_index, seed, prompt_index, attempt = claimed
+        prompt = prompt_list[prompt_index] if prompt_list else ""
+        stats = work_queue.stats(queue_name)
+        progress = f"任务 {task_index + 1}/{stats['total']}，已完成 {stats['done']}，进行中 {stats['leased']}"
+        print(f"📋 领取任务 {queue_name}#{task_index}: 种子 {seed}，提示词序号 {prompt_index}（{progress}）")
+        return (seed, prompt, prompt_index, _task_id(queue_name, task_index, attempt), progress)
+
+
+class XishenWorkCompleteNode:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                # 接生成的图像，保证在生成完成后才标记任务完成
+                "images": ("IMAGE",),
+                "task_id": ("STRING", {"forceInput": True}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("images",)
+    FUNCTION = "complete"
+    CATEGORY = "🍡Comfyui-xishen"
+    OUTPUT_NODE = True
+
+    def complete(self, images, task_id):
+        try:
+            queue_name, task_index, attempt = _parse_task_id(task_id)
+        except ValueError:
+            print(f"无效的任务ID: {task_id}")
+            return (images,)
+
+        status = work_queue.complete(queue_name, task_index, default_worker_id(), attempt)
+        if status == "completed":
+            print(f"✅ 任务完成: {task_id}")
+        elif status == "lost":
+            print(f"⚠️ 任务租约已失效，未标记完成: {task_id}（租约已过期并被其他实例重新领取，结果可能重复）")
+        else:
+            print(f"任务不存在: {task_id}")
+        return (images,)
+
+
+NODE_CLASS_MAPPINGS = {
+    "XishenWorkClaimNode": XishenWorkClaimNode,
+    "XishenWorkCompleteNode": XishenWorkCompleteNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "XishenWorkClaimNode": "任务领取-xishen",
+    "XishenWorkCompleteNode": "任务完成-xishen",
+}
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
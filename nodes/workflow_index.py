@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作流图索引 - 共享的节点/连线查找
+
+功能：
+1. 从 extra_pnginfo 中的 workflow 构建 节点ID→节点、连线ID→连线 两个映射
+2. 按 workflow 对象本身缓存索引，同一次执行中的所有节点共用一份，只构建一次
+3. 提供按节点输入查找上游节点和输出类型的方法
+4. 兼容数组形式 [id, 源节点, 源插槽, 目标节点, 目标插槽, 类型] 和对象形式的连线
+"""
+
+import threading
+from collections import OrderedDict
+
+# 最多缓存的工作流数量（同时排队的不同工作流）
+WORKFLOW_CACHE_SIZE = 8
+
+
+def _link_fields(link):
+    """返回 (连线ID, 源节点ID, 源插槽)"""
+    if isinstance(link, dict):
+        return link.get("id"), link.get("origin_id"), link.get("origin_slot")
+    return link[0], link[1], link[2]
+
+
+class WorkflowIndex:
+    """workflow 的只读索引，节点 ID 统一按字符串比较"""
+
+    def __init__(self, workflow):
+        self.workflow = workflow
+        self.nodes = {str(node["id"]): node for node in workflow.get("nodes") or [] if isinstance(node, dict)}
+        self.links = {}
+        for link in workflow.get("links") or []:
+            if link:
+                self.links[_link_fields(link)[0]] = link
+
+    def node(self, node_id):
+        return self.nodes.get(str(node_id))
+
+    def link(self, link_id):
+        return self.links.get(link_id)
+
+    def input_source(self, node_id, input_index=0):
+        """
+        返回连接到节点第 input_index 个输入的 (上游节点, 输出插槽)，未连接时返回 (None, None)
+        """
+        node = self.node(node_id)
+        if node is None:
+            return None, None
+        inputs = node.get("inputs") or []
+        if input_index >= len(inputs):
+            return None, None
+        link = self.link(inputs[input_index].get("link"))
+        if link is None:
+            return None, None
+        _, origin_id, origin_slot = _link_fields(link)
+        return self.node(origin_id), origin_slot
+
+    def input_type(self, node_id, input_index=0):
+        """返回连接到该输入的上游输出类型，未知时返回 None"""
+        source, slot = self.input_source(node_id, input_index)
+        if source is None:
+            return None
+        outputs = source.get("outputs") or []
+        if slot is None or slot >= len(outputs):
+            return None
+        return outputs[slot].get("type")
+
+
+_lock = threading.Lock()
+# id(workflow) -> WorkflowIndex；索引持有 workflow 的引用，保证 id 不会被复用
+_cache = OrderedDict()
+
+
+def get_workflow_index(workflow):
+    """
+    获取 workflow 的索引，同一个 workflow 对象只构建一次
+
+    参数:
+        workflow: extra_pnginfo["workflow"]
+    """
+    key = id(workflow)
+    with _lock:
+        index = _cache.get(key)
+        if index is not None and index.workflow is workflow:
+            _cache.move_to_end(key)
+            return index
+
+    index = WorkflowIndex(workflow)
+    with _lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > WORKFLOW_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
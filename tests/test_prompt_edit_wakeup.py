@@ -0,0 +1,131 @@
+"""
+Wake-up latency of XishenPromptEditNode.
+
+The node blocks the executor thread on a threading.Event; the /prompt_edit/confirm
+and /prompt_edit/stop handlers set it. These tests drive both handlers through a
+stub PromptServer and check that edit_prompt returns within a few milliseconds.
+"""
+
+import asyncio
+import importlib
+import sys
+import time
+import types
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Generous for slow CI machines; an event wake-up is typically well under 5 ms
+MAX_RESUME_SECONDS = 0.05
+
+
+class StubPromptServer:
+    """The parts of server.PromptServer the prompt edit node uses."""
+
+    def __init__(self):
+        self.routes = web.RouteTableDef()
+        self.loop = None
+        self.client_id = "client-1"
+        self.address = "127.0.0.1"
+        self.port = None
+        self.events = []
+        self.interrupts = 0
+
+    async def send_sync(self, event, data, sid=None):
+        self.events.append((event, data, sid))
+
+
+@pytest.fixture(scope="module")
+def prompt_edit():
+    stub = StubPromptServer()
+    server_module = types.ModuleType("server")
+    server_module.PromptServer = type("PromptServer", (), {"instance": stub})
+    saved = sys.modules.get("server")
+    sys.modules["server"] = server_module
+    sys.path.insert(0, str(ROOT))
+    try:
+        yield importlib.import_module("nodes.prompt_edit_node"), stub
+    finally:
+        sys.path.remove(str(ROOT))
+        if saved is None:
+            sys.modules.pop("server", None)
+        else:
+            sys.modules["server"] = saved
+
+
+def _make_app(stub):
+    async def interrupt(request):
+        stub.interrupts += 1
+        return web.json_response({})
+
+    app = web.Application()
+    app.add_routes(stub.routes)
+    app.router.add_post("/interrupt", interrupt)
+    return app
+
+
+async def _wait_for_session(module, unique_id):
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        for session_id, session in module.session_store.items():
+            if session.get("unique_id") == unique_id:
+                return session_id
+        await asyncio.sleep(0.001)
+    raise AssertionError("edit_prompt did not create a session")
+
+
+async def _run_session(module, stub, path, payload):
+    """
+    Run edit_prompt on an executor thread, answer its session through path and
+    return (result, seconds from sending the request until edit_prompt returned).
+    """
+    loop = asyncio.get_running_loop()
+    stub.loop = loop
+    node = module.XishenPromptEditNode()
+    resumed = {}
+
+    def execute():
+        result = node.edit_prompt(["hello"], [""], unique_id=["7"])
+        resumed["at"] = time.perf_counter()
+        return result
+
+    async with TestClient(TestServer(_make_app(stub))) as client:
+        stub.port = client.server.port
+        future = loop.run_in_executor(None, execute)
+        session_id = await _wait_for_session(module, "7")
+
+        sent = time.perf_counter()
+        response = await client.post(path, json=payload(session_id))
+        assert response.status == 200
+        result = await asyncio.wait_for(future, 5)
+
+    return result, resumed["at"] - sent
+
+
+def test_confirm_wakes_executor(prompt_edit):
+    module, stub = prompt_edit
+    result, latency = asyncio.run(_run_session(
+        module, stub, "/prompt_edit/confirm",
+        lambda session_id: {"session_id": session_id, "edited_text": "edited"},
+    ))
+
+    assert result["result"] == (["edited"],)
+    assert latency < MAX_RESUME_SECONDS
+    assert len(module.session_store.items()) == 0
+
+
+def test_stop_wakes_executor(prompt_edit):
+    module, stub = prompt_edit
+    result, latency = asyncio.run(_run_session(
+        module, stub, "/prompt_edit/stop",
+        lambda session_id: {"session_id": session_id},
+    ))
+
+    assert result == ([""],)
+    assert latency < MAX_RESUME_SECONDS
+    assert stub.interrupts == 1
+    assert len(module.session_store.items()) == 0
@@ -0,0 +1,85 @@
+"""
+Line splitting of the text pipeline against the regex it replaced.
+
+The remove-empty-lines node used re.findall(r"(.*?)(\\r\\n|\\n|\\r|$)", text); it now
+splits with str.split. Its output must stay byte-for-byte the same, including the
+original line endings.
+"""
+
+import importlib
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+EDGE_CASES = [
+    "",
+    "\n",
+    "\r",
+    "\r\n",
+    "\n\r",
+    "a",
+    "a\n",
+    "a\r\nb\r\n",
+    "a\rb\rc",
+    "a\r\r\nb",
+    "a\n\n\nb",
+    "  \n\t\nx  \n   ",
+    "trailing   \r\n  \r\nend\t",
+    "\r\n\r\n",
+    "mixed\rline\nendings\r\nhere",
+    "中文\n\n提示词\r\n",
+]
+
+
+def _old_remove_empty_lines(text):
+    parts = re.findall(r"(.*?)(\r\n|\n|\r|$)", text)
+    kept = []
+    for content, sep in parts:
+        if content.strip() != "":
+            kept.append(content + sep)
+    return "".join(kept)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    sys.path.insert(0, str(ROOT))
+    try:
+        yield importlib.import_module("nodes.text_pipeline_node")
+    finally:
+        sys.path.remove(str(ROOT))
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_remove_empty_lines_matches_regex(pipeline, text):
+    assert pipeline.remove_empty_lines(text) == _old_remove_empty_lines(text)
+
+
+def test_remove_empty_lines_fuzz(pipeline):
+    rng = random.Random(0)
+    alphabet = ["a", "b", " ", "\t", "\n", "\r", "\r\n"]
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randrange(12)))
+        assert pipeline.remove_empty_lines(text) == _old_remove_empty_lines(text), repr(text)
+
+
+def test_iter_lines_keeps_line_endings(pipeline):
+    assert list(pipeline.iter_lines("a\r\nb\rc\n")) == [("a", "\r\n"), ("b", "\r"), ("c", "\n")]
+    assert list(pipeline.iter_lines("")) == []
+
+
+def test_remove_empty_lines_node_matches_regex():
+    # The node module imports ComfyUI and torch; it runs only where those are installed
+    pytest.importorskip("torch")
+    pytest.importorskip("comfy.model_management")
+    sys.path.insert(0, str(ROOT))
+    try:
+        node = importlib.import_module("nodes.random_number_node").XishenRemoveEmptyLinesNode()
+    finally:
+        sys.path.remove(str(ROOT))
+    for text in EDGE_CASES:
+        assert node.remove_empty_lines(text) == (_old_remove_empty_lines(text),)
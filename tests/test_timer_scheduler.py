@@ -0,0 +1,104 @@
+"""
+TimerScheduler with the dry-run command backend.
+
+Callbacks run system commands through run_command; with DryRunBackend they are
+only recorded, so these tests check fire order, cancellation and that callbacks
+run outside the scheduler lock without touching the machine.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="module")
+def timer_module():
+    sys.path.insert(0, str(ROOT))
+    try:
+        yield importlib.import_module("nodes.timer_scheduler")
+    finally:
+        sys.path.remove(str(ROOT))
+
+
+@pytest.fixture
+def dry_run(timer_module):
+    backend = timer_module.DryRunBackend()
+    previous = timer_module.set_command_backend(backend)
+    try:
+        yield backend
+    finally:
+        timer_module.set_command_backend(previous)
+
+
+def _command(timer_module, name, done=None):
+    def callback():
+        timer_module.run_command(["echo", name])
+        if done is not None:
+            done.release()
+    return callback
+
+
+def test_fires_in_deadline_order(timer_module, dry_run):
+    scheduler = timer_module.TimerScheduler()
+    done = threading.Semaphore(0)
+    for name, delay in (("third", 0.09), ("first", 0.03), ("second", 0.06)):
+        scheduler.schedule(delay, _command(timer_module, name, done))
+
+    for _ in range(3):
+        assert done.acquire(timeout=2)
+    assert dry_run.commands == [["echo", "first"], ["echo", "second"], ["echo", "third"]]
+    assert scheduler.active() == []
+
+
+def test_cancel(timer_module, dry_run):
+    scheduler = timer_module.TimerScheduler()
+    done = threading.Semaphore(0)
+    cancelled = scheduler.schedule(0.03, _command(timer_module, "cancelled", done))
+    scheduler.schedule(0.06, _command(timer_module, "kept", done), info={"action": "kept"})
+
+    assert scheduler.cancel(cancelled)
+    assert not scheduler.cancel(cancelled)
+    assert [info for _, _, info in scheduler.active()] == [{"action": "kept"}]
+
+    assert done.acquire(timeout=2)
+    assert not done.acquire(timeout=0.1)
+    assert dry_run.commands == [["echo", "kept"]]
+
+
+def test_cancel_all(timer_module, dry_run):
+    scheduler = timer_module.TimerScheduler()
+    for name in ("a", "b", "c"):
+        scheduler.schedule(0.03, _command(timer_module, name))
+
+    assert scheduler.cancel_all() == 3
+    time.sleep(0.1)
+    assert dry_run.commands == []
+    assert scheduler.active() == []
+
+
+def test_callbacks_run_outside_lock(timer_module, dry_run):
+    scheduler = timer_module.TimerScheduler()
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(2)
+
+    scheduler.schedule(0, blocking)
+    assert started.wait(2)
+    try:
+        # A callback holding the lock would block schedule/cancel from other threads
+        begin = time.monotonic()
+        timer_id = scheduler.schedule(60, _command(timer_module, "later"))
+        assert scheduler.cancel(timer_id)
+        assert time.monotonic() - begin < 0.5
+    finally:
+        release.set()
+    assert dry_run.commands == []
@@ -9,9 +9,63 @@ import { api } from "../../../scripts/api.js";
 // Store active edit dialogs
 const activeDialogs = new Map();
 
-// Create the edit dialog
-function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = null) {
-    // Create overlay
+// Single replace patch turning oldText into newText (common prefix/suffix trimmed).
+// Offsets are JavaScript string indices (UTF-16 code units), as the backend expects.
+function diffText(oldText, newText) {
+    const maxPrefix = Math.min(oldText.length, newText.length);
+    let prefix = 0;
+    while (prefix < maxPrefix && oldText.charCodeAt(prefix) === newText.charCodeAt(prefix)) {
+        prefix++;
+    }
+    let suffix = 0;
+    const maxSuffix = maxPrefix - prefix;
+    while (suffix < maxSuffix &&
+           oldText.charCodeAt(oldText.length - 1 - suffix) === newText.charCodeAt(newText.length - 1 - suffix)) {
+        suffix++;
+    }
+    return {
+        offset: prefix,
+        delete: oldText.length - prefix - suffix,
+        insert: newText.slice(prefix, newText.length - suffix)
+    };
+}
+
+const postJson = (path, body) => api.fetchApi(path, {
+    method: 'POST',
+    headers: {
+        'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(body)
+});
+
+function makeButton(label, color, hoverColor, bold = false) {
+    const button = document.createElement('button');
+    button.textContent = label;
+    button.style.cssText = `
+        padding: 10px 20px;
+        background: ${color};
+        color: white;
+        border: none;
+        border-radius: 4px;
+        cursor: pointer;
+        font-size: 14px;
+        ${bold ? 'font-weight: bold;' : ''}
+    `;
+    button.onmouseover = () => {
+        button.style.background = hoverColor;
+    };
+    button.onmouseout = () => {
+        button.style.background = color;
+    };
+    return button;
+}
+
+// Dialog shell shared by the single and the batch dialog: overlay, title, subtitle,
+// the given content element and the cancel / confirm / stop buttons.
+// The confirm button posts {session_id, ...confirmBody()} to confirmPath and calls
+// onConfirmed(body) once the server accepted it; fixes to style or button behaviour go here.
+function createDialogShell({ sessionId, node, titleText, subtitleText, confirmLabel, content,
+                             confirmPath, confirmBody, onConfirmed }) {
     const overlay = document.createElement('div');
     overlay.style.cssText = `
         position: fixed;
@@ -26,7 +80,6 @@ function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = nul
         z-index: 10000;
     `;
 
-    // Create dialog container
     const dialog = document.createElement('div');
     dialog.style.cssText = `
         background: #2b2b2b;
@@ -41,9 +94,8 @@ function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = nul
         flex-direction: column;
     `;
 
-    // Create title
     const title = document.createElement('h3');
-    title.textContent = '✏️ 编辑提示词';
+    title.textContent = titleText;
     title.style.cssText = `
         margin: 0 0 10px 0;
         color: #4a9eff;
@@ -51,35 +103,14 @@ function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = nul
         font-weight: bold;
     `;
 
-    // Create subtitle with instructions
     const subtitle = document.createElement('p');
-    subtitle.textContent = '在下方编辑文本，完成后点击"继续执行"按钮';
+    subtitle.textContent = subtitleText;
     subtitle.style.cssText = `
         margin: 0 0 15px 0;
         color: #aaa;
         font-size: 14px;
     `;
 
-    // Create textarea
-    const textarea = document.createElement('textarea');
-    textarea.value = text;
-    textarea.style.cssText = `
-        width: 100%;
-        min-height: 400px;
-        max-height: 70vh;
-        padding: 15px;
-        font-size: 16px;
-        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-        line-height: 1.6;
-        background: #1a1a1a;
-        color: #fff;
-        border: 1px solid #555;
-        border-radius: 4px;
-        resize: vertical;
-        box-sizing: border-box;
-    `;
-
-    // Create button container
     const buttonContainer = document.createElement('div');
     buttonContainer.style.cssText = `
         display: flex;
@@ -88,105 +119,45 @@ function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = nul
         margin-top: 15px;
     `;
 
-    // Create confirm button
-    const confirmButton = document.createElement('button');
-    confirmButton.textContent = '✓ 继续执行';
-    confirmButton.style.cssText = `
-        padding: 10px 20px;
-        background: #4CAF50;
-        color: white;
-        border: none;
-        border-radius: 4px;
-        cursor: pointer;
-        font-size: 14px;
-        font-weight: bold;
-    `;
-    confirmButton.onmouseover = () => {
-        confirmButton.style.background = '#45a049';
-    };
-    confirmButton.onmouseout = () => {
-        confirmButton.style.background = '#4CAF50';
-    };
+    const confirmButton = makeButton(confirmLabel, '#4CAF50', '#45a049', true);
+    const cancelButton = makeButton('✗ 取消', '#f44336', '#da190b');
+    const stopButton = makeButton('⏹️ 停止执行当前工作流', '#ff9800', '#f57c00');
 
-    // Create cancel button
-    const cancelButton = document.createElement('button');
-    cancelButton.textContent = '✗ 取消';
-    cancelButton.style.cssText = `
-        padding: 10px 20px;
-        background: #f44336;
-        color: white;
-        border: none;
-        border-radius: 4px;
-        cursor: pointer;
-        font-size: 14px;
-    `;
-    cancelButton.onmouseover = () => {
-        cancelButton.style.background = '#da190b';
-    };
-    cancelButton.onmouseout = () => {
-        cancelButton.style.background = '#f44336';
+    const close = () => {
+        overlay.remove();
+        activeDialogs.delete(sessionId);
     };
 
-    // Create stop workflow button
-    const stopButton = document.createElement('button');
-    stopButton.textContent = '⏹️ 停止执行当前工作流';
-    stopButton.style.cssText = `
-        padding: 10px 20px;
-        background: #ff9800;
-        color: white;
-        border: none;
-        border-radius: 4px;
-        cursor: pointer;
-        font-size: 14px;
-    `;
-    stopButton.onmouseover = () => {
-        stopButton.style.background = '#f57c00';
-    };
-    stopButton.onmouseout = () => {
-        stopButton.style.background = '#ff9800';
+    const clearNodeSession = () => {
+        if (node) {
+            node.session_id = null;
+            node.batch_texts = null;
+        }
     };
 
-    // Confirm button handler
     confirmButton.onclick = async () => {
-        const editedText = textarea.value;
-
+        const body = confirmBody();
         try {
-            const response = await api.fetchApi('/prompt_edit/confirm', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    session_id: sessionId,
-                    edited_text: editedText
-                })
-            });
+            const response = await postJson(confirmPath, { session_id: sessionId, ...body });
 
             if (response.ok) {
-                // Call the callback if provided
-                if (onConfirmCallback) {
-                    onConfirmCallback(editedText);
-                }
-
-                // Clear session_id from node after confirmation
-                if (node) {
-                    node.session_id = null;
+                if (onConfirmed) {
+                    onConfirmed(body);
                 }
-
-                // Close dialog
-                overlay.remove();
-                activeDialogs.delete(sessionId);
+                clearNodeSession();
+                close();
             } else if (response.status === 404) {
                 // Session not found - workflow already completed
                 console.warn('Session not found, workflow already completed');
                 alert('工作流已完成，无法继续编辑。请重新运行工作流。');
-                // Close dialog anyway
-                overlay.remove();
-                activeDialogs.delete(sessionId);
-                // Clear session_id from node
-                if (node) {
-                    node.session_id = null;
-                }
+                clearNodeSession();
+                close();
+            } else if (response.status === 502) {
+                // Confirmed and stored, but the parked workflow could not be queued again
+                const { message } = await response.json();
+                alert(message);
+                clearNodeSession();
+                close();
             } else {
                 console.error('Failed to confirm prompt edit');
                 alert('确认失败，请重试');
@@ -197,171 +168,340 @@ function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = nul
         }
     };
 
-    // Cancel button handler
+    // Cancel only closes the dialog, the workflow keeps waiting
     cancelButton.onclick = async () => {
         try {
-            const response = await api.fetchApi('/prompt_edit/cancel', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    session_id: sessionId
-                })
-            });
-
-            if (response.ok) {
-                // Close dialog
-                overlay.remove();
-                activeDialogs.delete(sessionId);
-            } else if (response.status === 404) {
-                // Session not found - just close the dialog
-                console.warn('Session not found, closing dialog anyway');
-                overlay.remove();
-                activeDialogs.delete(sessionId);
+            const response = await postJson('/prompt_edit/cancel', { session_id: sessionId });
+            if (response.ok || response.status === 404) {
+                close();
             } else {
                 console.error('Failed to cancel prompt edit');
                 alert('取消失败，请重试');
             }
         } catch (error) {
             console.error('Error canceling prompt edit:', error);
-            // Close dialog anyway
-            overlay.remove();
-            activeDialogs.delete(sessionId);
+            close();
         }
     };
 
-    // Stop workflow button handler
+    // Stop workflow: always close the dialog, ComfyUI shows the node error naturally
     stopButton.onclick = async () => {
         try {
-            const response = await api.fetchApi('/prompt_edit/stop', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    session_id: sessionId
-                })
-            });
-
-            if (response.ok) {
-                // Close dialog
-                overlay.remove();
-                activeDialogs.delete(sessionId);
-                // No alert - ComfyUI will show node error naturally
-            } else if (response.status === 404) {
-                // Session not found - just close the dialog
-                console.warn('Session not found, closing dialog anyway');
-                overlay.remove();
-                activeDialogs.delete(sessionId);
-                // No alert - ComfyUI will show node error naturally
-            } else {
+            const response = await postJson('/prompt_edit/stop', { session_id: sessionId });
+            if (!response.ok && response.status !== 404) {
                 console.error('Failed to stop workflow');
-                // No alert - keep it silent for better UX
-                overlay.remove();
-                activeDialogs.delete(sessionId);
             }
         } catch (error) {
             console.error('Error stopping workflow:', error);
-            // Close dialog anyway
-            overlay.remove();
-            activeDialogs.delete(sessionId);
-            // No alert - ComfyUI will show node error naturally
         }
+        close();
     };
 
-    // Auto-update text as user types (optional, for real-time sync)
-    let updateTimeout;
-    textarea.oninput = () => {
-        clearTimeout(updateTimeout);
-        updateTimeout = setTimeout(async () => {
-            try {
-                await api.fetchApi('/prompt_edit/update', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        session_id: sessionId,
-                        edited_text: textarea.value
-                    })
-                });
-            } catch (error) {
-                console.error('Error updating prompt:', error);
-            }
-        }, 500);
-    };
-
-    // Assemble dialog
     buttonContainer.appendChild(cancelButton);
     buttonContainer.appendChild(confirmButton);
     buttonContainer.appendChild(stopButton);
 
     dialog.appendChild(title);
     dialog.appendChild(subtitle);
-    dialog.appendChild(textarea);
+    dialog.appendChild(content);
     dialog.appendChild(buttonContainer);
 
     overlay.appendChild(dialog);
-
-    // Add to document
     document.body.appendChild(overlay);
-    
+
+    return { overlay, confirmButton, cancelButton, stopButton };
+}
+
+function createTextarea(text, compact = false) {
+    const textarea = document.createElement('textarea');
+    textarea.value = text;
+    textarea.style.cssText = `
+        width: 100%;
+        min-height: ${compact ? '100px' : '400px'};
+        ${compact ? '' : 'max-height: 70vh;'}
+        padding: ${compact ? '10px' : '15px'};
+        font-size: ${compact ? '15px' : '16px'};
+        font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+        line-height: ${compact ? '1.5' : '1.6'};
+        background: #1a1a1a;
+        color: #fff;
+        border: 1px solid #555;
+        border-radius: 4px;
+        resize: vertical;
+        box-sizing: border-box;
+    `;
+    return textarea;
+}
+
+// Create the edit dialog
+function createEditDialog(sessionId, text, nodeId, onConfirmCallback, node = null, deferred = false) {
+    const textarea = createTextarea(text);
+
+    const shell = createDialogShell({
+        sessionId,
+        node,
+        titleText: '✏️ 编辑提示词',
+        subtitleText: deferred
+            ? '工作流已暂存，队列继续执行其他任务；编辑完成后点击"继续执行"将重新排队并从此处继续'
+            : '在下方编辑文本，完成后点击"继续执行"按钮',
+        confirmLabel: '✓ 继续执行',
+        content: textarea,
+        confirmPath: '/prompt_edit/confirm',
+        confirmBody: () => ({ edited_text: textarea.value }),
+        onConfirmed: (body) => onConfirmCallback && onConfirmCallback(body.edited_text)
+    });
+
+    // Auto-update text as user types (optional, for real-time sync)
+    // Sends one small diff against the last synced revision instead of the whole text;
+    // at most one request is in flight and keystrokes in the meantime are coalesced.
+    const sync = {
+        syncedText: null,   // null until the first full snapshot is acknowledged
+        revision: 0,
+        inFlight: false,
+        dirty: false
+    };
+    let updateTimeout;
+    let firstPendingInput = 0;
+
+    const postUpdate = (body) => postJson('/prompt_edit/update', body);
+
+    const flushUpdate = async () => {
+        if (sync.inFlight) {
+            sync.dirty = true;
+            return;
+        }
+        const current = textarea.value;
+        if (current === sync.syncedText) return;
+
+        sync.inFlight = true;
+        try {
+            let response;
+            if (sync.syncedText === null) {
+                response = await postUpdate({ session_id: sessionId, edited_text: current });
+            } else {
+                response = await postUpdate({
+                    session_id: sessionId,
+                    base_revision: sync.revision,
+                    patches: [diffText(sync.syncedText, current)]
+                });
+                if (response.status === 409) {
+                    // Someone else changed the text: fall back to a full snapshot
+                    response = await postUpdate({ session_id: sessionId, edited_text: current });
+                }
+            }
+            if (response.ok) {
+                const result = await response.json();
+                sync.revision = result.revision;
+                sync.syncedText = current;
+            }
+        } catch (error) {
+            console.error('Error updating prompt:', error);
+        } finally {
+            sync.inFlight = false;
+        }
+        if (sync.dirty) {
+            sync.dirty = false;
+            flushUpdate();
+        }
+    };
+
+    textarea.oninput = () => {
+        clearTimeout(updateTimeout);
+        const now = Date.now();
+        if (!firstPendingInput) {
+            firstPendingInput = now;
+        }
+        // Debounce 500ms, but never hold changes back for more than 2s while typing
+        const delay = Math.max(0, Math.min(500, firstPendingInput + 2000 - now));
+        updateTimeout = setTimeout(() => {
+            firstPendingInput = 0;
+            flushUpdate();
+        }, delay);
+    };
+
     // Focus textarea
     textarea.focus();
     textarea.setSelectionRange(textarea.value.length, textarea.value.length);
-    
+
     // Store dialog reference
-    activeDialogs.set(sessionId, {
-        overlay,
-        textarea,
-        confirmButton,
-        cancelButton,
-        stopButton
+    activeDialogs.set(sessionId, { ...shell, textarea });
+
+    return shell.overlay;
+}
+
+// Create the batch edit dialog: all texts of a list input in one dialog, confirmed at once
+function createBatchEditDialog(sessionId, texts, nodeId, onConfirmCallback, node = null, deferred = false) {
+    // One textarea per text, in a scrollable list
+    const list = document.createElement('div');
+    list.style.cssText = `
+        overflow-y: auto;
+        max-height: 70vh;
+        display: flex;
+        flex-direction: column;
+        gap: 10px;
+    `;
+    const textareas = texts.map((text, index) => {
+        const label = document.createElement('div');
+        label.textContent = `#${index + 1}`;
+        label.style.cssText = `
+            color: #4a9eff;
+            font-size: 13px;
+        `;
+        const textarea = createTextarea(text, true);
+        list.appendChild(label);
+        list.appendChild(textarea);
+        return textarea;
     });
-    
-    return overlay;
+
+    // Confirm all texts with one request
+    const shell = createDialogShell({
+        sessionId,
+        node,
+        titleText: `✏️ 批量编辑提示词（${texts.length} 条）`,
+        subtitleText: deferred
+            ? '工作流已暂存，队列继续执行其他任务；全部编辑完成后点击"全部继续执行"将重新排队并从此处继续'
+            : '在下方逐条编辑文本，完成后点击"全部继续执行"按钮一次性提交',
+        confirmLabel: '✓ 全部继续执行',
+        content: list,
+        confirmPath: '/prompt_edit/confirm_batch',
+        confirmBody: () => ({ edited_texts: textareas.map(textarea => textarea.value) }),
+        onConfirmed: (body) => onConfirmCallback && onConfirmCallback(body.edited_texts)
+    });
+
+    if (textareas.length) {
+        textareas[0].focus();
+    }
+
+    activeDialogs.set(sessionId, { ...shell, textareas });
+
+    return shell.overlay;
+}
+
+// Attach a session to its node and open the edit dialog
+function openSession(detail) {
+    const { session_id, node_id, text, deferred } = detail;
+
+    if (detail.batch) {
+        openBatchSession(detail);
+        return;
+    }
+
+    console.log('Prompt edit session received:', {
+        session_id,
+        node_id,
+        text
+    });
+
+    // Find the node and store the session_id and text on it
+    const node = app.graph._nodes.find(n => n.id == node_id);
+    if (node) {
+        node.session_id = session_id;
+        node.current_text = text;
+
+        // Update the text widget with the incoming text
+        const textWidget = node.widgets.find(w => w.name === "edited_text_widget");
+        if (textWidget && text) {
+            textWidget.value = text;
+            app.graph.setDirtyCanvas(true);
+        }
+
+        // Automatically open the edit dialog
+        createEditDialog(session_id, text, node_id, (editedText) => {
+            // Update the node's text widget when dialog is confirmed
+            if (textWidget) {
+                textWidget.value = editedText;
+                node.current_text = editedText;
+                app.graph.setDirtyCanvas(true);
+            }
+        }, node, !!deferred);
+
+        console.log(`Session ID ${session_id} stored on node ${node_id}, dialog opened`);
+    }
+}
+
+// Attach a batch session (list input) to its node and open the batch dialog
+function openBatchSession(detail) {
+    const { session_id, node_id, texts, deferred } = detail;
+
+    console.log('Batch prompt edit session received:', {
+        session_id,
+        node_id,
+        count: texts.length
+    });
+
+    const node = app.graph._nodes.find(n => n.id == node_id);
+    if (node) {
+        node.session_id = session_id;
+        node.batch_texts = texts;
+
+        createBatchEditDialog(session_id, texts, node_id, (editedTexts) => {
+            node.current_text = editedTexts.join('\n');
+            app.graph.setDirtyCanvas(true);
+        }, node, !!deferred);
+    }
 }
 
+let sessionsRestored = false;
+
 // Register extension
 app.registerExtension({
     name: "Comfy.PromptEdit",
     
     async setup() {
-        // Listen for session_id from the server
+        // Listen for session_id from the server (only sessions queued by this client,
+        // unless the node opted into broadcasting)
         api.addEventListener("prompt_edit_session", (event) => {
-            const { session_id, node_id, text } = event.detail;
-
-            console.log('Prompt edit session received:', {
-                session_id,
-                node_id,
-                text
-            });
+            openSession(event.detail);
+        });
 
-            // Find the node and store the session_id and text on it
-            const node = app.graph._nodes.find(n => n.id == node_id);
+        // The server continued without us (auto pass-through timeout): close the dialog
+        api.addEventListener("prompt_edit_closed", (event) => {
+            const { session_id } = event.detail;
+            const dialog = activeDialogs.get(session_id);
+            if (dialog) {
+                dialog.overlay.remove();
+                activeDialogs.delete(session_id);
+            }
+            const node = app.graph._nodes.find(n => n.session_id === session_id);
             if (node) {
-                node.session_id = session_id;
-                node.current_text = text;
-
-                // Update the text widget with the incoming text
-                const textWidget = node.widgets.find(w => w.name === "edited_text_widget");
-                if (textWidget && text) {
-                    textWidget.value = text;
-                    app.graph.setDirtyCanvas(true);
-                }
+                node.session_id = null;
+                node.batch_texts = null;
+            }
+        });
 
-                // Automatically open the edit dialog
-                createEditDialog(session_id, text, node_id, (editedText) => {
-                    // Update the node's text widget when dialog is confirmed
-                    if (textWidget) {
-                        textWidget.value = editedText;
-                        node.current_text = editedText;
-                        app.graph.setDirtyCanvas(true);
-                    }
-                }, node);
+        // An auto pass-through was confirmed but the workflow could not be queued again
+        api.addEventListener("prompt_edit_requeue_failed", (event) => {
+            console.error('Prompt edit re-queue failed:', event.detail.message);
+            alert(event.detail.message);
+        });
 
-                console.log(`Session ID ${session_id} stored on node ${node_id}, dialog opened`);
+        // Restore dialogs of our own pending sessions after a page reload or reconnect
+        const restoreSessions = async () => {
+            if (!api.clientId) return;
+            try {
+                const response = await api.fetchApi(`/prompt_edit/sessions?client_id=${encodeURIComponent(api.clientId)}`);
+                if (!response.ok) return;
+                const { sessions } = await response.json();
+                for (const session of sessions || []) {
+                    if (!activeDialogs.has(session.session_id)) {
+                        // Continue from the latest synced edit rather than the original input
+                        openSession({
+                            ...session,
+                            text: session.edited_text ?? session.text,
+                            texts: session.edited_texts ?? session.texts
+                        });
+                    }
+                }
+            } catch (error) {
+                console.error('Error listing prompt edit sessions:', error);
+            }
+        };
+        api.addEventListener("reconnected", restoreSessions);
+        api.addEventListener("status", () => {
+            // The first status message carries our clientId
+            if (!sessionsRestored && api.clientId) {
+                sessionsRestored = true;
+                restoreSessions();
             }
         });
     },
@@ -395,6 +535,11 @@ app.registerExtension({
                         return;
                     }
 
+                    if (this.batch_texts) {
+                        openBatchSession({ session_id: this.session_id, node_id: this.id, texts: this.batch_texts });
+                        return;
+                    }
+
                     // Find the text widget
                     const textWidget = this.widgets.find(w => w.name === "edited_text_widget");
                     const currentText = textWidget ? textWidget.value : this.current_text;
@@ -422,13 +567,18 @@ app.registerExtension({
                     const editedText = textWidget ? textWidget.value : this.current_text;
 
                     // Send confirmation to backend if we have a session_id
+                    // (a batch session is confirmed with its texts unchanged)
                     if (this.session_id) {
-                        api.fetchApi('/prompt_edit/confirm', {
+                        const batch = !!this.batch_texts;
+                        api.fetchApi(batch ? '/prompt_edit/confirm_batch' : '/prompt_edit/confirm', {
                             method: 'POST',
                             headers: {
                                 'Content-Type': 'application/json',
                             },
-                            body: JSON.stringify({
+                            body: JSON.stringify(batch ? {
+                                session_id: this.session_id,
+                                edited_texts: this.batch_texts
+                            } : {
                                 session_id: this.session_id,
                                 edited_text: editedText
                             })
@@ -437,11 +587,16 @@ app.registerExtension({
                                 console.log('Prompt edit confirmed');
                                 // Clear session_id after confirmation
                                 this.session_id = null;
+                                this.batch_texts = null;
                                 // Visual feedback
                                 continueButton.name = "✓ 已继续";
                                 setTimeout(() => {
                                     continueButton.name = "✓ 继续执行";
                                 }, 2000);
+                            } else if (response.status === 502) {
+                                this.session_id = null;
+                                this.batch_texts = null;
+                                response.json().then(({ message }) => alert(message));
                             } else {
                                 console.error('Failed to confirm prompt edit');
                                 alert('确认失败，请重试');
@@ -1,5 +1,6 @@
 import { app } from '../../scripts/app.js';
 import { ComfyWidgets } from '../../scripts/widgets.js';
+import { api } from '../../scripts/api.js';
 
 // Displays input text on a node
 // TODO: This should need to be so complicated. Refactor at some point.
@@ -76,11 +77,43 @@ app.registerExtension({
                 });
             }
 
+            // 分页模式：在文本框下方添加翻页按钮，其余页面按需从服务端获取
+            function addPager(info) {
+                const showPage = async (page) => {
+                    try {
+                        const response = await api.fetchApi(`/xishen/display/page?id=${encodeURIComponent(info.id)}&page=${page}`);
+                        if (!response.ok) {
+                            alert('结果已过期，请重新运行工作流');
+                            return;
+                        }
+                        const next = await response.json();
+                        populate.call(this, next.text);
+                        addPager.call(this, next);
+                    } catch (error) {
+                        console.error('Error loading display page:', error);
+                    }
+                };
+
+                const label = `第 ${info.page + 1}/${info.pages} 页（共 ${info.total} 条）`;
+                const prev = this.addWidget("button", `◀ 上一页 · ${label}`, null, () => {
+                    if (info.page > 0) showPage(info.page - 1);
+                });
+                prev.serialize = false;
+                const next = this.addWidget("button", `下一页 ▶ · ${label}`, null, () => {
+                    if (info.page + 1 < info.pages) showPage(info.page + 1);
+                });
+                next.serialize = false;
+                app.graph.setDirtyCanvas(true, false);
+            }
+
             // When the node is executed we will be sent the input text, display this in the widget
             const onExecuted = nodeType.prototype.onExecuted;
             nodeType.prototype.onExecuted = function (message) {
                 onExecuted?.apply(this, arguments);
                 populate.call(this, message.text);
+                if (message.page?.[0]) {
+                    addPager.call(this, message.page[0]);
+                }
             };
 
             const VALUES = Symbol();
@@ -1,6 +1,43 @@
 import { app } from "../../../scripts/app.js";
 import { api } from "../../../scripts/api.js";
 
+// 所有主题节点共享的分类数据缓存：数据和 ETag 一起保存，每次使用前带 If-None-Match 向服务端验证，
+// 数据未变化时只需一次 304 往返，主题库修改后已打开的页面也能拿到新数据
+const etagCache = new Map();   // url -> { etag, data }
+const inflight = new Map();    // url -> Promise，同时打开多个节点时共用一次请求
+
+const fetchJson = (url) => {
+    if (inflight.has(url)) {
+        return inflight.get(url);
+    }
+    const cached = etagCache.get(url);
+    const promise = (async () => {
+        const options = cached ? { headers: { "If-None-Match": cached.etag } } : {};
+        const response = await api.fetchApi(url, options);
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        if (!response.ok) {
+            throw new Error(`${url} 返回 ${response.status}`);
+        }
+        const data = await response.json();
+        const etag = response.headers.get("ETag");
+        if (etag) {
+            etagCache.set(url, { etag, data });
+        }
+        return data;
+    })().finally(() => inflight.delete(url));
+    inflight.set(url, promise);
+    return promise;
+};
+
+const getMainCategories = () =>
+    fetchJson("/xishen/theme/categories").then(data => data.primary || []);
+
+const getSubCategories = (primary) =>
+    fetchJson(`/xishen/theme/subcategories?primary=${encodeURIComponent(primary)}`)
+        .then(data => data.secondary || []);
+
 app.registerExtension({
     name: "Xishen.ThemePrompt",
     async nodeCreated(node, app) {
@@ -13,25 +50,29 @@ app.registerExtension({
 
         if (!mainCategoryWidget || !subCategoryWidget) return;
 
-        // 3. 从后端 API 获取 JSON 数据
-        let subjectsData = {};
+        // 3. 从后端 API 获取一级分类（所有节点共享同一次请求）
+        let mainKeys = [];
         try {
-            // 使用相对路径加载JSON文件
-            const scriptUrl = new URL(import.meta.url);
-            const scriptPath = scriptUrl.pathname;
-            const extensionPath = scriptPath.substring(0, scriptPath.lastIndexOf('/') + 1);
-            const jsonUrl = extensionPath + "xishen_theme_prompts.json";
-            
-            const response = await fetch(jsonUrl);
-            subjectsData = await response.json();
+            mainKeys = await getMainCategories();
         } catch (error) {
-            console.error("Xishen Theme Prompt: Failed to fetch xishen_theme_prompts.json", error);
+            console.error("Xishen Theme Prompt: Failed to fetch theme categories", error);
             return; // 失败则退出
         }
 
-        // 4. 定义一个更新子菜单的函数
-        const updateSubCategories = (selectedMain) => {
-            const subItems = subjectsData[selectedMain] || ["None"];
+        // 4. 定义一个更新子菜单的函数（二级分类按一级分类懒加载）
+        const updateSubCategories = async (selectedMain) => {
+            let subItems = ["None"];
+            try {
+                const items = await getSubCategories(selectedMain);
+                if (items.length > 0) {
+                    subItems = items;
+                }
+            } catch (error) {
+                console.error(`Xishen Theme Prompt: Failed to fetch subcategories of ${selectedMain}`, error);
+            }
+
+            // 一级分类已被再次切换时丢弃过期结果
+            if (mainCategoryWidget.value !== selectedMain) return;
             
             // 更新子菜单的选项列表
             subCategoryWidget.options.values = subItems;
@@ -40,11 +81,13 @@ app.registerExtension({
             if (!subItems.includes(subCategoryWidget.value)) {
                 subCategoryWidget.value = subItems[0];
             }
+
+            if (node.graph) {
+                node.setDirtyCanvas(true);
+            }
         };
 
         // 5. 初始化主菜单
-        // 获取所有主分类 Key
-        const mainKeys = Object.keys(subjectsData);
         if (mainKeys.length > 0) {
             mainCategoryWidget.options.values = mainKeys;
             // 如果当前值为空或不在列表里，设为第一个